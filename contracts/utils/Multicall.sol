@@ -0,0 +1,83 @@
+pragma solidity 0.5.17;
+pragma experimental ABIEncoderV2;
+
+/**
+ * @title Multicall contract.
+ *
+ * @notice Aggregates the results of multiple read-only function calls
+ * into a single call, so off-chain scripts can read protocol state with
+ * one eth_call instead of one round-trip per value.
+ *
+ * @dev The calls are executed with the context of this contract as
+ * msg.sender. Not meant to be used for state changing calls.
+ * */
+contract Multicall {
+	/* Storage */
+
+	struct Call {
+		address target;
+		bytes callData;
+	}
+
+	struct Result {
+		bool success;
+		bytes returnData;
+	}
+
+	/* Functions */
+
+	/**
+	 * @notice Execute a list of calls, reverting if any of them fails.
+	 * @param calls The list of target addresses and call data.
+	 * @return The block number and the return data of every call.
+	 * */
+	function aggregate(Call[] memory calls) public returns (uint256 blockNumber, bytes[] memory returnData) {
+		blockNumber = block.number;
+		returnData = new bytes[](calls.length);
+		for (uint256 i = 0; i < calls.length; i++) {
+			(bool success, bytes memory ret) = calls[i].target.call(calls[i].callData);
+			require(success, "Multicall::aggregate: call failed");
+			returnData[i] = ret;
+		}
+	}
+
+	/**
+	 * @notice Execute a list of calls, optionally tolerating failed ones.
+	 * @param requireSuccess Whether to revert if any of the calls fails.
+	 * @param calls The list of target addresses and call data.
+	 * @return The block number and the success flag and return data of every call.
+	 * */
+	function tryAggregate(bool requireSuccess, Call[] memory calls) public returns (uint256 blockNumber, Result[] memory returnData) {
+		blockNumber = block.number;
+		returnData = new Result[](calls.length);
+		for (uint256 i = 0; i < calls.length; i++) {
+			(bool success, bytes memory ret) = calls[i].target.call(calls[i].callData);
+			if (requireSuccess) {
+				require(success, "Multicall::tryAggregate: call failed");
+			}
+			returnData[i] = Result(success, ret);
+		}
+	}
+
+	/**
+	 * @notice Get the current block number.
+	 * */
+	function getBlockNumber() public view returns (uint256 blockNumber) {
+		blockNumber = block.number;
+	}
+
+	/**
+	 * @notice Get the current block timestamp.
+	 * */
+	function getCurrentBlockTimestamp() public view returns (uint256 timestamp) {
+		timestamp = block.timestamp;
+	}
+
+	/**
+	 * @notice Get the RBTC balance of an address.
+	 * @param addr The address to query.
+	 * */
+	function getEthBalance(address addr) public view returns (uint256 balance) {
+		balance = addr.balance;
+	}
+}
@@ -5,15 +5,15 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 def swapTokens(amount, minReturn, swapNetworkAddress, sourceTokenAddress, destTokenAddress):
-    abiFile =  open('./scripts/contractInteraction/ABIs/SovrynSwapNetwork.json')
-    abi = json.load(abiFile)
-    swapNetwork = Contract.from_abi("SovrynSwapNetwork", address=swapNetworkAddress, abi=abi, owner=conf.acct)
-    sourceToken = Contract.from_abi("Token", address=sourceTokenAddress, abi=TestToken.abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/SovrynSwapNetwork.json')
+    swapNetwork = getContract("SovrynSwapNetwork", swapNetworkAddress, abi)
+    sourceToken = getContract("Token", sourceTokenAddress, TestToken.abi)
 
     if(sourceTokenAddress == conf.contracts["WRBTC"]):
-        contract = Contract.from_abi("WRBTC", address=conf.contracts["WRBTC"], abi=WRBTC.abi, owner=conf.acct)
+        contract = getContract("WRBTC", conf.contracts["WRBTC"], WRBTC.abi)
         tx = contract.deposit({'value':amount})
 
     if(sourceToken.allowance(conf.acct, swapNetworkAddress) < amount):
@@ -38,9 +38,8 @@ def swapTokens(amount, minReturn, swapNetworkAddress, sourceTokenAddress, destTo
     
     
 def addLiquidity(converter, reserve, amount):
-    abiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
-    abi = json.load(abiFile)
-    converter = Contract.from_abi("LiquidityPoolV2Converter", address=converter, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
+    converter = getContract("LiquidityPoolV2Converter", converter, abi)
     print("is active? ", converter.isActive())
     print("price oracle", converter.priceOracle())
     tx = converter.addLiquidity(reserve, amount, 1)
@@ -48,28 +47,26 @@ def addLiquidity(converter, reserve, amount):
 
 def addLiquidityWithMS(converter, reserve, amount):
     # approve
-    token = Contract.from_abi("ERC20", address=reserve, abi=ERC20.abi, owner=conf.acct)
+    token = getContract("ERC20", reserve, ERC20.abi)
     data = token.approve.encode_input(converter, amount)
     print(data)
     sendWithMultisig(conf.contracts['multisig'], token.address, data, conf.acct)
 
     #add liquidity
-    abiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
-    abi = json.load(abiFile)
-    converter = Contract.from_abi("LiquidityPoolV2Converter", address=converter, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
+    converter = getContract("LiquidityPoolV2Converter", converter, abi)
     data = converter.addLiquidity.encode_input(reserve, amount, 1)
     print(data)
     sendWithMultisig(conf.contracts['multisig'], converter.address, data, conf.acct)
 
 def readBalanceFromAMM():
 
-    tokenContract = Contract.from_abi("Token", address=conf.contracts['USDT'], abi=TestToken.abi, owner=conf.acct)
+    tokenContract = getContract("Token", conf.contracts['USDT'], TestToken.abi)
     bal = tokenContract.balanceOf(conf.contracts['ConverterUSDT'])
     print("supply of USDT on swap", bal/1e18)
 
-    abiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
-    abi = json.load(abiFile)
-    converter = Contract.from_abi("LiquidityPoolV2Converter", address=conf.contracts['ConverterUSDT'], abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
+    converter = getContract("LiquidityPoolV2Converter", conf.contracts['ConverterUSDT'], abi)
 
     reserve = converter.reserves(conf.contracts['USDT'])
 
@@ -77,9 +74,8 @@ def readBalanceFromAMM():
     print(reserve)
 
 def testV1Converter(converterAddress, reserve1, reserve2):
-    abiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
-    abi = json.load(abiFile)
-    converter = Contract.from_abi("LiquidityPoolV1Converter", address=converterAddress, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
+    converter = getContract("LiquidityPoolV1Converter", converterAddress, abi)
 
     print(converter.reserveRatio())
     print(converter.reserves(reserve1))
@@ -87,10 +83,10 @@ def testV1Converter(converterAddress, reserve1, reserve2):
     bal1 = converter.reserves(reserve1)[0]
     bal2 = converter.reserves(reserve2)[0]
 
-    tokenContract1 = Contract.from_abi("Token", address=reserve1, abi=TestToken.abi, owner=conf.acct)
+    tokenContract1 = getContract("Token", reserve1, TestToken.abi)
     tokenContract1.approve(converter.address, bal1/100)
 
-    tokenContract2 = Contract.from_abi("Token", address=reserve2, abi=TestToken.abi, owner=conf.acct)
+    tokenContract2 = getContract("Token", reserve2, TestToken.abi)
     tokenContract2.approve(converter.address, bal2/50)
     accountBalance = tokenContract2.balanceOf(conf.acct)
 
@@ -114,37 +110,34 @@ def testV1Converter(converterAddress, reserve1, reserve2):
 
 
 def addLiquidityV1(converter, tokens, amounts):
-    abiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
-    abi = json.load(abiFile)
-    converter = Contract.from_abi("LiquidityPoolV1Converter", address=converter, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
+    converter = getContract("LiquidityPoolV1Converter", converter, abi)
 
     print("is active? ", converter.isActive())
 
-    token = Contract.from_abi("ERC20", address=tokens[0], abi=ERC20.abi, owner=conf.acct)
+    token = getContract("ERC20", tokens[0], ERC20.abi)
     token.approve(converter.address, amounts[0])
-    token = Contract.from_abi("ERC20", address=tokens[1], abi=ERC20.abi, owner=conf.acct)
+    token = getContract("ERC20", tokens[1], ERC20.abi)
     token.approve(converter.address, amounts[1])
 
     tx = converter.addLiquidity(tokens, amounts, 1)
     print(tx)
 
 def addLiquidityV1UsingWrapper(wrapper, converter, tokens, amounts):
-    abiFile =  open('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
-    abi = json.load(abiFile)
-    wrapperProxy = Contract.from_abi("RBTCWrapperProxy", address=wrapper, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
+    wrapperProxy = getContract("RBTCWrapperProxy", wrapper, abi)
     '''
-    token = Contract.from_abi("ERC20", address=tokens[1], abi=ERC20.abi, owner=conf.acct)
+    token = getContract("ERC20", tokens[1], ERC20.abi)
     token.approve(wrapperProxy.address, amounts[1])
     '''
     tx = wrapperProxy.addLiquidityToV1(converter, tokens, amounts, 1, {'value': amounts[0], 'allow_revert':True})
     print(tx)
 
 def addLiquidityV2UsingWrapper(converter, tokenAddress, amount):
-    abiFile =  open('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
-    abi = json.load(abiFile)
-    wrapperProxy = Contract.from_abi("RBTCWrapperProxy", address=conf.contracts['RBTCWrapperProxy'], abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
+    wrapperProxy = getContract("RBTCWrapperProxy", conf.contracts['RBTCWrapperProxy'], abi)
     
-    token = Contract.from_abi("ERC20", address=tokenAddress, abi=ERC20.abi, owner=conf.acct)
+    token = getContract("ERC20", tokenAddress, ERC20.abi)
     token.approve(wrapperProxy.address, amount)
     
     tx = wrapperProxy.addLiquidityToV2(converter, tokenAddress, amount, 1, {'allow_revert':True})
@@ -152,10 +145,9 @@ def addLiquidityV2UsingWrapper(converter, tokenAddress, amount):
 
 
 def getTargetAmountFromAMM(_sourceReserveBalance, _sourceReserveWeight, _targetReserveBalance, _targetReserveWeight, _amount):
-    abiFile =  open('./scripts/contractInteraction/ABIs/SovrynSwapFormula.json')
-    abi = json.load(abiFile)
+    abi = loadABI('./scripts/contractInteraction/ABIs/SovrynSwapFormula.json')
 
-    sovrynSwapFormula = Contract.from_abi("SovrynSwapFormula", address=conf.contracts['SovrynSwapFormula'], abi=abi, owner=conf.acct)
+    sovrynSwapFormula = getContract("SovrynSwapFormula", conf.contracts['SovrynSwapFormula'], abi)
 
     targetAmount = sovrynSwapFormula.crossReserveTargetAmount(_sourceReserveBalance, _sourceReserveWeight, _targetReserveBalance, _targetReserveWeight, _amount)
 
@@ -163,12 +155,11 @@ def getTargetAmountFromAMM(_sourceReserveBalance, _sourceReserveWeight, _targetR
 
 #expects the first token to be wrbtc
 def addLiquidityV1FromMultisigUsingWrapper(wrapper, converter, tokens, amounts, minReturn):
-    abiFile =  open('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
-    abi = json.load(abiFile)
-    wrapperProxy = Contract.from_abi("RBTCWrapperProxy", address=wrapper, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
+    wrapperProxy = getContract("RBTCWrapperProxy", wrapper, abi)
 
     # approve
-    token = Contract.from_abi("ERC20", address=tokens[1], abi=ERC20.abi, owner=conf.acct)
+    token = getContract("ERC20", tokens[1], ERC20.abi)
     data = token.approve.encode_input(wrapperProxy.address, amounts[1])
     print(data)
 
@@ -181,17 +172,16 @@ def addLiquidityV1FromMultisigUsingWrapper(wrapper, converter, tokens, amounts,
     sendWithMultisig(conf.contracts['multisig'], wrapperProxy.address, data, conf.acct)
 
 def removeLiquidityV1toMultisigUsingWrapper(wrapper, converter, amount, tokens, minReturn):
-    abiFile =  open('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
-    abi = json.load(abiFile)
-    wrapperProxy = Contract.from_abi("RBTCWrapperProxy", address= wrapper, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
+    wrapperProxy = getContract("RBTCWrapperProxy", wrapper, abi)
 
     converterAbiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
     converterAbi = json.load(converterAbiFile)
-    converterContract = Contract.from_abi("LiquidityPoolV1Converter", address=converter, abi=converterAbi, owner=conf.acct)
+    converterContract = getContract("LiquidityPoolV1Converter", converter, converterAbi)
     poolToken = converterContract.anchor()
 
     # approve
-    token = Contract.from_abi("ERC20", address=poolToken, abi=ERC20.abi, owner=conf.acct)
+    token = getContract("ERC20", poolToken, ERC20.abi)
     data = token.approve.encode_input(wrapperProxy.address, amount)
     print(data)
     
@@ -205,7 +195,6 @@ def removeLiquidityV1toMultisigUsingWrapper(wrapper, converter, amount, tokens,
 
 
 def readWRBTCAddressFromWrapper(wrapper):
-    abiFile =  open('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
-    abi = json.load(abiFile)
-    wrapperProxy = Contract.from_abi("RBTCWrapperProxy", address=wrapper, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/RBTCWrapperProxy.json')
+    wrapperProxy = getContract("RBTCWrapperProxy", wrapper, abi)
     print(wrapperProxy.wrbtcTokenAddress())
\ No newline at end of file
@@ -23,6 +23,7 @@ from scripts.contractInteraction.misc import *
 from scripts.contractInteraction.prices import *
 from scripts.contractInteraction.liquidity_miningV2 import *
 from scripts.contractInteraction.liquidity_mining_V1toV2_migrator import *
+from scripts.contractInteraction.multicall import *
 
 def main():
     
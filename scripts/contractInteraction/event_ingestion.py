@@ -0,0 +1,262 @@
+'''
+Event ingestion engine.
+
+Reads the logs of a set of contracts with eth_getLogs, decodes them and stores them in SQLite, one stream per
+set of contracts and events. Every stream has its own block cursor, which is stored in the same transaction
+as the events of a block range, so an interrupted run resumes exactly where it stopped.
+
+    - the block range of a request is split in halves when the node rejects it (too many results, range too
+      large, timeout) and grows again after successful requests
+    - logs are decoded with a topic -> event ABI map built once per stream, without brownie transaction
+      decoding
+
+usage:
+    engine = EventIngestion()
+    engine.ingest(EventStream('staking', [conf.contracts['Staking']], Staking.abi, ['TokensStaked']))
+    engine.ingestAll()                                  # all streams of defaultStreams()
+    engine.events('staking', event = 'TokensStaked')
+
+    brownie run scripts/contractInteraction/event_ingestion.py --network rsk-mainnet
+
+Decoded values are stored as JSON: addresses in lower case, bytes as hex strings, integers as numbers.
+'''
+
+from brownie import *
+from eth_abi import decode_abi, decode_single
+from hexbytes import HexBytes
+import json
+import os
+import re
+import sqlite3
+
+import scripts.contractInteraction.config as conf
+
+INDEX_DIR = './indexes/'
+
+# block range of the first eth_getLogs request, it is halved on errors and doubled on success up to the maximum
+INITIAL_WINDOW = 2000
+MAX_WINDOW = 50000
+# blocks behind the head which are not ingested yet, to avoid reorgs
+CONFIRMATIONS = 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS events (
+    stream TEXT,
+    blockNumber INTEGER,
+    logIndex INTEGER,
+    transactionHash TEXT,
+    address TEXT,
+    event TEXT,
+    args TEXT,
+    PRIMARY KEY (stream, blockNumber, logIndex)
+);
+CREATE INDEX IF NOT EXISTS eventsStreamEvent ON events (stream, event);
+CREATE TABLE IF NOT EXISTS cursors (
+    stream TEXT PRIMARY KEY,
+    lastBlock INTEGER
+);
+'''
+
+
+class EventStream:
+
+    def __init__(self, name, addresses, abi, events, startBlock = 0):
+        '''
+        @param name the name of the cursor and of the events in the database
+        @param addresses the contracts emitting the events
+        @param abi the ABI containing the events
+        @param events the names of the events to ingest
+        @param startBlock the first block to ingest, e.g. the deployment block of the contracts
+        '''
+        self.name = name
+        self.addresses = [str(address) for address in addresses]
+        self.startBlock = startBlock
+        self.decoders = {}
+        for entry in abi:
+            if entry.get('type') == 'event' and entry['name'] in events and not entry.get('anonymous'):
+                decoder = EventDecoder(entry)
+                self.decoders[decoder.topic] = decoder
+        missing = set(events) - set(decoder.name for decoder in self.decoders.values())
+        if missing:
+            raise Exception("events not found in the ABI: " + ', '.join(sorted(missing)))
+
+    def filterParams(self):
+        return {'address': self.addresses, 'topics': [list(self.decoders.keys())]}
+
+    def decode(self, log):
+        return self.decoders[toHex(log['topics'][0])].decode(log)
+
+
+class EventDecoder:
+
+    def __init__(self, abi):
+        self.name = abi['name']
+        inputs = abi['inputs']
+        self.signature = self.name + '(' + ','.join(abiType(i) for i in inputs) + ')'
+        self.topic = toHex(web3.keccak(text = self.signature))
+        self.indexed = [(i['name'], abiType(i)) for i in inputs if i['indexed']]
+        self.dataNames = [i['name'] for i in inputs if not i['indexed']]
+        self.dataTypes = [abiType(i) for i in inputs if not i['indexed']]
+
+    def decode(self, log):
+        '''
+        @return a dict of the event arguments
+        '''
+        args = {}
+        for (name, type), topic in zip(self.indexed, log['topics'][1:]):
+            if isDynamic(type):
+                # only the hash of dynamic values is part of the topic
+                args[name] = toHex(topic)
+            else:
+                args[name] = decode_single(type, bytes(HexBytes(topic)))
+        values = decode_abi(self.dataTypes, bytes(HexBytes(log['data'])))
+        args.update(zip(self.dataNames, values))
+        return {name: jsonValue(value) for name, value in args.items()}
+
+
+class EventIngestion:
+
+    def __init__(self, fileName = None):
+        '''
+        @param fileName the SQLite file, one per network by default
+        '''
+        if fileName is None:
+            os.makedirs(INDEX_DIR, exist_ok = True)
+            fileName = INDEX_DIR + 'events_' + network.show_active() + '.db'
+        self.db = sqlite3.connect(fileName)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def getCursor(self, stream):
+        row = self.db.execute("SELECT lastBlock FROM cursors WHERE stream = ?", (stream,)).fetchone()
+        return row['lastBlock'] if row else None
+
+    def setCursor(self, stream, blockNumber):
+        self.db.execute("INSERT OR REPLACE INTO cursors (stream, lastBlock) VALUES (?, ?)", (stream, blockNumber))
+
+    def ingest(self, stream, toBlock = None, handler = None):
+        '''
+        ingests the events of the stream from its cursor up to the given block
+        @param toBlock defaults to the latest block minus CONFIRMATIONS
+        @param handler called with the stream and the decoded events of every block range before they are stored
+        @return the number of ingested events
+        '''
+        if toBlock is None:
+            toBlock = chain.height - CONFIRMATIONS
+        cursor = self.getCursor(stream.name)
+        fromBlock = stream.startBlock if cursor is None else cursor + 1
+        count = 0
+        for rangeStart, rangeEnd, logs in getLogsAdaptive(stream.filterParams(), fromBlock, toBlock):
+            events = []
+            for log in logs:
+                event = {
+                    'blockNumber': log['blockNumber'],
+                    'logIndex': log['logIndex'],
+                    'transactionHash': toHex(log['transactionHash']),
+                    'address': str(log['address']).lower(),
+                    'event': stream.decoders[toHex(log['topics'][0])].name,
+                    'args': stream.decode(log),
+                }
+                events.append(event)
+            if handler is not None:
+                handler(stream, events)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO events (stream, blockNumber, logIndex, transactionHash, address, event, args) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(stream.name, e['blockNumber'], e['logIndex'], e['transactionHash'], e['address'], e['event'], json.dumps(e['args'])) for e in events]
+            )
+            self.setCursor(stream.name, rangeEnd)
+            self.db.commit()
+            count += len(events)
+        return count
+
+    def ingestAll(self, streams = None, toBlock = None):
+        if toBlock is None:
+            toBlock = chain.height - CONFIRMATIONS
+        for stream in streams or defaultStreams():
+            count = self.ingest(stream, toBlock)
+            print(stream.name + ":", count, "events ingested up to block", self.getCursor(stream.name))
+
+    def events(self, stream, event = None, fromBlock = 0, toBlock = None):
+        '''
+        @return the stored events of the stream in the order they were emitted
+        '''
+        query = "SELECT * FROM events WHERE stream = ? AND blockNumber >= ?"
+        params = [stream, fromBlock]
+        if event is not None:
+            query += " AND event = ?"
+            params.append(event)
+        if toBlock is not None:
+            query += " AND blockNumber <= ?"
+            params.append(toBlock)
+        rows = self.db.execute(query + " ORDER BY blockNumber, logIndex", params)
+        return [dict(row, args = json.loads(row['args'])) for row in rows]
+
+
+def getLogsAdaptive(params, fromBlock, toBlock, window = INITIAL_WINDOW, maxWindow = MAX_WINDOW):
+    '''
+    reads the logs of the block range with eth_getLogs, splitting the range whenever the node rejects a request
+    @param params the filter params without the block range
+    @return a generator of (fromBlock, toBlock, logs) for consecutive block ranges covering the whole range
+    '''
+    start = fromBlock
+    while start <= toBlock:
+        end = min(start + window - 1, toBlock)
+        try:
+            logs = web3.eth.getLogs(dict(params, fromBlock = start, toBlock = end))
+        except Exception as e:
+            if end == start:
+                raise
+            window = max(1, (end - start + 1) // 2)
+            print("eth_getLogs failed for", end - start + 1, "blocks, retrying with", window, "blocks:", str(e)[:100])
+            continue
+        yield start, end, logs
+        start = end + 1
+        window = min(window * 2, maxWindow)
+
+def defaultStreams():
+    '''
+    the streams of the project's contracts which exist in the contracts json
+    '''
+    contracts = conf.contracts
+    streams = []
+    loanTokens = [contracts[name] for name in contracts if re.match('^i[A-Z]', name)]
+    if loanTokens:
+        streams.append(EventStream('loanTokens', loanTokens, LoanTokenLogicStandard.abi, ['Mint', 'Burn']))
+    if 'sovrynProtocol' in contracts:
+        # Trade and Borrow are emitted by the protocol (LoanOpenings module), not by the loan tokens
+        streams.append(EventStream('protocol', [contracts['sovrynProtocol']], LoanOpenings.abi, ['Trade', 'Borrow']))
+    if 'Staking' in contracts:
+        streams.append(EventStream('staking', [contracts['Staking']], Staking.abi, ['TokensStaked', 'DelegateChanged']))
+    if 'LiquidityMiningProxyV2' in contracts:
+        streams.append(EventStream('liquidityMiningV2', [contracts['LiquidityMiningProxyV2']], LiquidityMiningV2.abi, ['Deposit', 'Withdraw']))
+    if 'multisig' in contracts:
+        streams.append(EventStream('multisig', [contracts['multisig']], MultiSigWallet.abi, ['Submission']))
+    return streams
+
+def abiType(abiInput):
+    '''
+    @return the canonical type of an ABI input, tuples are expanded
+    '''
+    type = abiInput['type']
+    if type.startswith('tuple'):
+        return '(' + ','.join(abiType(component) for component in abiInput['components']) + ')' + type[len('tuple'):]
+    return type
+
+def isDynamic(type):
+    return type in ('string', 'bytes') or type.endswith(']') or type.startswith('(')
+
+def jsonValue(value):
+    if isinstance(value, bytes):
+        return '0x' + value.hex()
+    if isinstance(value, (list, tuple)):
+        return [jsonValue(v) for v in value]
+    if isinstance(value, str) and re.match('^0x[0-9a-fA-F]{40}$', value):
+        return value.lower()
+    return value
+
+def toHex(value):
+    return '0x' + bytes(HexBytes(value)).hex()
+
+def main():
+    conf.loadConfig()
+    EventIngestion().ingestAll()
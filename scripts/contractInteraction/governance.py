@@ -6,18 +6,19 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 def governorAcceptAdmin(type):
-    governor = Contract.from_abi("GovernorAlpha", address=conf.contracts[type], abi=GovernorAlpha.abi, owner=conf.acct)
+    governor = getContract("GovernorAlpha", conf.contracts[type], GovernorAlpha.abi)
     data = governor.__acceptAdmin.encode_input()
     sendWithMultisig(conf.contracts['multisig'], governor.address, data, conf.acct)
 
 def queueProposal(id):
-    governor = Contract.from_abi("GovernorAlpha", address=conf.contracts['GovernorOwner'], abi=GovernorAlpha.abi, owner=conf.acct)
+    governor = getContract("GovernorAlpha", conf.contracts['GovernorOwner'], GovernorAlpha.abi)
     tx = governor.queue(id)
     tx.info()
 
 def executeProposal(id):
-    governor = Contract.from_abi("GovernorAlpha", address=conf.contracts['GovernorOwner'], abi=GovernorAlpha.abi, owner=conf.acct)
+    governor = getContract("GovernorAlpha", conf.contracts['GovernorOwner'], GovernorAlpha.abi)
     tx = governor.execute(id)
     tx.info()
\ No newline at end of file
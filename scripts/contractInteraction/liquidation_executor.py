@@ -0,0 +1,255 @@
+'''
+Pipelined liquidation executor.
+
+Takes a ranked list of loan ids and
+    1. reads the loans with one batch and tops up the allowances of the loan tokens which are needed
+    2. preflights every liquidation with eth_call of sovryn.liquidate (and eth_estimateGas for the gas limit),
+       all in one JSON-RPC batch
+    3. submits the liquidations which passed the preflight back to back with consecutive nonces, without
+       waiting for receipts
+    4. tracks the receipts of all pending liquidations with batched requests once per block. Pending
+       liquidations which fail the preflight again (because a competitor liquidated the loan first or the
+       price recovered) are dropped, and optionally cancelled by replacing their nonce.
+
+usage:
+    executor = LiquidationExecutor()
+    results = executor.run(loanIds)
+
+    liquidateLoans()    # all liquidatable loans found by the liquidation risk scanner
+'''
+
+from brownie import *
+import time
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.rpc_batch import RPCBatchTransport
+from scripts.contractInteraction.liquidation_risk import scanLiquidationRisk
+
+# gas limit = estimate * GAS_BUFFER
+GAS_BUFFER = 1.2
+# a replacement transaction needs a higher gas price than the one it replaces
+CANCEL_GAS_PRICE_FACTOR = 1.2
+POLL_INTERVAL = 2
+# seconds to wait for the receipts of the submitted liquidations
+RECEIPT_TIMEOUT = 300
+
+# states of a liquidation
+SKIPPED = 'skipped'         # failed the preflight, not submitted
+PENDING = 'pending'         # submitted, not mined yet
+LIQUIDATED = 'liquidated'   # mined and successful
+REVERTED = 'reverted'       # mined and reverted
+STALE = 'stale'             # dropped while pending because the loan can't be liquidated anymore
+TIMEOUT = 'timeout'         # not mined within the timeout
+
+
+class Liquidation:
+
+    def __init__(self, loan, value):
+        '''
+        @param loan the LoanReturnData of the loan as a dict
+        @param value the rBTC sent with the transaction, for loans of WRBTC
+        '''
+        self.loan = loan
+        self.loanId = loan['loanId']
+        self.closeAmount = loan['maxLiquidatable']
+        self.value = value
+        self.status = None
+        self.error = None
+        self.gasLimit = None
+        self.expected = None
+        self.nonce = None
+        self.tx = None
+        self.receipt = None
+
+
+class LiquidationExecutor:
+
+    def __init__(self, protocolAddress = None, receiver = None, gasPrice = None, cancelStale = False,
+                 pollInterval = POLL_INTERVAL, receiptTimeout = RECEIPT_TIMEOUT):
+        '''
+        @param receiver the receiver of the seized collateral, defaults to the account of the config
+        @param gasPrice defaults to the gas price of the node at the time of the submission
+        @param cancelStale whether stale liquidations are replaced by a transfer of 0 rBTC to ourselves
+        '''
+        self.sovryn = getContract("sovryn", protocolAddress or conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
+        self.acct = conf.acct
+        self.receiver = receiver or conf.acct
+        self.gasPrice = gasPrice
+        self.cancelStale = cancelStale
+        self.pollInterval = pollInterval
+        self.receiptTimeout = receiptTimeout
+        self.transport = RPCBatchTransport()
+
+    def run(self, loanIds):
+        '''
+        @param loanIds the loans to liquidate, most urgent first
+        @return the liquidations by loan id
+        '''
+        liquidations = self.prepare(loanIds)
+        self.ensureAllowances(liquidations)
+        survivors = self.preflight(liquidations)
+        print(len(survivors), "of", len(liquidations), "liquidations passed the preflight")
+        self.submit(survivors)
+        self.track(survivors)
+        return {liquidation.loanId: liquidation for liquidation in liquidations}
+
+    def prepare(self, loanIds):
+        batch = MulticallBatch()
+        calls = [batch.add(self.sovryn.getLoan, loanId) for loanId in loanIds]
+        batch.execute()
+        liquidations = []
+        for loanId, call in zip(loanIds, calls):
+            if not call.success:
+                print("can't read loan", loanId)
+                continue
+            loan = call.value.dict()
+            loan['loanId'] = loanId
+            value = loan['maxLiquidatable'] if loan['loanToken'] == conf.contracts['WRBTC'] else 0
+            liquidations.append(Liquidation(loan, value))
+        return liquidations
+
+    def ensureAllowances(self, liquidations):
+        '''
+        approves the protocol to spend the close amounts of all liquidations which are paid with tokens
+        '''
+        needed = {}
+        for liquidation in liquidations:
+            if liquidation.value == 0 and liquidation.closeAmount > 0:
+                token = liquidation.loan['loanToken']
+                needed[token] = needed.get(token, 0) + liquidation.closeAmount
+        tokens = {token: getContract("TestToken", token, TestToken.abi) for token in needed}
+        batch = MulticallBatch()
+        allowances = {token: batch.add(contract.allowance, self.acct, self.sovryn.address) for token, contract in tokens.items()}
+        batch.execute()
+        for token, amount in needed.items():
+            if allowances[token].value < amount:
+                tokens[token].approve(self.sovryn.address, amount, {'from': self.acct})
+
+    def preflight(self, liquidations):
+        '''
+        simulates every liquidation against the latest block
+        @return the liquidations which would succeed
+        '''
+        calls = []
+        for liquidation in liquidations:
+            if liquidation.closeAmount == 0:
+                liquidation.status = SKIPPED
+                liquidation.error = "nothing to liquidate"
+                continue
+            args = (liquidation.loanId, self.receiver, liquidation.closeAmount)
+            call = self.transport.call(self.sovryn.liquidate, *args, sender = self.acct, value = liquidation.value)
+            gas = self.transport.estimateGas(self.sovryn.liquidate, *args, sender = self.acct, value = liquidation.value)
+            calls.append((liquidation, call, gas))
+        self.transport.execute()
+        survivors = []
+        for liquidation, call, gas in calls:
+            if not call.success or not gas.success:
+                liquidation.status = SKIPPED
+                liquidation.error = (call.error or gas.error or {}).get('message')
+                continue
+            # loanCloseAmount, seizedAmount, seizedToken
+            liquidation.expected = call.value
+            liquidation.gasLimit = int(gas.value * GAS_BUFFER)
+            survivors.append(liquidation)
+        return survivors
+
+    def submit(self, liquidations):
+        '''
+        sends the liquidations with consecutive nonces without waiting for the receipts
+        '''
+        if not liquidations:
+            return
+        gasPrice = self.gasPrice or web3.eth.gasPrice
+        nonce = web3.eth.getTransactionCount(str(self.acct), 'pending')
+        for liquidation in liquidations:
+            liquidation.nonce = nonce
+            liquidation.tx = self.sovryn.liquidate(liquidation.loanId, self.receiver, liquidation.closeAmount, {
+                'from': self.acct,
+                'value': liquidation.value,
+                'nonce': nonce,
+                'gas_limit': liquidation.gasLimit,
+                'gas_price': gasPrice,
+                'required_confs': 0,
+            })
+            liquidation.status = PENDING
+            nonce += 1
+
+    def track(self, liquidations):
+        '''
+        polls the receipts of the pending liquidations once per block until all of them are mined or dropped
+        '''
+        pending = [liquidation for liquidation in liquidations if liquidation.status == PENDING]
+        deadline = time.time() + self.receiptTimeout
+        lastBlock = None
+        while pending and time.time() < deadline:
+            block = web3.eth.blockNumber
+            if block == lastBlock:
+                time.sleep(self.pollInterval)
+                continue
+            lastBlock = block
+            receipts = [self.transport.getTransactionReceipt(liquidation.tx.txid) for liquidation in pending]
+            self.transport.execute()
+            for liquidation, receipt in zip(pending, receipts):
+                if receipt.value is not None:
+                    self.recordReceipt(liquidation, receipt.value)
+            pending = [liquidation for liquidation in pending if liquidation.status == PENDING]
+            self.dropStale(pending)
+            pending = [liquidation for liquidation in pending if liquidation.status == PENDING]
+        for liquidation in pending:
+            liquidation.status = TIMEOUT
+
+    def recordReceipt(self, liquidation, receipt):
+        liquidation.receipt = receipt
+        liquidation.status = LIQUIDATED if int(receipt['status'], 16) == 1 else REVERTED
+        print(liquidation.loanId, liquidation.status, "in block", int(receipt['blockNumber'], 16))
+
+    def dropStale(self, pending):
+        '''
+        simulates the pending liquidations again, the ones which would fail now are dropped
+        '''
+        if not pending:
+            return
+        calls = [self.transport.call(self.sovryn.liquidate, liquidation.loanId, self.receiver, liquidation.closeAmount,
+                                     sender = self.acct, value = liquidation.value) for liquidation in pending]
+        self.transport.execute()
+        failed = [(liquidation, call) for liquidation, call in zip(pending, calls) if not call.success]
+        if not failed:
+            return
+        # our own liquidation may have been mined since the receipts were read, which also fails the simulation
+        receipts = [self.transport.getTransactionReceipt(liquidation.tx.txid) for liquidation, _ in failed]
+        nonceCount = self.transport.add('eth_getTransactionCount', [str(self.acct), 'latest'], lambda result: int(result, 16))
+        self.transport.execute()
+        for (liquidation, call), receipt in zip(failed, receipts):
+            if receipt.value is not None:
+                self.recordReceipt(liquidation, receipt.value)
+                continue
+            liquidation.status = STALE
+            liquidation.error = (call.error or {}).get('message')
+            print(liquidation.loanId, "is stale:", liquidation.error)
+            # a nonce below the transaction count of the latest block is used already and can't be replaced
+            if self.cancelStale and liquidation.nonce >= nonceCount.value:
+                self.cancel(liquidation)
+
+    def cancel(self, liquidation):
+        gasPrice = int(liquidation.tx.gas_price * CANCEL_GAS_PRICE_FACTOR)
+        try:
+            self.acct.transfer(self.acct, 0, gas_price = gasPrice, nonce = liquidation.nonce, required_confs = 0)
+        except Exception as e:
+            # e.g. the liquidation was mined in the meantime
+            print("can't cancel the liquidation of", liquidation.loanId, "with nonce", liquidation.nonce, ":", e)
+
+
+def liquidateLoans(loanIds = None, cancelStale = False):
+    '''
+    @param loanIds defaults to the liquidatable loans of the liquidation risk scanner, lowest margin first
+    '''
+    if loanIds is None:
+        loanIds = [loan['loanId'] for loan in scanLiquidationRisk(maxPriceDrop = 0) if loan['shouldLiquidate']]
+    results = LiquidationExecutor(cancelStale = cancelStale).run(loanIds)
+    counts = {}
+    for liquidation in results.values():
+        counts[liquidation.status] = counts.get(liquidation.status, 0) + 1
+    print(counts)
+    return results
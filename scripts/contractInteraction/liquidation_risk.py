@@ -0,0 +1,151 @@
+'''
+Offline liquidation risk scanner.
+
+Takes one batched snapshot of PriceFeeds.queryRate for all (collateral token, loan token) pairs of the loan
+table and computes, for every loan at once:
+    - the current margin, with the same integer math as PriceFeeds.getCurrentMargin
+    - whether the loan can be liquidated, like PriceFeeds.shouldLiquidate
+    - the distance to the maintenance margin
+    - the liquidation price (collateral to loan rate at which the margin reaches the maintenance margin)
+    - the relative price drop left until liquidation
+
+uint256 values are kept in NumPy object arrays holding python ints, so the margin math is exact. The derived
+ratios used for ranking are float64 arrays.
+
+usage:
+    atRisk = scanLiquidationRisk(maxPriceDrop = 0.05)   # loans from the loan index (see loan_index.py)
+'''
+
+from brownie import *
+import numpy as np
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.loan_index import LoanIndex
+
+WEI_PRECISION = 10**18
+MARGIN_PRECISION = 10**20
+
+def loadLoanTable(loans):
+    '''
+    turns a list of loans (dicts with the LoanReturnData field names, e.g. from LoanIndex.allLoans) into arrays
+    '''
+    table = {
+        'loanId': np.array([loan['loanId'] for loan in loans], dtype = object),
+        'loanToken': np.array([str(loan['loanToken']).lower() for loan in loans], dtype = object),
+        'collateralToken': np.array([str(loan['collateralToken']).lower() for loan in loans], dtype = object),
+    }
+    for field in ['principal', 'collateral', 'maintenanceMargin']:
+        table[field] = np.array([int(loan[field]) for loan in loans], dtype = object)
+    return table
+
+def tokenPairs(table):
+    '''
+    @return the distinct (collateral token, loan token) pairs and the pair index of every loan
+    '''
+    pairs = {}
+    pairIndex = np.empty(len(table['loanId']), dtype = np.int64)
+    for i, pair in enumerate(zip(table['collateralToken'], table['loanToken'])):
+        pairIndex[i] = pairs.setdefault(pair, len(pairs))
+    return list(pairs.keys()), pairIndex
+
+def queryRates(pairs, blockNumber = None):
+    '''
+    reads PriceFeeds.queryRate for all pairs with one batch
+    @return a dict (collateral token, loan token) -> (rate, precision)
+    '''
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
+    batch = MulticallBatch(blockIdentifier = blockNumber if blockNumber is not None else 'latest', requireSuccess = True)
+    calls = {pair: batch.add(feeds.queryRate, pair[0], pair[1]) for pair in pairs if pair[0] != pair[1]}
+    batch.execute()
+    return {pair: (int(call.value[0]), int(call.value[1])) for pair, call in calls.items()}
+
+def collateralToLoanRates(pairs, pairIndex, rates):
+    # PriceFeeds.getCurrentMargin: rate * 10**18 / precision, or 10**18 if both tokens are the same
+    pairRates = np.array([
+        WEI_PRECISION if pair[0] == pair[1] else rates[pair][0] * WEI_PRECISION // rates[pair][1]
+        for pair in pairs
+    ] or [0], dtype = object)
+    return pairRates[pairIndex]
+
+def computeRisk(table, rates, pairs = None, pairIndex = None):
+    '''
+    @param rates the result of queryRates
+    @return a dict of arrays, one entry per loan of the table
+    '''
+    if pairs is None:
+        pairs, pairIndex = tokenPairs(table)
+    principal = table['principal']
+    collateral = table['collateral']
+    maintenanceMargin = table['maintenanceMargin']
+
+    collateralToLoanRate = collateralToLoanRates(pairs, pairIndex, rates)
+    collateralToLoanAmount = collateral * collateralToLoanRate // WEI_PRECISION
+
+    # currentMargin = (collateralToLoanAmount - principal) * 10**20 / principal, 0 if undercollateralized
+    solvent = (principal != 0) & (collateralToLoanAmount >= principal)
+    safePrincipal = np.where(principal == 0, 1, principal)
+    currentMargin = np.where(solvent, (collateralToLoanAmount - principal) * MARGIN_PRECISION // safePrincipal, 0)
+
+    # the rate at which currentMargin == maintenanceMargin
+    safeCollateral = np.where(collateral == 0, 1, collateral)
+    liquidationRate = np.where(collateral == 0, 0,
+        principal * (MARGIN_PRECISION + maintenanceMargin) * WEI_PRECISION // (MARGIN_PRECISION * safeCollateral))
+
+    rateFloat = collateralToLoanRate.astype(np.float64)
+    liquidationRateFloat = liquidationRate.astype(np.float64)
+    priceDrop = np.where(rateFloat > 0, 1 - liquidationRateFloat / np.where(rateFloat > 0, rateFloat, 1), 0)
+
+    return {
+        'collateralToLoanRate': collateralToLoanRate,
+        'currentMargin': currentMargin,
+        'shouldLiquidate': (currentMargin <= maintenanceMargin).astype(bool),
+        'marginDistance': (currentMargin - maintenanceMargin).astype(np.float64) / WEI_PRECISION,
+        'liquidationRate': liquidationRate,
+        'priceDropToLiquidation': priceDrop,
+    }
+
+def rankAtRisk(table, risk, maxPriceDrop = 0.05):
+    '''
+    @param maxPriceDrop loans which are liquidated by a price drop of less than this fraction are at risk
+    @return the loans at risk, liquidatable loans first, then by the price drop left
+    '''
+    atRisk = np.nonzero(risk['shouldLiquidate'] | (risk['priceDropToLiquidation'] < maxPriceDrop))[0]
+    order = atRisk[np.lexsort((risk['priceDropToLiquidation'][atRisk], ~risk['shouldLiquidate'][atRisk]))]
+    return [{
+        'loanId': table['loanId'][i],
+        'loanToken': table['loanToken'][i],
+        'collateralToken': table['collateralToken'][i],
+        'principal': table['principal'][i],
+        'collateral': table['collateral'][i],
+        'maintenanceMargin': table['maintenanceMargin'][i],
+        'currentMargin': risk['currentMargin'][i],
+        'shouldLiquidate': bool(risk['shouldLiquidate'][i]),
+        'liquidationRate': risk['liquidationRate'][i],
+        'collateralToLoanRate': risk['collateralToLoanRate'][i],
+        'priceDropToLiquidation': float(risk['priceDropToLiquidation'][i]),
+    } for i in order]
+
+def scanLiquidationRisk(loans = None, blockNumber = None, maxPriceDrop = 0.05):
+    '''
+    @param loans defaults to the loans of the loan index, all of them read again at the latest block
+    @return the ranked list of loans at risk
+    '''
+    if loans is None:
+        index = LoanIndex()
+        index.update(fullRefresh = True)
+        loans = index.allLoans()
+    table = loadLoanTable(loans)
+    pairs, pairIndex = tokenPairs(table)
+    rates = queryRates(pairs, blockNumber)
+    risk = computeRisk(table, rates, pairs, pairIndex)
+    return rankAtRisk(table, risk, maxPriceDrop)
+
+def printLiquidationRisk(maxPriceDrop = 0.05):
+    atRisk = scanLiquidationRisk(maxPriceDrop = maxPriceDrop)
+    for loan in atRisk:
+        print(loan['loanId'], 'liquidatable' if loan['shouldLiquidate'] else '', 'margin', loan['currentMargin'] / 1e18,
+              'maintenance', loan['maintenanceMargin'] / 1e18, 'price drop left', loan['priceDropToLiquidation'])
+    print(len(atRisk), 'loans at risk')
+    return atRisk
@@ -5,6 +5,7 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 def setLiquidityMiningAddressOnAllContracts():
     print("setting LM address")
@@ -15,12 +16,12 @@ def setLiquidityMiningAddressOnAllContracts():
     setLiquidityMiningAddress(conf.contracts['iRBTC'])
 
 def getLiquidityMiningAddress(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicLM.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicLM.abi)
     print(loanToken.liquidityMiningAddress())
     print(loanToken.target_())
 
 def setLiquidityMiningAddress(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicLM.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicLM.abi)
     data = loanToken.setLiquidityMiningAddress.encode_input(conf.contracts['LiquidityMiningProxy'])
 
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
@@ -33,29 +34,29 @@ def getLiquidityMiningAddressOnAllContracts():
     getLiquidityMiningAddress(conf.contracts['iRBTC'])
 
 def setWrapperOnLM():
-    lm = Contract.from_abi("LiquidityMining", address = conf.contracts['LiquidityMiningProxy'], abi = LiquidityMining.abi, owner = conf.acct)
+    lm = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
     data = lm.setWrapper.encode_input(conf.contracts['RBTCWrapperProxy'])
     sendWithMultisig(conf.contracts['multisig'], lm.address, data, conf.acct)
 
 
 def getPoolId(poolToken):
-    lm = Contract.from_abi("LiquidityMining", address = conf.contracts['LiquidityMiningProxy'], abi = LiquidityMining.abi, owner = conf.acct)
+    lm = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
     print(lm.getPoolId(poolToken))
 
 
 def getLMInfo():
-    lm = Contract.from_abi("LiquidityMining", address = conf.contracts['LiquidityMiningProxy'], abi = LiquidityMining.abi, owner = conf.acct)
+    lm = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
     print(lm.getPoolLength())
     print(lm.getPoolInfoList())
     print(lm.wrapper())
 
 def setLockedSOV(newLockedSOV):
-    lm = Contract.from_abi("LiquidityMining", address = conf.contracts['LiquidityMiningProxy'], abi = LiquidityMining.abi, owner = conf.acct)
+    lm = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
     data = lm.setLockedSOV.encode_input(newLockedSOV)
     sendWithMultisig(conf.contracts['multisig'], lm.address, data, conf.acct)
 
 def addPoolsToLM():
-    liquidityMining = Contract.from_abi("LiquidityMining", address = conf.contracts['LiquidityMiningProxy'], abi = LiquidityMining.abi, owner = conf.acct)
+    liquidityMining = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
     # TODO prepare pool tokens list
     poolTokens = [conf.contracts['(WR)BTC/USDT1'], conf.contracts['(WR)BTC/USDT2'], conf.contracts['(WR)BTC/DOC1'], conf.contracts['(WR)BTC/DOC2'], conf.contracts['(WR)BTC/BPRO1'], conf.contracts['(WR)BTC/BPRO2']]
     allocationPoints = [1, 1, 1, 1, 1, 1]
@@ -71,7 +72,7 @@ def addPoolsToLM():
     sendWithMultisig(conf.contracts['multisig'], liquidityMining.address, data, conf.acct)
 
 def addMOCPoolToken():
-    lm = Contract.from_abi("LiquidityMining", address = conf.contracts['LiquidityMiningProxy'], abi = LiquidityMining.abi, owner = conf.acct)
+    lm = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
     MAX_ALLOCATION_POINT = 100000 * 1000 # 100 M
     ALLOCATION_POINT_BTC_SOV = 30000 # (WR)BTC/SOV
     ALLOCATION_POINT_BTC_ETH = 35000 # or 30000 (WR)BTC/ETH
@@ -85,7 +86,7 @@ def addMOCPoolToken():
 
 def transferSOVtoLM(amount):
     liquidityMining = conf.contracts['LiquidityMiningProxy']
-    SOVtoken = Contract.from_abi("SOV", address=conf.contracts['SOV'], abi=SOV.abi, owner=conf.acct)
+    SOVtoken = getContract("SOV", conf.contracts['SOV'], SOV.abi)
     data = SOVtoken.transfer.encode_input(liquidityMining, amount)
     print(data)
 
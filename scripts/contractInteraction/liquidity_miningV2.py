@@ -5,6 +5,7 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 def setLiquidityMiningV2AddressOnAllContracts():
     print("setting LM address")
@@ -15,12 +16,12 @@ def setLiquidityMiningV2AddressOnAllContracts():
     setLiquidityMiningV2Address(conf.contracts['iRBTC'])
 
 def getLiquidityMiningV2Address(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicLM.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicLM.abi)
     print(loanToken.liquidityMiningAddress())
     print(loanToken.target_())
 
 def setLiquidityMiningV2Address(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicLM.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicLM.abi)
     data = loanToken.setLiquidityMiningAddress.encode_input(conf.contracts['LiquidityMiningProxyV2'])
 
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
@@ -33,19 +34,19 @@ def getLiquidityMiningV2AddressOnAllContracts():
     getLiquidityMiningV2Address(conf.contracts['iRBTC'])
 
 def setWrapperOnLMV2():
-    lm = Contract.from_abi("LiquidityMiningV2", address = conf.contracts['LiquidityMiningProxyV2'], abi = LiquidityMiningV2.abi, owner = conf.acct)
+    lm = getContract("LiquidityMiningV2", conf.contracts['LiquidityMiningProxyV2'], LiquidityMiningV2.abi)
 
     data = lm.setWrapper.encode_input(conf.contracts['RBTCWrapperProxy'])
     sendWithMultisig(conf.contracts['multisig'], lm.address, data, conf.acct)
 
 
 def getPoolIdOnLMV2(poolToken):
-    lm = Contract.from_abi("LiquidityMiningV2", address = conf.contracts['LiquidityMiningProxyV2'], abi = LiquidityMiningV2.abi, owner = conf.acct)
+    lm = getContract("LiquidityMiningV2", conf.contracts['LiquidityMiningProxyV2'], LiquidityMiningV2.abi)
     print(lm.getPoolId(poolToken))
 
 
 def getLMV2Info():
-    lm = Contract.from_abi("LiquidityMiningV2", address = conf.contracts['LiquidityMiningProxyV2'], abi = LiquidityMiningV2.abi, owner = conf.acct)
+    lm = getContract("LiquidityMiningV2", conf.contracts['LiquidityMiningProxyV2'], LiquidityMiningV2.abi)
     print(lm.getPoolLength())
     print(lm.getPoolInfoList())
     print(lm.wrapper())
@@ -53,7 +54,7 @@ def getLMV2Info():
 
 def transferSOVtoLMV2(amount):
     lm = conf.contracts['LiquidityMiningProxyV2']
-    SOVtoken = Contract.from_abi("SOV", address=conf.contracts['SOV'], abi=SOV.abi, owner=conf.acct)
+    SOVtoken = getContract("SOV", conf.contracts['SOV'], SOV.abi)
     data = SOVtoken.transfer.encode_input(lm, amount)
     print(data)
 
@@ -0,0 +1,265 @@
+'''
+Streaming typed reader of the distribution, vesting and claim lists.
+
+The columns of every file type are declared once as a Schema: the position (or the header name) and the type of
+each column. The rows are streamed one by one from .csv files or from a sheet of an .xlsx file, so the memory
+doesn't grow with the length of the list; only the shared strings of an .xlsx file and the set of seen addresses
+are kept.
+
+Column types:
+    Address()           EIP-55 checksum address, whitespace is removed. A mixed-case address has to carry the
+                        EIP-55 checksum or the EIP-1191 checksum of RSK. The keccak of the checksums is cached
+    Amount(decimals)    exact decimal amount scaled to an integer: Amount(18)('308.135') == 308135 * 10**15.
+                        Thousands separators are removed, more decimals than the scale allows are an error
+    Integer()
+    Text()
+    Flag(trueValue)     value == trueValue
+
+Duplicate addresses of the key column are detected with a set of the seen addresses:
+    duplicates = 'error'    stop at the first duplicate (default)
+    duplicates = 'skip'     skip the later rows of an address
+    duplicates = 'keep'     keep all rows, e.g. to keep the row numbers of a journaled distribution
+
+usage:
+    for row in readList('./scripts/deployment/distribution/team-origin.csv', TEAM_ORIGIN):
+        row.receiver, row.amount
+
+    readList('./scripts/deployment/claim_test_data_3237.xlsx', ORIGIN_CLAIM, sheet = 'Sheet4')
+'''
+
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+import csv
+import re
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+from eth_utils import keccak
+
+ADDRESS_PATTERN = re.compile('^0x[0-9a-fA-F]{40}$')
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+CHECKSUM_CACHE_SIZE = 2**16
+# EIP-1191 checksums of RSK mainnet and testnet are accepted as well
+RSK_CHAIN_IDS = (30, 31)
+UPPER_CASE_NIBBLES = str.maketrans({nibble: '\x20' if int(nibble, 16) >= 8 else '\x00' for nibble in '0123456789abcdef'})
+LETTER_BITS = int.from_bytes(b'\x40' * 40, 'big')
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+@lru_cache(maxsize = CHECKSUM_CACHE_SIZE)
+def toChecksumAddress(address, chainId = None):
+    '''
+    EIP-55 checksum of an address, or the EIP-1191 checksum of the chain. The address is validated by the caller
+    '''
+    lower = address[2:].lower()
+    prefix = '' if chainId is None else str(chainId) + '0x'
+    digest = keccak(text = prefix + lower).hex()[:40]
+    # a letter is upper case if its nibble of the hash is >= 8. Done on the 40 characters as one integer: the
+    # case bit 0x20 is cleared where the nibble is >= 8 and the character is a letter (bit 0x40 is set)
+    characters = int.from_bytes(lower.encode('ascii'), 'big')
+    upper = int.from_bytes(digest.translate(UPPER_CASE_NIBBLES).encode('ascii'), 'big') & ((characters & LETTER_BITS) >> 1)
+    return '0x' + (characters ^ upper).to_bytes(40, 'big').decode('ascii')
+
+
+class Address:
+
+    def __call__(self, value):
+        value = ''.join(value.split())
+        if not ADDRESS_PATTERN.match(value):
+            raise ValueError("invalid address " + repr(value))
+        checksum = toChecksumAddress(value)
+        if value != checksum and value[2:] != value[2:].lower() and value[2:] != value[2:].upper():
+            # lists copied from RSK wallets carry the checksum of the chain
+            if not any(value == toChecksumAddress(value, chainId) for chainId in RSK_CHAIN_IDS):
+                raise ValueError("wrong checksum of " + value + ", expected " + checksum)
+        return checksum
+
+
+class Amount:
+
+    def __init__(self, decimals):
+        self.decimals = decimals
+
+    def __call__(self, value):
+        # integer arithmetic on the digits, a Decimal multiplication would round to the precision of the context
+        try:
+            sign, digits, exponent = Decimal(value.strip().replace(',', '')).as_tuple()
+        except InvalidOperation:
+            raise ValueError("invalid amount " + repr(value))
+        if not isinstance(exponent, int):
+            raise ValueError("invalid amount " + repr(value))
+        amount = int(''.join(map(str, digits)))
+        exponent += self.decimals
+        if exponent >= 0:
+            amount *= 10 ** exponent
+        else:
+            amount, remainder = divmod(amount, 10 ** -exponent)
+            if remainder:
+                raise ValueError("amount " + value.strip() + " has more than " + str(self.decimals) + " decimals")
+        return -amount if sign else amount
+
+
+class Integer(Amount):
+
+    # numbers of .xlsx files can be written as 3.0 or 3E+2
+    def __init__(self):
+        super().__init__(0)
+
+
+class Text:
+
+    def __call__(self, value):
+        return value.strip()
+
+
+class Flag:
+
+    def __init__(self, trueValue):
+        self.trueValue = trueValue
+
+    def __call__(self, value):
+        return value.strip() == self.trueValue
+
+
+class Schema:
+
+    def __init__(self, columns, header = False, key = None, duplicates = 'error'):
+        '''
+        @param columns a list of (name, column, type): column is the index of the column, or its name if the file
+               has a header
+        @param header the first row is a header
+        @param key the name of the address column to check for duplicates
+        '''
+        if duplicates not in ('error', 'skip', 'keep'):
+            raise Exception("unsupported duplicates policy " + duplicates)
+        self.columns = columns
+        self.header = header
+        self.key = key
+        self.duplicates = duplicates
+        self.Row = namedtuple('Row', [name for name, _, _ in columns])
+
+    def withDuplicates(self, duplicates):
+        return Schema(self.columns, self.header, self.key, duplicates)
+
+
+# send_sov.py: receiver and SOV amount, e.g. 3000000,308.135,,0x93a7464E3fec0E75c23fF855598c9543ad0A8548,
+TEAM_ORIGIN = Schema([('amount', 1, Amount(18)), ('receiver', 3, Address())], key = 'receiver')
+# create_vestings.py: e.g. 3787.24,0x1963e57283969A9452B5Bc71B246d7372c25C482,Yes,1,26,OwnerVesting
+# cliff and duration in FOUR_WEEKS periods, every other type than OwnerVesting is a team vesting
+VESTINGS = Schema([('amount', 0, Amount(18)), ('owner', 1, Address()), ('cliff', 3, Integer()), ('duration', 4, Integer()),
+                   ('ownerVesting', 5, Flag('OwnerVesting'))])
+# check_vestings.py: one owner per line
+VESTING_OWNERS = Schema([('owner', 0, Address())], key = 'owner')
+# deploy_orig_claim_step2.py and claim_test_data_*.xlsx: investor and BTC amount in satoshi, with a header
+ORIGIN_CLAIM = Schema([('investor', 'web3 address', Address()), ('satoshi', 'value', Integer())], header = True, key = 'investor')
+# deploy_vestings.py: BTC address, owner and BTC amount, e.g. 3FqnqrVn..,0x064d2FA793858e45bd532f02eF385962e7134Ee7,0.0098
+BTC_RETURNED = Schema([('owner', 1, Address()), ('satoshi', 2, Amount(8))], key = 'owner')
+
+
+def readList(fileName, schema, sheet = None):
+    '''
+    streams the typed rows of a .csv or .xlsx file, empty rows are skipped
+    @param sheet the name of the sheet of an .xlsx file, the first one by default
+    @return a generator of schema.Row
+    '''
+    rows = readXlsxRows(fileName, sheet) if fileName.endswith('.xlsx') else readCsvRows(fileName)
+    return typedRows(fileName, rows, schema)
+
+def typedRows(fileName, rows, schema):
+    positions = None
+    if not schema.header:
+        positions = [column for _, column, _ in schema.columns]
+    keyIndex = [name for name, _, _ in schema.columns].index(schema.key) if schema.key else None
+    seen = set()
+    for lineNumber, values in rows:
+        if positions is None:
+            header = [value.strip() for value in values]
+            missing = [column for _, column, _ in schema.columns if column not in header]
+            if missing:
+                raise Exception(fileName + ": missing columns " + ', '.join(missing))
+            positions = [header.index(column) for _, column, _ in schema.columns]
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        try:
+            row = schema.Row(*[type(values[position] if position < len(values) else '') for position, (_, _, type) in zip(positions, schema.columns)])
+        except ValueError as e:
+            raise Exception(fileName + ", line " + str(lineNumber) + ": " + str(e))
+        if keyIndex is not None:
+            address = bytes.fromhex(row[keyIndex][2:])
+            if address in seen:
+                if schema.duplicates == 'error':
+                    raise Exception(fileName + ", line " + str(lineNumber) + ": duplicate address " + row[keyIndex])
+                if schema.duplicates == 'skip':
+                    continue
+            seen.add(address)
+        yield row
+
+def readCsvRows(fileName):
+    with open(fileName, 'r', newline = '') as file:
+        reader = csv.reader(file)
+        for values in reader:
+            yield reader.line_num, values
+
+def readXlsxRows(fileName, sheet = None):
+    '''
+    streams the rows of a sheet as lists of strings, the XML of the sheet is parsed incrementally
+    '''
+    with zipfile.ZipFile(fileName) as archive:
+        sheetFile = xlsxSheetFile(archive, sheet)
+        sharedStrings = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            with archive.open('xl/sharedStrings.xml') as file:
+                for _, element in ElementTree.iterparse(file):
+                    if element.tag == XLSX_NS + 'si':
+                        sharedStrings.append(''.join(text.text or '' for text in element.iter(XLSX_NS + 't')))
+                        element.clear()
+        with archive.open(sheetFile) as file:
+            sheetData = None
+            for event, element in ElementTree.iterparse(file, events = ('start', 'end')):
+                if event == 'start':
+                    if element.tag == XLSX_NS + 'sheetData':
+                        sheetData = element
+                    continue
+                if element.tag != XLSX_NS + 'row':
+                    continue
+                values = []
+                for cell in element.iter(XLSX_NS + 'c'):
+                    # cells can be omitted, the position is taken from the reference, e.g. C12
+                    column = xlsxColumnIndex(cell.get('r')) if cell.get('r') else len(values)
+                    values.extend([''] * (column - len(values)))
+                    values.append(xlsxCellValue(cell, sharedStrings))
+                yield int(element.get('r')), values
+                # the parsed rows are dropped from the tree
+                sheetData.remove(element)
+
+def xlsxSheetFile(archive, sheet):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {relation.get('Id'): relation.get('Target') for relation in relations}
+    sheets = [(element.get('name'), targets[element.get(XLSX_RELATIONSHIP_NS + 'id')]) for element in workbook.iter(XLSX_NS + 'sheet')]
+    for name, target in sheets:
+        if sheet is None or name == sheet:
+            return target.lstrip('/') if target.startswith('/xl/') else 'xl/' + target
+    raise Exception("no sheet " + sheet + ", sheets: " + ', '.join(name for name, _ in sheets))
+
+def xlsxColumnIndex(reference):
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+def xlsxCellValue(cell, sharedStrings):
+    cellType = cell.get('t')
+    if cellType == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(XLSX_NS + 't'))
+    value = cell.find(XLSX_NS + 'v')
+    if value is None or value.text is None:
+        return ''
+    if cellType == 's':
+        return sharedStrings[int(value.text)]
+    return value.text
@@ -0,0 +1,277 @@
+'''
+Persistent local index of the active loans of the protocol, stored in SQLite.
+
+The index is seeded once from sovryn.getActiveLoans and kept current by tailing the loan events of the protocol
+from a stored block cursor. The loans touched by new events, and the loans within an hour of their end timestamp
+(rollover is allowed from endTimestamp - 3600), are read again with batched calls.
+
+withdrawCollateral, extendLoanDuration, reduceLoanDuration and rollover change a loan without a loan event, so
+every indexed loan is read again after FULL_REFRESH_BLOCKS blocks, or on every update with fullRefresh = True.
+The risk scans use fullRefresh = True.
+
+usage:
+    index = LoanIndex()
+    index.update()                                  # seeds on first use, then tails the events
+    index.update(fullRefresh = True)                # reads every indexed loan again
+    index.loansOf(borrower)
+    index.loansByToken(loanToken = conf.contracts['DoC'])
+    index.loansBelowMargin(20e18)
+
+Amounts are stored as decimal strings to keep the uint256 precision. currentMargin is the margin at the block
+the loan was read last; marginRatio (= currentMargin / 1e18) is stored as a float for indexed queries.
+'''
+
+from brownie import *
+from hexbytes import HexBytes
+import os
+import sqlite3
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.event_ingestion import getLogsAdaptive
+
+INDEX_DIR = './indexes/'
+
+# loans read with one getActiveLoans call while seeding, and the pages read with one batch
+SEED_PAGE_SIZE = 50
+SEED_PAGES_PER_ROUND = 4
+SEED_PAGE_GAS = 1500000
+# blocks behind the head which are not indexed yet, to avoid reorgs
+CONFIRMATIONS = 2
+# blocks after which every indexed loan is read again, about a day on RSK
+FULL_REFRESH_BLOCKS = 2880
+# a loan can be rolled over from an hour before its end (LoanClosingsBase._rollover)
+ROLLOVER_WINDOW = 3600
+
+LOAN_EVENTS = {
+    'Borrow': 'Borrow(address,address,bytes32,address,address,uint256,uint256,uint256,uint256,uint256,uint256)',
+    'Trade': 'Trade(address,address,bytes32,address,address,uint256,uint256,uint256,uint256,uint256,uint256,uint256)',
+    'CloseWithDeposit': 'CloseWithDeposit(address,address,bytes32,address,address,address,uint256,uint256,uint256,uint256)',
+    'CloseWithSwap': 'CloseWithSwap(address,address,bytes32,address,address,address,uint256,uint256,uint256,uint256)',
+    'Liquidate': 'Liquidate(address,address,bytes32,address,address,address,uint256,uint256,uint256,uint256)',
+    'DepositCollateral': 'DepositCollateral(bytes32,uint256,uint256)',
+}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS loans (
+    loanId TEXT PRIMARY KEY,
+    borrower TEXT,
+    lender TEXT,
+    loanToken TEXT,
+    collateralToken TEXT,
+    principal TEXT,
+    collateral TEXT,
+    interestOwedPerDay TEXT,
+    interestDepositRemaining TEXT,
+    startRate TEXT,
+    startMargin TEXT,
+    maintenanceMargin TEXT,
+    currentMargin TEXT,
+    maxLoanTerm INTEGER,
+    endTimestamp INTEGER,
+    maxLiquidatable TEXT,
+    maxSeizable TEXT,
+    marginRatio REAL,
+    maintenanceRatio REAL,
+    updatedBlock INTEGER
+);
+CREATE INDEX IF NOT EXISTS loansBorrower ON loans (borrower);
+CREATE INDEX IF NOT EXISTS loansLoanToken ON loans (loanToken);
+CREATE INDEX IF NOT EXISTS loansCollateralToken ON loans (collateralToken);
+CREATE INDEX IF NOT EXISTS loansMarginRatio ON loans (marginRatio);
+CREATE INDEX IF NOT EXISTS loansEndTimestamp ON loans (endTimestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+
+class LoanIndex:
+
+    def __init__(self, fileName = None, protocolAddress = None):
+        '''
+        @param fileName the SQLite file, one per network by default
+        @param protocolAddress defaults to sovrynProtocol of the contracts json
+        '''
+        if fileName is None:
+            os.makedirs(INDEX_DIR, exist_ok = True)
+            fileName = INDEX_DIR + 'loans_' + network.show_active() + '.db'
+        self.db = sqlite3.connect(fileName)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        protocolAddress = protocolAddress or conf.contracts['sovrynProtocol']
+        self.sovryn = getContract("sovryn", protocolAddress, interface.ISovrynBrownie.abi)
+        # the public loans mapping is not part of the interface
+        self.protocolState = getContract("Protocol", protocolAddress, sovrynProtocol.abi)
+        self.topics = {toHex(web3.keccak(text = signature)): name for name, signature in LOAN_EVENTS.items()}
+
+    # -- cursor -----------------------------------------------------------------------------------------------------
+
+    def getCursor(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'lastBlock'").fetchone()
+        return int(row['value']) if row else None
+
+    def setCursor(self, blockNumber):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('lastBlock', ?)", (str(blockNumber),))
+
+    def getFullRefreshBlock(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'lastFullRefresh'").fetchone()
+        return int(row['value']) if row else None
+
+    def setFullRefreshBlock(self, blockNumber):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('lastFullRefresh', ?)", (str(blockNumber),))
+
+    # -- indexing ---------------------------------------------------------------------------------------------------
+
+    def update(self, fullRefresh = False):
+        '''
+        seeds the index if it is empty, otherwise applies the events since the last indexed block
+        @param fullRefresh read every indexed loan again, not only the ones touched by events
+        @return the number of loans which were read again
+        '''
+        head = chain.height - CONFIRMATIONS
+        cursor = self.getCursor()
+        if cursor is None:
+            return self.seed(head)
+        lastFullRefresh = self.getFullRefreshBlock()
+        fullRefresh = fullRefresh or lastFullRefresh is None or head - lastFullRefresh >= FULL_REFRESH_BLOCKS
+        if head <= cursor and not fullRefresh:
+            return 0
+        loanIds = set()
+        if head > cursor:
+            params = {'address': self.sovryn.address, 'topics': [list(self.topics.keys())]}
+            for fromBlock, toBlock, logs in getLogsAdaptive(params, cursor + 1, head):
+                loanIds.update(self.loanIdsFromLogs(logs))
+        # a full refresh without new blocks reads the loans at the indexed block
+        head = max(head, cursor)
+        if fullRefresh:
+            loanIds.update(row['loanId'] for row in self.db.execute("SELECT loanId FROM loans"))
+            self.setFullRefreshBlock(head)
+        else:
+            # rollover does not emit an event
+            timestamp = chain[head].timestamp
+            for row in self.db.execute("SELECT loanId FROM loans WHERE endTimestamp <= ?", (timestamp + ROLLOVER_WINDOW,)):
+                loanIds.add(row['loanId'])
+        self.refreshLoans(sorted(loanIds), head)
+        self.setCursor(head)
+        self.db.commit()
+        return len(loanIds)
+
+    def seed(self, blockNumber):
+        print("seeding the loan index at block", blockNumber)
+        loanIds = []
+        start = 0
+        batch = MulticallBatch(blockIdentifier = blockNumber, requireSuccess = True)
+        while True:
+            pages = [batch.add(self.sovryn.getActiveLoans, start + i * SEED_PAGE_SIZE, SEED_PAGE_SIZE, False, gas = SEED_PAGE_GAS) for i in range(SEED_PAGES_PER_ROUND)]
+            batch.execute()
+            for page in pages:
+                loanIds.extend(toHex(loan[0]) for loan in page.value)
+            if len(pages[-1].value) == 0:
+                break
+            start += SEED_PAGES_PER_ROUND * SEED_PAGE_SIZE
+        self.refreshLoans(loanIds, blockNumber)
+        self.setCursor(blockNumber)
+        self.setFullRefreshBlock(blockNumber)
+        self.db.commit()
+        print(len(loanIds), "active loans indexed")
+        return len(loanIds)
+
+    def loanIdsFromLogs(self, logs):
+        loanIds = set()
+        for log in logs:
+            name = self.topics[toHex(log['topics'][0])]
+            if name == 'DepositCollateral':
+                # the loan id is not indexed
+                loanIds.add(toHex(HexBytes(log['data'])[:32]))
+            else:
+                loanIds.add(toHex(log['topics'][3]))
+        return loanIds
+
+    def refreshLoans(self, loanIds, blockNumber):
+        '''
+        reads the given loans at the block and updates or deletes them in the index
+        '''
+        batch = MulticallBatch(blockIdentifier = blockNumber)
+        calls = [(loanId, batch.add(self.sovryn.getLoan, loanId), batch.add(self.protocolState.loans, loanId)) for loanId in loanIds]
+        batch.execute()
+        for loanId, loanCall, stateCall in calls:
+            if not stateCall.success:
+                continue
+            state = stateCall.value
+            # state: id, loanParamsId, pendingTradesId, active, principal, collateral, startTimestamp, endTimestamp, startMargin, startRate, borrower, lender
+            if not state[3] or not loanCall.success:
+                self.db.execute("DELETE FROM loans WHERE loanId = ?", (loanId,))
+                continue
+            self.storeLoan(loanCall.value, state[10], state[11], blockNumber)
+
+    def storeLoan(self, loan, borrower, lender, blockNumber):
+        # loan: LoanReturnData
+        values = {
+            'loanId': toHex(loan[0]),
+            'borrower': str(borrower).lower(),
+            'lender': str(lender).lower(),
+            'loanToken': str(loan[1]).lower(),
+            'collateralToken': str(loan[2]).lower(),
+            'principal': str(loan[3]),
+            'collateral': str(loan[4]),
+            'interestOwedPerDay': str(loan[5]),
+            'interestDepositRemaining': str(loan[6]),
+            'startRate': str(loan[7]),
+            'startMargin': str(loan[8]),
+            'maintenanceMargin': str(loan[9]),
+            'currentMargin': str(loan[10]),
+            'maxLoanTerm': int(loan[11]),
+            'endTimestamp': int(loan[12]),
+            'maxLiquidatable': str(loan[13]),
+            'maxSeizable': str(loan[14]),
+            'marginRatio': loan[10] / 1e18,
+            'maintenanceRatio': loan[9] / 1e18,
+            'updatedBlock': blockNumber,
+        }
+        columns = ', '.join(values.keys())
+        placeholders = ', '.join('?' for _ in values)
+        self.db.execute("INSERT OR REPLACE INTO loans (" + columns + ") VALUES (" + placeholders + ")", tuple(values.values()))
+
+    # -- queries ----------------------------------------------------------------------------------------------------
+
+    def query(self, where = "1", params = (), orderBy = "marginRatio"):
+        return [dict(row) for row in self.db.execute("SELECT * FROM loans WHERE " + where + " ORDER BY " + orderBy, params)]
+
+    def allLoans(self):
+        return self.query()
+
+    def loansOf(self, borrower):
+        return self.query("borrower = ?", (str(borrower).lower(),))
+
+    def loansByToken(self, loanToken = None, collateralToken = None):
+        conditions = []
+        params = []
+        if loanToken is not None:
+            conditions.append("loanToken = ?")
+            params.append(str(loanToken).lower())
+        if collateralToken is not None:
+            conditions.append("collateralToken = ?")
+            params.append(str(collateralToken).lower())
+        return self.query(" AND ".join(conditions) or "1", tuple(params))
+
+    def loansBelowMargin(self, margin):
+        '''
+        @param margin the margin with 18 decimals, e.g. 20e18 for 20 %
+        '''
+        return self.query("marginRatio < ?", (margin / 1e18,))
+
+    def loansAboveMargin(self, margin):
+        return self.query("marginRatio > ?", (margin / 1e18,))
+
+
+def toHex(value):
+    return '0x' + bytes(HexBytes(value)).hex()
+
+def updateLoanIndex():
+    index = LoanIndex()
+    refreshed = index.update()
+    print(refreshed, "loans refreshed, index at block", index.getCursor())
+    return index
@@ -5,10 +5,12 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
+from scripts.contractInteraction.multicall import MulticallBatch, multicall
     
 def lendToPool(loanTokenAddress, tokenAddress, amount):
-    token = Contract.from_abi("TestToken", address = tokenAddress, abi = TestToken.abi, owner = conf.acct)
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    token = getContract("TestToken", tokenAddress, TestToken.abi)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     if(token.allowance(conf.acct, loanToken.address) < amount):
         token.approve(loanToken.address, amount)
     tx = loanToken.mint(conf.acct, amount)
@@ -16,8 +18,8 @@ def lendToPool(loanTokenAddress, tokenAddress, amount):
     return tx
 
 def lendToPoolWithMS(loanTokenAddress, tokenAddress, amount):
-    token = Contract.from_abi("TestToken", address = tokenAddress, abi = TestToken.abi, owner = conf.acct)
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    token = getContract("TestToken", tokenAddress, TestToken.abi)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     if(token.allowance(conf.contracts['multisig'], loanToken.address) < amount):
         data = token.approve.encode_input(loanToken.address, amount)
         sendWithMultisig(conf.contracts['multisig'], token.address, data, conf.acct)
@@ -25,38 +27,40 @@ def lendToPoolWithMS(loanTokenAddress, tokenAddress, amount):
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
 
 def removeFromPool(loanTokenAddress, amount):
-    loanToken = Contract.from_abi("loanToken", address = loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     tx = loanToken.burn(conf.acct, amount)
     tx.info()
     return tx
 
 def readLoanTokenState(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    tas = loanToken.totalAssetSupply()
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
+    tas, tab, abir, ir, bir = multicall([
+        (loanToken.totalAssetSupply,),
+        (loanToken.totalAssetBorrow,),
+        (loanToken.avgBorrowInterestRate,),
+        (loanToken.nextSupplyInterestRate, 0),
+        (loanToken.nextBorrowInterestRate, 0)
+    ])
     print("total supply", tas/1e18);
     #print((balance - tas)/1e18)
-    tab = loanToken.totalAssetBorrow()
     print("total asset borrowed", tab/1e18)
-    abir = loanToken.avgBorrowInterestRate()
     print("average borrow interest rate", abir/1e18)
-    ir = loanToken.nextSupplyInterestRate(0)
     print("next supply interest rate", ir)
-    bir = loanToken.nextBorrowInterestRate(0)
     print("next borrow interest rate", bir)
 
 def readUnderlying(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     print(loanToken.loanTokenAddress())
 
 def getTokenPrice(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     price = loanToken.tokenPrice()
     print("token price",price)
     return price
 
 def testTokenBurning(loanTokenAddress, testTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    testToken = Contract.from_abi("TestToken", address = testTokenAddress, abi = TestToken.abi, owner = conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
+    testToken = getContract("TestToken", testTokenAddress, TestToken.abi)
 
     testToken.approve(loanToken,1e17) 
     loanToken.mint(conf.acct, 1e17)
@@ -74,9 +78,9 @@ def testTokenBurning(loanTokenAddress, testTokenAddress):
     assert(tx.events["Burn"]["tokenAmount"] == burnAmount)
 
 def testTradeOpeningAndClosing(protocolAddress, loanTokenAddress, underlyingTokenAddress, collateralTokenAddress, loanTokenSent, leverage, testClose, sendValue):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    testToken = Contract.from_abi("TestToken", address = underlyingTokenAddress, abi = TestToken.abi, owner = conf.acct)
-    sovryn = Contract.from_abi("sovryn", address=protocolAddress, abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
+    testToken = getContract("TestToken", underlyingTokenAddress, TestToken.abi)
+    sovryn = getContract("sovryn", protocolAddress, interface.ISovrynBrownie.abi)
     if(sendValue == 0 and testToken.allowance(conf.acct, loanTokenAddress) < loanTokenSent):
         testToken.approve(loanToken, loanTokenSent)
     print('going to trade')
@@ -107,9 +111,9 @@ def testTradeOpeningAndClosing(protocolAddress, loanTokenAddress, underlyingToke
 
 
 def testTradeOpeningAndClosingWithCollateral(protocolAddress, loanTokenAddress, underlyingTokenAddress, collateralTokenAddress, collateralTokenSent, leverage, testClose, sendValue):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    testToken = Contract.from_abi("TestToken", address = collateralTokenAddress, abi = TestToken.abi, owner = conf.acct)
-    sovryn = Contract.from_abi("sovryn", address=protocolAddress, abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
+    testToken = getContract("TestToken", collateralTokenAddress, TestToken.abi)
+    sovryn = getContract("sovryn", protocolAddress, interface.ISovrynBrownie.abi)
     if(sendValue == 0 and testToken.allowance(conf.acct, loanTokenAddress) < collateralTokenSent):
        testToken.approve(loanToken, collateralTokenSent)
     print('going to trade')
@@ -140,9 +144,9 @@ def testTradeOpeningAndClosingWithCollateral(protocolAddress, loanTokenAddress,
 
 def testBorrow(protocolAddress, loanTokenAddress, underlyingTokenAddress, collateralTokenAddress, amount):
     #read contract abis
-    sovryn = Contract.from_abi("sovryn", address=protocolAddress, abi=interface.ISovrynBrownie.abi, owner=conf.acct)
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    testToken = Contract.from_abi("TestToken", address = collateralTokenAddress, abi = TestToken.abi, owner = conf.acct)
+    sovryn = getContract("sovryn", protocolAddress, interface.ISovrynBrownie.abi)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
+    testToken = getContract("TestToken", collateralTokenAddress, TestToken.abi)
     
     # determine borrowing parameter
     withdrawAmount = amount #i want to borrow 10 USD
@@ -183,7 +187,7 @@ def testBorrow(protocolAddress, loanTokenAddress, underlyingTokenAddress, collat
 sets a collateral token address as collateral for borrowing
 '''
 def setupTorqueLoanParams(loanTokenAddress, underlyingTokenAddress, collateralTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     params = []
     setup = [
         b"0x0", ## id
@@ -205,7 +209,7 @@ def setupTorqueLoanParams(loanTokenAddress, underlyingTokenAddress, collateralTo
 sets a collateral token address as collateral for margin trading
 '''
 def setupMarginLoanParams(collateralTokenAddress, loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     
     params = [];
     setup = [
@@ -223,7 +227,7 @@ def setupMarginLoanParams(collateralTokenAddress, loanTokenAddress):
     print(tx.info())
 
 def setupLoanParamsForCollaterals(loanTokenAddress, collateralAddresses):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     marginParams = []
     torqueParams = []
     for collateralAddress in collateralAddresses:
@@ -253,12 +257,12 @@ def setupLoanParamsForCollaterals(loanTokenAddress, collateralAddresses):
 
 
 def setTransactionLimits(loanTokenAddress, addresses, limits):
-    localLoanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    localLoanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     data = localLoanToken.setTransactionLimits.encode_input(addresses,limits)
     sendWithMultisig(conf.contracts['multisig'], localLoanToken.address, data, conf.acct)
 
 def readTransactionLimits(loanTokenAddress, SUSD, RBTC, USDT, BPro):
-    localLoanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanToken.abi, owner=conf.acct)
+    localLoanToken = getContract("loanToken", loanTokenAddress, LoanToken.abi)
     limit = localLoanToken.transactionLimit(RBTC)
     print("RBTC limit, ",limit)
     limit = localLoanToken.transactionLimit(SUSD)
@@ -288,73 +292,66 @@ def replaceLoanTokenLogicOnAllContracts():
     replaceLoanTokenLogic(conf.contracts['iRBTC'], logicContract.address)
 
 def replaceLoanTokenLogic(loanTokenAddress, logicAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanToken.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanToken.abi)
     data = loanToken.setTarget.encode_input(logicAddress)
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
     
 
 def triggerEmergencyStop(loanTokenAddress, turnOn):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     functionSignature = "marginTrade(bytes32,uint256,uint256,uint256,address,address,bytes)"
     #functionSignature = "borrow(bytes32,uint256,uint256,uint256,address,address,address,bytes)"
     data = loanToken.toggleFunctionPause.encode_input(functionSignature, turnOn)
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
 
 def readPauser(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     print(loanToken.pauser())
 
 def setPauser(loanTokenAddress, pauser):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     data = loanToken.setPauser.encode_input(pauser)
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
 
 def checkPause(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
     funcId = "borrow(bytes32,uint256,uint256,uint256,address,address,address,bytes)"
     print(loanToken.checkPause(funcId))
 
 def disableLoanParams(loanTokenAddress, collateralToken):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenSettingsLowerAdmin.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenSettingsLowerAdmin.abi)
     data = loanToken.disableLoanParams.encode_input([collateralToken, collateralToken], [False, True])
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
 
 def readAdminOfLoanToken(loanTokenAddress):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenSettingsLowerAdmin.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenSettingsLowerAdmin.abi)
     print(loanToken.admin())
 
 def setAdminOnLoanToken(loanTokenAddress, admin):
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenSettingsLowerAdmin.abi, owner=conf.acct)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenSettingsLowerAdmin.abi)
     data = loanToken.setAdmin.encode_input(admin)
     sendWithMultisig(conf.contracts['multisig'], loanToken.address, data, conf.acct)
 
 def readLiquidity():
-    loanToken = Contract.from_abi("loanToken", address=conf.contracts['iRBTC'], abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    tasRBTC = loanToken.totalAssetSupply()
-    tabRBTC = loanToken.totalAssetBorrow()
-    print("liquidity on iRBTC", (tasRBTC-tabRBTC)/1e18)
-    
-    loanToken = Contract.from_abi("loanToken", address=conf.contracts['iDOC'], abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    tasIUSD = loanToken.totalAssetSupply()
-    tabIUSD = loanToken.totalAssetBorrow()
-    print("liquidity on iDOC", (tasIUSD-tabIUSD)/1e18)
-    
-    loanToken = Contract.from_abi("loanToken", address=conf.contracts['iUSDT'], abi=LoanTokenLogicStandard.abi, owner=conf.acct)
-    tasIUSD = loanToken.totalAssetSupply()
-    tabIUSD = loanToken.totalAssetBorrow()
-    print("liquidity on iUSDT", (tasIUSD-tabIUSD)/1e18)
-
-    tokenContract = Contract.from_abi("Token", address=conf.contracts['USDT'], abi=TestToken.abi, owner=conf.acct)
-    bal = tokenContract.balanceOf(conf.contracts['ConverterUSDT'])
-    print("supply of USDT on swap", bal/1e18)
-    
-    tokenContract = Contract.from_abi("Token", address=conf.contracts['WRBTC'], abi=TestToken.abi, owner=conf.acct)
-    bal = tokenContract.balanceOf(conf.contracts['ConverterUSDT'])
-    print("supply of rBTC on swap", bal/1e18)
+    batch = MulticallBatch(requireSuccess = True)
+    supplies = {}
+    for loanTokenName in ['iRBTC', 'iDOC', 'iUSDT']:
+        loanToken = getContract("loanToken", conf.contracts[loanTokenName], LoanTokenLogicStandard.abi)
+        supplies[loanTokenName] = (batch.add(loanToken.totalAssetSupply), batch.add(loanToken.totalAssetBorrow))
+    tokenContract = getContract("Token", conf.contracts['USDT'], TestToken.abi)
+    usdtOnSwap = batch.add(tokenContract.balanceOf, conf.contracts['ConverterUSDT'])
+    tokenContract = getContract("Token", conf.contracts['WRBTC'], TestToken.abi)
+    rbtcOnSwap = batch.add(tokenContract.balanceOf, conf.contracts['ConverterUSDT'])
+    batch.execute()
+
+    for loanTokenName, (tas, tab) in supplies.items():
+        print("liquidity on " + loanTokenName, (tas.value-tab.value)/1e18)
+    print("supply of USDT on swap", usdtOnSwap.value/1e18)
+    print("supply of rBTC on swap", rbtcOnSwap.value/1e18)
 
 def testSwapsExternal(underlyingTokenAddress, collateralTokenAddress, amount):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
-    underlyingToken = Contract.from_abi("TestToken", address=underlyingTokenAddress, abi=ERC20.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
+    underlyingToken = getContract("TestToken", underlyingTokenAddress, ERC20.abi)
 
     receiver = conf.acct
     tx = underlyingToken.approve(conf.contracts['sovrynProtocol'], amount)
@@ -384,11 +381,11 @@ def testSwapsExternal(underlyingTokenAddress, collateralTokenAddress, amount):
 # 1. make sure you have 3 times balance of underlyingTokenAddress
 # 2. make sure you have 2 times balance of amountCollateral
 def wrappedIntegrationTest(loanTokenAddress, underlyingTokenAddress, collateralTokenAddress, amountUnderlying, amountCollateral):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
-    loanToken = Contract.from_abi("loanToken", address=loanTokenAddress, abi=LoanTokenLogicStandard.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
+    loanToken = getContract("loanToken", loanTokenAddress, LoanTokenLogicStandard.abi)
 
-    underlyingToken = Contract.from_abi("TestToken", address=underlyingTokenAddress, abi=ERC20.abi, owner=conf.acct)
-    collateralToken = Contract.from_abi("TestToken", address=collateralTokenAddress, abi=ERC20.abi, owner=conf.acct)
+    underlyingToken = getContract("TestToken", underlyingTokenAddress, ERC20.abi)
+    collateralToken = getContract("TestToken", collateralTokenAddress, ERC20.abi)
     
     prevUnderlyingBalance = underlyingToken.balanceOf(conf.acct)
     prevCollateralBalance = collateralToken.balanceOf(conf.acct)
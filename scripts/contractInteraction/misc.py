@@ -5,65 +5,67 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
+from scripts.contractInteraction.loan_index import LoanIndex
+from scripts.contractInteraction.liquidation_risk import loadLoanTable, tokenPairs, queryRates, computeRisk
 
 def redeemFromAggregator(aggregatorAddress, tokenAddress, amount):
-    abiFile =  open('./scripts/contractInteraction/ABIs/aggregator.json')
-    abi = json.load(abiFile)
-    aggregator = Contract.from_abi("Aggregator", address=aggregatorAddress, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/aggregator.json')
+    aggregator = getContract("Aggregator", aggregatorAddress, abi)
     aggregator.redeem(tokenAddress, amount)
 
 def redeemFromAggregatorWithMS(aggregatorAddress, tokenAddress, amount):
-    abiFile =  open('./scripts/contractInteraction/ABIs/aggregator.json')
-    abi = json.load(abiFile)
-    aggregator = Contract.from_abi("Aggregator", address=aggregatorAddress, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/aggregator.json')
+    aggregator = getContract("Aggregator", aggregatorAddress, abi)
     data = aggregator.redeem.encode_input(tokenAddress, amount)
     sendWithMultisig(conf.contracts['multisig'], aggregator.address, data, conf.acct)
 
 def mintAggregatedToken(aggregatorAddress, tokenAddress, amount):
-    abiFile =  open('./scripts/contractInteraction/ABIs/aggregator.json')
-    abi = json.load(abiFile)
-    aggregator = Contract.from_abi("Aggregator", address=aggregatorAddress, abi=abi, owner=conf.acct)
-    token = Contract.from_abi("Token", address= tokenAddress, abi = TestToken.abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/aggregator.json')
+    aggregator = getContract("Aggregator", aggregatorAddress, abi)
+    token = getContract("Token", tokenAddress, TestToken.abi)
     data = token.approve(aggregatorAddress, amount)
     tx = aggregator.mint(tokenAddress, amount)
     tx.info()
 
 def mintAggregatedTokenWithMS(aggregatorAddress, tokenAddress, amount):
-    abiFile =  open('./scripts/contractInteraction/ABIs/aggregator.json')
-    abi = json.load(abiFile)
-    aggregator = Contract.from_abi("Aggregator", address=aggregatorAddress, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/aggregator.json')
+    aggregator = getContract("Aggregator", aggregatorAddress, abi)
     data = aggregator.mint.encode_input(tokenAddress, amount)
     sendWithMultisig(conf.contracts['multisig'], aggregator.address, data, conf.acct)
 
 
 def upgradeAggregator(multisig, newImpl):
-    abiFile =  open('./scripts/contractInteraction/ABIs/AggregatorProxy.json')
-    abi = json.load(abiFile)
-    proxy = Contract.from_abi("ETHAggregatorProxy", address = conf.contracts['ETHAggregatorProxy'], abi = abi, owner = conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/AggregatorProxy.json')
+    proxy = getContract("ETHAggregatorProxy", conf.contracts['ETHAggregatorProxy'], abi)
     data = proxy.upgradeTo(newImpl)
     sendWithMultisig(multisig, proxy.address, data, conf.acct)
     print(txId)
 
 def readClaimBalanceOrigin(address):
-    originClaimContract = Contract.from_abi("originClaim", address=conf.contracts['OriginInvestorsClaim'], abi=OriginInvestorsClaim.abi, owner=conf.acct)
+    originClaimContract = getContract("originClaim", conf.contracts['OriginInvestorsClaim'], OriginInvestorsClaim.abi)
     amount = originClaimContract.investorsAmountsList(address)
     print(amount)
 
 def determineFundsAtRisk():
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    index = LoanIndex()
+    index.update(fullRefresh = True)
+    # margin trades (maxLoanTerm == 0). The margins stored in the index depend on the prices at the time of the
+    # last loan event, so they are computed again at the current rates
+    loans = index.query("maxLoanTerm = 0")
+    table = loadLoanTable(loans)
+    pairs, pairIndex = tokenPairs(table)
+    risk = computeRisk(table, queryRates(pairs), pairs, pairIndex)
     borrowedPositions = []
     sum = 0
     possible = 0
-    for i in range (0, 10000, 10):
-        loans = sovryn.getActiveLoans(i, i+10, False)
-        if(len(loans) == 0):
-            break
-        for loan in loans:
-            if loan[11] == 0 and loan[10] > 150e18:
-                print(loan[1])
-                sum += loan[3]
-                possible += loan[3] * (loan[10] / 150e18)
-                borrowedPositions.append(loan)
+    for loan, currentMargin in zip(loans, risk['currentMargin']):
+        if currentMargin > 150e18:
+            principal = int(loan['principal'])
+            print(loan['loanToken'])
+            sum += principal
+            possible += principal * (currentMargin / 150e18)
+            borrowedPositions.append(dict(loan, currentMargin = str(currentMargin)))
 
     print(borrowedPositions)
     print(len(borrowedPositions))
@@ -73,10 +75,10 @@ def determineFundsAtRisk():
 
 
 def lookupCurrentPoolReserveBalances(userAddress):
-    wrbtc = Contract.from_abi("TestToken", address = conf.contracts['WRBTC'], abi = TestToken.abi, owner = conf.acct)
-    sov = Contract.from_abi("TestToken", address = conf.contracts['SOV'], abi = TestToken.abi, owner = conf.acct)
-    poolToken = Contract.from_abi("TestToken", address = conf.contracts['(WR)BTC/SOV'], abi = TestToken.abi, owner = conf.acct)
-    liquidityMining = Contract.from_abi("LiquidityMining", address = conf.contracts['LiquidityMiningProxy'], abi = LiquidityMining.abi, owner = conf.acct)
+    wrbtc = getContract("TestToken", conf.contracts['WRBTC'], TestToken.abi)
+    sov = getContract("TestToken", conf.contracts['SOV'], TestToken.abi)
+    poolToken = getContract("TestToken", conf.contracts['(WR)BTC/SOV'], TestToken.abi)
+    liquidityMining = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
 
     wrbtcBal = wrbtc.balanceOf(conf.contracts['WRBTCtoSOVConverter']) / 1e18
     sovBal = sov.balanceOf(conf.contracts['WRBTCtoSOVConverter']) / 1e18
@@ -0,0 +1,159 @@
+'''
+Batches view calls into a single eth_call through the Multicall contract (contracts/utils/Multicall.sol).
+
+usage:
+    batch = MulticallBatch()
+    supply = batch.add(loanToken.totalAssetSupply)
+    rate = batch.add(loanToken.nextSupplyInterestRate, 0)
+    batch.execute()
+    print(supply.value, rate.value)
+
+    # or
+    supply, rate = multicall([(loanToken.totalAssetSupply,), (loanToken.nextSupplyInterestRate, 0)])
+
+The results are decoded with the ABI of the queued method, so they have the same types as calling the method
+directly. Large batches are split into several eth_calls by calldata size and by the gas budget of the calls.
+If no Multicall contract is configured for the network, the calls are executed one by one.
+'''
+
+from brownie import *
+from hexbytes import HexBytes
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+
+# upper bound of the calldata sent with one eth_call, RSK nodes reject much bigger payloads
+MAX_CALLDATA_SIZE = 64 * 1024
+# gas budget of one eth_call, the block gas limit of brownie-config
+MAX_BATCH_GAS = 6800000
+# gas assumed for a single view call if not specified
+DEFAULT_CALL_GAS = 100000
+# abi encoding overhead of one Call struct inside the aggregate calldata
+CALL_ENCODING_OVERHEAD = 5 * 32
+
+
+class PendingCall:
+
+    def __init__(self, method, args, gas):
+        self.method = method
+        self.args = args
+        self.gas = gas
+        self.target = method._address
+        self.callData = HexBytes(method.encode_input(*args))
+        self.success = None
+        self.value = None
+
+    def size(self):
+        return len(self.callData) + CALL_ENCODING_OVERHEAD
+
+    def resolve(self, success, returnData):
+        self.success = success
+        if success:
+            self.value = self.method.decode_output(HexBytes(returnData).hex())
+
+    def callDirectly(self, blockIdentifier):
+        try:
+            returnData = web3.eth.call({'to': self.target, 'data': self.callData.hex()}, blockIdentifier)
+            self.resolve(True, returnData)
+        except ValueError:
+            self.resolve(False, b'')
+
+
+class MulticallBatch:
+
+    def __init__(self, multicallAddress = None, blockIdentifier = 'latest', requireSuccess = False,
+                 maxCalldataSize = MAX_CALLDATA_SIZE, maxGas = MAX_BATCH_GAS):
+        '''
+        @param multicallAddress defaults to the "Multicall" entry of the contracts json
+        @param blockIdentifier the block all calls of the batch are executed at
+        @param requireSuccess if True, a failing call raises instead of leaving success = False
+        '''
+        if multicallAddress is None:
+            multicallAddress = getMulticallAddress()
+        self.multicall = getContract("Multicall", multicallAddress, Multicall.abi) if multicallAddress else None
+        self.blockIdentifier = blockIdentifier
+        self.requireSuccess = requireSuccess
+        self.maxCalldataSize = maxCalldataSize
+        self.maxGas = maxGas
+        self.calls = []
+        self.blockNumber = None
+
+    def add(self, method, *args, gas = DEFAULT_CALL_GAS):
+        '''
+        queues a call of a brownie contract method
+        @param method e.g. loanToken.totalAssetSupply
+        @param gas the expected gas usage of the call, used to split the batch
+        @return the PendingCall, its value is set by execute()
+        '''
+        call = PendingCall(method, args, gas)
+        self.calls.append(call)
+        return call
+
+    def chunks(self):
+        chunk = []
+        size = 0
+        gas = 0
+        for call in self.calls:
+            if chunk and (size + call.size() > self.maxCalldataSize or gas + call.gas > self.maxGas):
+                yield chunk
+                chunk = []
+                size = 0
+                gas = 0
+            chunk.append(call)
+            size += call.size()
+            gas += call.gas
+        if chunk:
+            yield chunk
+
+    def execute(self):
+        '''
+        executes all queued calls and returns their values in the order they were added
+        '''
+        chunks = list(self.chunks())
+        blockIdentifier = self.blockIdentifier
+        # all values of a batch have to come from the same block, even if it needs more than one eth_call
+        if blockIdentifier == 'latest' and (self.multicall is None or len(chunks) > 1):
+            blockIdentifier = chain.height
+        if self.multicall is None:
+            for call in self.calls:
+                call.callDirectly(blockIdentifier)
+            self.blockNumber = blockIdentifier
+        else:
+            for chunk in chunks:
+                self.executeChunk(chunk, blockIdentifier)
+        if self.requireSuccess:
+            for call in self.calls:
+                if not call.success:
+                    raise Exception("call failed: " + call.method._name + str(call.args))
+        values = [call.value for call in self.calls]
+        self.calls = []
+        return values
+
+    def executeChunk(self, chunk, blockIdentifier):
+        aggregate = self.multicall.tryAggregate
+        data = aggregate.encode_input(False, [(call.target, call.callData) for call in chunk])
+        returnData = web3.eth.call({'to': self.multicall.address, 'data': data, 'gas': self.maxGas}, blockIdentifier)
+        blockNumber, results = aggregate.decode_output(HexBytes(returnData).hex())
+        self.blockNumber = blockNumber
+        for call, result in zip(chunk, results):
+            call.resolve(result[0], result[1])
+
+
+def getMulticallAddress():
+    contracts = getattr(conf, 'contracts', None) or {}
+    return contracts.get('Multicall')
+
+def multicall(calls, blockIdentifier = 'latest', requireSuccess = True):
+    '''
+    executes a list of (method, *args) tuples as one batch and returns the decoded values
+    '''
+    batch = MulticallBatch(blockIdentifier = blockIdentifier, requireSuccess = requireSuccess)
+    for call in calls:
+        batch.add(call[0], *call[1:])
+    return batch.execute()
+
+def deployMulticall():
+    multicallContract = conf.acct.deploy(Multicall)
+    print("Multicall deployed at", multicallContract.address)
+    conf.contracts['Multicall'] = multicallContract.address
+    return multicallContract
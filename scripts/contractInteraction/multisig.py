@@ -5,22 +5,23 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 def sendFromMultisig(receiver, amount):
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     tx = multisig.submitTransaction(receiver,amount,'')
     txId = tx.events["Submission"]["transactionId"]
     print(txId);
 
 def sendTokensFromMultisig(token, receiver, amount):
-    tokenContract = Contract.from_abi("Token", address=token, abi=TestToken.abi, owner=conf.acct)
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    tokenContract = getContract("Token", token, TestToken.abi)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     data = tokenContract.transfer.encode_input(receiver, amount)
     print(data)
     sendWithMultisig(conf.contracts['multisig'], token, data, conf.acct)
 
 def executeOnMultisig(transactionId):
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
 
     multisig.executeTransaction(transactionId)
 
@@ -30,7 +31,7 @@ def deployMultisig(owners, requiredConf):
 
     
 def printMultisigOwners():
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     print(multisig.getOwners())
 
 def replaceOwnerOnMultisig(multisig, oldOwner, newOwner):
@@ -38,11 +39,11 @@ def replaceOwnerOnMultisig(multisig, oldOwner, newOwner):
     sendWithMultisig(multisig, multisig, data, conf.acct)
 
 def confirmWithMS(txId):
-    multisig = Contract.from_abi("MultiSig", address = conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     multisig.confirmTransaction(txId)
 
 def checkTx():
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     print(multisig.transactions(216))
 
     print(multisig.getConfirmationCount(216))
@@ -53,7 +54,7 @@ def transferSOVtoTokenSender():
     amount = 87539 * 10**16
 
     tokenSenderAddress = conf.contracts['TokenSender']
-    SOVtoken = Contract.from_abi("SOV", address=conf.contracts['SOV'], abi=SOV.abi, owner=conf.acct)
+    SOVtoken = getContract("SOV", conf.contracts['SOV'], SOV.abi)
     data = SOVtoken.transfer.encode_input(tokenSenderAddress, amount)
     print(data)
 
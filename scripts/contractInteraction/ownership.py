@@ -5,36 +5,44 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
+from scripts.contractInteraction.multicall import MulticallBatch
 
 def transferOwner(contractAddress, newOwner):
-    contract = Contract.from_abi("loanToken", address=contractAddress, abi=LoanToken.abi, owner=conf.acct)
+    contract = getContract("loanToken", contractAddress, LoanToken.abi)
     tx= contract.transferOwnership(newOwner)
     tx.info()
     checkOwnerIsAddress(contractAddress, newOwner)
 
 def acceptOwnershipWithMultisig(contractAddress):
-    abiFile =  open('./scripts/contractInteraction/ABIs/Owned.json')
-    abi = json.load(abiFile)
-    ownedContract = Contract.from_abi("Owned", address=contractAddress, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/Owned.json')
+    ownedContract = getContract("Owned", contractAddress, abi)
     data=ownedContract.acceptOwnership.encode_input()
     sendWithMultisig(conf.contracts['multisig'], contractAddress, data, conf.acct)
 
 def readOwner(contractAddress):
-    contract = Contract.from_abi("loanToken", address=contractAddress, abi=LoanToken.abi, owner=conf.acct)
+    contract = getContract("loanToken", contractAddress, LoanToken.abi)
     print('owner:',contract.owner())
 
 def checkOwnerIsAddress(contractAddress, expectedOwner):
-    contract = Contract.from_abi("loanToken", address=contractAddress, abi=LoanToken.abi, owner=conf.acct)
+    contract = getContract("loanToken", contractAddress, LoanToken.abi)
     owner = contract.owner()
     print("owner == expectedOwner?", owner == expectedOwner)
 
 
 
 def readOwnersOfAllContracts():
-    for contractName in contracts:
+    skipped = ['multisig', 'WRBTC', 'og', 'USDT', 'medianizer', 'USDTtoUSDTOracleAMM', 'GovernorOwner', 'GovernorAdmin', 'SovrynSwapFormula', 'MOCState', 'USDTPriceFeed', 'FeeSharingProxy', 'TimelockOwner', 'TimelockAdmin', 'AdoptionFund', 'DevelopmentFund']
+    batch = MulticallBatch()
+    owners = {}
+    for contractName in conf.contracts:
         #print(contractName)
-        contract = Contract.from_abi("Ownable", address=conf.contracts[contractName], abi=LoanToken.abi, owner=conf.acct)
-        if(contractName != 'multisig' and contractName != 'WRBTC' and contractName != 'og'  and contractName != 'USDT' and contractName != 'medianizer' and contractName != 'USDTtoUSDTOracleAMM' and contractName != 'GovernorOwner'  and contractName != 'GovernorAdmin' and contractName != 'SovrynSwapFormula' and contractName != 'MOCState' and contractName != 'USDTPriceFeed' and contractName != 'FeeSharingProxy'  and contractName != 'TimelockOwner'  and contractName != 'TimelockAdmin' and contractName != 'AdoptionFund' and contractName != 'DevelopmentFund'):
-            owner = contract.owner()
-            if(owner != conf.contracts['multisig']):
-                print("owner of ", contractName, " is ", owner)
\ No newline at end of file
+        if(contractName not in skipped):
+            contract = getContract("Ownable", conf.contracts[contractName], LoanToken.abi)
+            owners[contractName] = batch.add(contract.owner)
+    batch.execute()
+    for contractName, owner in owners.items():
+        if(not owner.success):
+            print("could not read the owner of ", contractName)
+        elif(owner.value != conf.contracts['multisig']):
+            print("owner of ", contractName, " is ", owner.value)
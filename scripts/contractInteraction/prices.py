@@ -5,23 +5,25 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
+from scripts.contractInteraction.multicall import MulticallBatch
 
 def updatePriceFeedToRSKOracle():
     newPriceFeed = conf.acct.deploy(PriceFeedRSKOracle, conf.contracts['RSKOracle'])
     print("new price feed: ", newPriceFeed)
-    feeds = Contract.from_abi("PriceFeeds", address= conf.contracts['PriceFeeds'], abi = PriceFeeds.abi, owner = conf.acct)
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
     feeds.setPriceFeed([conf.contracts['WRBTC']], [newPriceFeed.address])
 
 def updatePriceFeedToMOCOracle():
     newPriceFeed = conf.acct.deploy(PriceFeedsMoC, conf.contracts['medianizer'], conf.contracts['RSKOracle'])
     print("new price feed: ", newPriceFeed)
-    feeds = Contract.from_abi("PriceFeeds", address= conf.contracts['PriceFeeds'], abi = PriceFeeds.abi, owner = conf.acct)
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
     data = feeds.setPriceFeed.encode_input([conf.contracts['WRBTC']], [newPriceFeed.address])
     sendWithMultisig(conf.contracts['multisig'], feeds.address, data, conf.acct)
 
 
 def readPrice(source, destination):
-    feeds = Contract.from_abi("PriceFeeds", address= conf.contracts['PriceFeeds'], abi = PriceFeeds.abi, owner = conf.acct)
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
     rate = feeds.queryRate(source, destination)
     print('rate is ', rate)
     return rate[0]
@@ -29,9 +31,8 @@ def readPrice(source, destination):
 
 
 def readSwapRate(source, destination):
-    abiFile =  open('./scripts/contractInteraction/ABIs/SovrynSwapNetwork.json')
-    abi = json.load(abiFile)
-    swapNetwork = Contract.from_abi("SovrynSwapNetwork", address=conf.contracts['swapNetwork'], abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/SovrynSwapNetwork.json')
+    swapNetwork = getContract("SovrynSwapNetwork", conf.contracts['swapNetwork'], abi)
     path = swapNetwork.conversionPath(source,destination)
     #print("path:", path)
     expectedReturn = swapNetwork.getReturnByPath(path, 1e18)
@@ -39,72 +40,73 @@ def readSwapRate(source, destination):
     return expectedReturn[0]
 
 def readConversionFee(converterAddress):
-    abiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
-    abi = json.load(abiFile)
-    converter = Contract.from_abi("Converter", address=converterAddress, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
+    converter = getContract("Converter", converterAddress, abi)
     fee = converter.conversionFee()
     print('fee is ', fee)
 
 
 def readPriceFromOracle(oracleAddress):
-    oracle = Contract.from_abi("Oracle", address=oracleAddress, abi=PriceFeedsMoC.abi, owner=conf.acct)
+    oracle = getContract("Oracle", oracleAddress, PriceFeedsMoC.abi)
     price = oracle.latestAnswer()
     print('rate is ', price)
 
 def readTargetWeights(converter, reserve):
-    abiFile =  open('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
-    abi = json.load(abiFile)
-    converter = Contract.from_abi("LiquidityPoolV2Converter", address=converter, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json')
+    converter = getContract("LiquidityPoolV2Converter", converter, abi)
     res = converter.reserves(reserve).dict()
     print(res)
     print('target weight is ',res['weight'])
 
 def readFromMedianizer():
-    medianizer = Contract.from_abi("Medianizer", address=conf.contracts['medianizer'], abi=PriceFeedsMoCMockup.abi, owner=conf.acct)
+    medianizer = getContract("Medianizer", conf.contracts['medianizer'], PriceFeedsMoCMockup.abi)
     print(medianizer.peek())
 
 def updateOracleAddress(newAddress):
     print("set oracle address to", newAddress)
-    priceFeedsMoC = Contract.from_abi("PriceFeedsMoC", address = '0x066ba9453e230a260c2a753d9935d91187178C29', abi = PriceFeedsMoC.abi, owner = conf.acct)
+    priceFeedsMoC = getContract("PriceFeedsMoC", '0x066ba9453e230a260c2a753d9935d91187178C29', PriceFeedsMoC.abi)
     priceFeedsMoC.setMoCOracleAddress(newAddress)
 
 
 def checkRates():
-    print('reading price from WRBTC to DOC')
-    readPrice(conf.contracts['WRBTC'], conf.contracts['DoC'])
-    print('reading price from WRBTC to USDT')
-    readPrice(conf.contracts['WRBTC'], conf.contracts['USDT'])
-    print('reading price from WRBTC to BPRO')
-    readPrice(conf.contracts['WRBTC'], conf.contracts['BPro'])
-    print('read price from USDT to DOC')
-    readPrice(conf.contracts['USDT'], conf.contracts['DoC'])
-
-    print('read swap rate from WRBTC to DOC')
-    readSwapRate(conf.contracts['WRBTC'], conf.contracts['DoC'])
-    print('read swap rate from WRBTC to USDT')
-    readSwapRate(conf.contracts['WRBTC'], conf.contracts['USDT'])
-    print('read swap rate from WRBTC to BPRO')
-    readSwapRate(conf.contracts['WRBTC'], conf.contracts['BPro'])
-    print('read swap rate from USDT to DOC')
-    readSwapRate(conf.contracts['USDT'], conf.contracts['DoC'])
-    print('read swap rate from BPro to DOC')
-    readSwapRate(conf.contracts['BPro'], conf.contracts['DoC'])
-    print('read swap rate from BPro to USDT')
-    readSwapRate(conf.contracts['BPro'], conf.contracts['USDT'])
-    print('read swap rate from USDT to WRBTC')
-    readSwapRate(conf.contracts['USDT'], conf.contracts['WRBTC'])
-    print('read swap rate from DOC to WRBTC')
-    readSwapRate(conf.contracts['DoC'], conf.contracts['WRBTC'])
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
+    swapNetwork = getContract("SovrynSwapNetwork", conf.contracts['swapNetwork'], loadABI('./scripts/contractInteraction/ABIs/SovrynSwapNetwork.json'))
+    oracle = getContract("Oracle", '0x78F0b35Edd78eD564830c45F4A22e4b553d7f042', PriceFeedsMoC.abi)
+    converter = getContract("LiquidityPoolV2Converter", '0x133eBE9c8bA524C9B1B601E794dF527f390729bF', loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV2Converter.json'))
+
+    pricePairs = [('WRBTC', 'DoC'), ('WRBTC', 'USDT'), ('WRBTC', 'BPro'), ('USDT', 'DoC')]
+    swapPairs = [('WRBTC', 'DoC'), ('WRBTC', 'USDT'), ('WRBTC', 'BPro'), ('USDT', 'DoC'), ('BPro', 'DoC'), ('BPro', 'USDT'), ('USDT', 'WRBTC'), ('DoC', 'WRBTC')]
+
+    # the swap rates need the conversion paths, so the rates are read with two batches, both at the same block
+    blockNumber = chain.height
+    batch = MulticallBatch(blockIdentifier = blockNumber, requireSuccess = True)
+    prices = [batch.add(feeds.queryRate, conf.contracts[source], conf.contracts[destination]) for source, destination in pricePairs]
+    paths = [batch.add(swapNetwork.conversionPath, conf.contracts[source], conf.contracts[destination]) for source, destination in swapPairs]
+    oraclePrice = batch.add(oracle.latestAnswer)
+    reserves = [batch.add(converter.reserves, conf.contracts[reserve]) for reserve in ['USDT', 'WRBTC']]
+    batch.execute()
+    swapRates = [batch.add(swapNetwork.getReturnByPath, path.value, 1e18) for path in paths]
+    batch.execute()
+
+    print('rates at block', blockNumber)
+    for (source, destination), rate in zip(pricePairs, prices):
+        print('reading price from ' + source + ' to ' + destination)
+        print('rate is ', rate.value)
+    for (source, destination), rate in zip(swapPairs, swapRates):
+        print('read swap rate from ' + source + ' to ' + destination)
+        print('rate is ', rate.value)
 
     print("price from the USDT oracle on AMM:")
-    readPriceFromOracle('0x78F0b35Edd78eD564830c45F4A22e4b553d7f042')
+    print('rate is ', oraclePrice.value)
 
-    readTargetWeights('0x133eBE9c8bA524C9B1B601E794dF527f390729bF', conf.contracts['USDT'])
-    readTargetWeights('0x133eBE9c8bA524C9B1B601E794dF527f390729bF', conf.contracts['WRBTC'])
+    for reserve in reserves:
+        res = reserve.value.dict()
+        print(res)
+        print('target weight is ',res['weight'])
 
 
 def readPriceFeedFor(tokenAddress):
-    feeds = Contract.from_abi("PriceFeeds", address= conf.contracts['PriceFeeds'], abi = PriceFeeds.abi, owner = conf.acct)
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
     print(feeds.pricesFeeds(tokenAddress))
 
 def deployOracleV1Pool():
@@ -112,9 +114,9 @@ def deployOracleV1Pool():
     oracleV1PoolPriceFeed = conf.acct.deploy(PriceFeedV1PoolOracle, oraclePoolAsset, conf.contracts['WRBTC'], conf.contracts['DoC'])
     print("new oracle v1 pool price feed: ", oracleV1PoolPriceFeed.address)
 
-    feeds = Contract.from_abi("PriceFeeds", address= conf.contracts['PriceFeeds'], abi = PriceFeeds.abi, owner = conf.acct)
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
     data = feeds.setPriceFeed.encode_input([conf.contracts['SOV']], [oracleV1PoolPriceFeed.address])
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     tx = multisig.submitTransaction(feeds.address,0,data)
     txId = tx.events["Submission"]["transactionId"]
     print("txid: ",txId)
\ No newline at end of file
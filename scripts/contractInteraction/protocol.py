@@ -5,20 +5,21 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 
 def readLendingFee():
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     lfp = sovryn.lendingFeePercent()
     print(lfp/1e18)
     return lfp
 
 def readLoan(loanId):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     print(sovryn.getLoan(loanId).dict())
 
 def liquidate(protocolAddress, loanId):
-    sovryn = Contract.from_abi("sovryn", address=protocolAddress, abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", protocolAddress, interface.ISovrynBrownie.abi)
     loan = sovryn.getLoan(loanId).dict()
     print(loan)
     if(loan['maintenanceMargin'] > loan['currentMargin']):
@@ -26,7 +27,7 @@ def liquidate(protocolAddress, loanId):
         if(loan['loanToken']==conf.contracts['WRBTC']):
             value = loan['maxLiquidatable']
         else:
-            testToken = Contract.from_abi("TestToken", address = loan['loanToken'], abi = TestToken.abi, owner = conf.acct)
+            testToken = getContract("TestToken", loan['loanToken'], TestToken.abi)
             testToken.approve(sovryn, loan['maxLiquidatable'])
         sovryn.liquidate(loanId, conf.acct, loan['maxLiquidatable'],{'value': value})
     else:
@@ -34,12 +35,12 @@ def liquidate(protocolAddress, loanId):
     
    
 def rollover(loanId):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     tx = sovryn.rollover(loanId, b'')
     print(tx.info())
 
 def replaceLoanClosings():
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
 
     print('replacing loan closings base')
     loanClosingsBase = conf.acct.deploy(LoanClosingsBase)
@@ -53,54 +54,54 @@ def replaceLoanClosings():
 
 def replaceSwapsExternal():
     swapsExternal = conf.acct.deploy(SwapsExternal)
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(swapsExternal.address)
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def replaceLoanOpenings():
     print("replacing loan openings")
     loanOpenings = conf.acct.deploy(LoanOpenings)
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(loanOpenings.address)
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def replaceSwapsImplSovrynSwap():
     print("replacing swaps")
     swaps = conf.acct.deploy(SwapsImplSovrynSwap)
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setSwapsImplContract.encode_input(swaps.address)
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def setLendingFee(fee):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setLendingFeePercent.encode_input(fee)
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def setTradingFee(fee):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setTradingFeePercent.encode_input(fee)
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def setBorrowingFee(fee):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setBorrowingFeePercent.encode_input(fee)
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def setAffiliateFeePercent(fee):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setAffiliateFeePercent.encode_input(fee)
     print('sovryn.setAffiliateFeePercent for', fee, ' tx:')
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def setAffiliateTradingTokenFeePercent(percentFee):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setAffiliateTradingTokenFeePercent.encode_input(percentFee)
     print('sovryn.setAffiliateTradingTokenFeePercent for ', percentFee, ' tx:')
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 
 def setMinReferralsToPayout(minReferrals):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setMinReferralsToPayoutAffiliates.encode_input(minReferrals)
     print('setMinReferralsToPayoutAffiliates set to ', minReferrals, ' tx:')
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
@@ -110,7 +111,7 @@ def replaceProtocolSettings():
     settings = conf.acct.deploy(ProtocolSettings)
 
     print("Calling replaceContract.")
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(settings.address)
     print(data)
 
@@ -121,7 +122,7 @@ def replaceLoanSettings():
     settings = conf.acct.deploy(LoanSettings)
 
     print("Calling replaceContract.")
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(settings.address)
     print(data)
 
@@ -134,7 +135,7 @@ def deployAffiliate():
 
     # -------------------------------- 2. Deploy the affiliates -----------------------------------------------
     affiliates = conf.acct.deploy(Affiliates)
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(affiliates.address)
     print('affiliates deployed. data:')
     print(data)
@@ -150,7 +151,7 @@ def deployAffiliate():
     print("protocol address loaded") #, sovryn.getProtocolAddress()) - not executed yet
 
     # Set SOVTokenAddress
-    sovToken = Contract.from_abi("SOV", address=conf.contracts["SOV"], abi=SOV.abi, owner=conf.acct)
+    sovToken = getContract("SOV", conf.contracts["SOV"], SOV.abi)
     data = sovryn.setSOVTokenAddress.encode_input(sovToken.address)
     # data = sovryn.setSOVTokenAddress.encode_input(conf.contracts["SOV"])
     print("Set SOV Token address in protocol settings")
@@ -160,7 +161,7 @@ def deployAffiliate():
     print("sovToken address loaded") #, sovryn.getSovTokenAddress()) - not executed yet
 
     # Set LockedSOVAddress
-    lockedSOV = Contract.from_abi("LockedSOV", address=conf.contracts["LockedSOV"], abi=LockedSOV.abi, owner=conf.acct)
+    lockedSOV = getContract("LockedSOV", conf.contracts["LockedSOV"], LockedSOV.abi)
     data = sovryn.setLockedSOVAddress.encode_input(lockedSOV.address)
     print("Set Locked SOV address in protocol settings")
     print(data)
@@ -196,7 +197,7 @@ def deployAffiliate():
 def replaceAffiliates():
     print("replacing Affiliates")
     affiliates = conf.acct.deploy(Affiliates)
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(affiliates.address)
     print(data)
 
@@ -205,7 +206,7 @@ def replaceAffiliates():
 def replaceLoanMaintenance():
     print("replacing loan maintenance")
     loanMaintenance = conf.acct.deploy(LoanMaintenance)
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(loanMaintenance.address)
     print(data)
 
@@ -214,32 +215,31 @@ def replaceLoanMaintenance():
 def redeploySwapsExternal():
     print('replacing swaps external')
     swapsExternal = conf.acct.deploy(SwapsExternal)
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.replaceContract.encode_input(swapsExternal.address)
     print(data)
 
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def setFeesController():
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setFeesController.encode_input(conf.contracts['FeeSharingProxy'])
     print(data)
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
 def readMaxAffiliateFee():
-    abiFile =  open('./scripts/contractInteraction/ABIs/SovrynSwapNetwork.json')
-    abi = json.load(abiFile)
-    swapNetwork = Contract.from_abi("SovrynSwapNetwork", address=conf.contracts['swapNetwork'], abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/SovrynSwapNetwork.json')
+    swapNetwork = getContract("SovrynSwapNetwork", conf.contracts['swapNetwork'], abi)
     print(swapNetwork.maxAffiliateFee())
 
 def withdrawFees():
-    feeSharingProxy = Contract.from_abi("FeeSharingProxy", address=conf.contracts['FeeSharingProxy'], abi=FeeSharingProxy.abi, owner=conf.acct)
+    feeSharingProxy = getContract("FeeSharingProxy", conf.contracts['FeeSharingProxy'], FeeSharingProxy.abi)
     feeSharingProxy.withdrawFees(conf.contracts['USDT'])
     feeSharingProxy.withdrawFees(conf.contracts['DoC'])
     feeSharingProxy.withdrawFees(conf.contracts['WRBTC'])
 
 def setSupportedToken(tokenAddress):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setSupportedTokens.encode_input([tokenAddress],[True])
     sendWithMultisig(conf.contracts['multisig'], sovryn.address, data, conf.acct)
 
@@ -295,9 +295,9 @@ def deployTradingRebatesUsingLockedSOV():
     replaceLoanSettings()
 
 def setDefaultRebatesPercentage(rebatePercent):
-    sovryn = Contract.from_abi("sovryn", address=conf.contracts['sovrynProtocol'], abi=interface.ISovrynBrownie.abi, owner=conf.acct)
+    sovryn = getContract("sovryn", conf.contracts['sovrynProtocol'], interface.ISovrynBrownie.abi)
     data = sovryn.setRebatePercent.encode_input(rebatePercent)
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     tx = multisig.submitTransaction(sovryn.address,0,data)
     txId = tx.events["Submission"]["transactionId"]
     print(txId)
@@ -311,8 +311,8 @@ def upgradeStaking():
     print("New staking logic address:", stakingLogic.address)
     
     # Get the proxy contract instance
-    #stakingProxy = Contract.from_abi("StakingProxy", address=conf.contracts['Staking'], abi=StakingProxy.abi, owner=conf.acct)
-    stakingProxy = Contract.from_abi("StakingProxy", address=conf.contracts['Staking'], abi=StakingProxy.abi, owner=conf.acct)
+    #stakingProxy = getContract("StakingProxy", conf.contracts['Staking'], StakingProxy.abi)
+    stakingProxy = getContract("StakingProxy", conf.contracts['Staking'], StakingProxy.abi)
 
     # Register logic in Proxy
     data = stakingProxy.setImplementation.encode_input(stakingLogic.address)
@@ -0,0 +1,166 @@
+'''
+Lazy, memoized registry of contract handles.
+
+Contract.from_abi parses the ABI and builds a new object on every call. The helpers below build each
+handle once, on first access, and key it by (network, address, ABI) so repeated calls from sweep scripts
+reuse the same object.
+
+usage:
+    from scripts.contractInteraction.registry import registry, getContract
+
+    registry.Staking.getCurrentVotes(user)            # name from the contracts json, default ABI
+    registry.iDOC.tokenPrice()
+    getContract("loanToken", address, LoanTokenLogicStandard.abi)
+'''
+
+import brownie
+from brownie import network, Contract
+import hashlib
+import json
+
+import scripts.contractInteraction.config as conf
+
+ABI_DIR = './scripts/contractInteraction/ABIs/'
+
+# default ABI for the names in the contracts json. Values are brownie container names, "interface.<name>"
+# for interfaces or "<file>.json" for the files in ABI_DIR. Names which are not listed use the name itself.
+DEFAULT_ABIS = {
+    'iDOC': 'LoanTokenLogicStandard',
+    'iRBTC': 'LoanTokenLogicWrbtc',
+    'iXUSD': 'LoanTokenLogicStandard',
+    'iUSDT': 'LoanTokenLogicStandard',
+    'iBPro': 'LoanTokenLogicStandard',
+    'sovrynProtocol': 'interface.ISovrynBrownie',
+    'DoC': 'TestToken',
+    'XUSD': 'TestToken',
+    'USDT': 'TestToken',
+    'BPro': 'TestToken',
+    'MOC': 'TestToken',
+    'ETHs': 'TestToken',
+    'WRBTC': 'WRBTC',
+    'ConverterDOC': 'LiquidityPoolV2Converter.json',
+    'ConverterBPRO': 'LiquidityPoolV2Converter.json',
+    'ConverterUSDT': 'LiquidityPoolV2Converter.json',
+    'ConverterETHs': 'LiquidityPoolV1Converter.json',
+    'ConverterMOC': 'LiquidityPoolV1Converter.json',
+    'WRBTCtoSOVConverter': 'LiquidityPoolV1Converter.json',
+    'WRBTCtoETHsConverter': 'LiquidityPoolV1Converter.json',
+    'swapNetwork': 'SovrynSwapNetwork.json',
+    'RBTCWrapperProxy': 'RBTCWrapperProxy.json',
+    'RBTCWrapperProxyWithoutLM': 'RBTCWrapperProxy.json',
+    'multisig': 'MultiSigWallet',
+    'Staking': 'Staking',
+    'StakingRewardsProxy': 'StakingRewards',
+    'GovernorOwner': 'GovernorAlpha',
+    'GovernorAdmin': 'GovernorAlpha',
+    'TimelockOwner': 'Timelock',
+    'TimelockAdmin': 'Timelock',
+    'VestingRegistry3': 'VestingRegistry3',
+    'LiquidityMiningProxy': 'LiquidityMining',
+    'medianizer': 'PriceFeedsMoCMockup',
+    'PriceFeedsMOC': 'PriceFeedsMoC',
+}
+
+_abiFiles = {}
+_contractsFiles = {}
+
+def loadABI(fileName):
+    '''
+    reads an ABI json file once and returns the same list on every later call
+    @param fileName path of the file, or a plain file name in ABI_DIR
+    '''
+    if '/' not in fileName:
+        fileName = ABI_DIR + fileName
+    if fileName not in _abiFiles:
+        with open(fileName) as abiFile:
+            _abiFiles[fileName] = json.load(abiFile)
+    return _abiFiles[fileName]
+
+def loadContracts(thisNetwork = None):
+    '''
+    returns the deployed contracts addresses for the network, reading the json file once per network
+    '''
+    thisNetwork = thisNetwork or network.show_active()
+    if thisNetwork not in _contractsFiles:
+        if thisNetwork == "rsk-mainnet":
+            fileName = './scripts/contractInteraction/mainnet_contracts.json'
+        elif thisNetwork in ["development", "testnet", "testnet-ws", "rsk-testnet"]:
+            fileName = './scripts/contractInteraction/testnet_contracts.json'
+        else:
+            raise Exception("Network not supported.")
+        with open(fileName) as configFile:
+            _contractsFiles[thisNetwork] = json.load(configFile)
+    return _contractsFiles[thisNetwork]
+
+def resolveABI(source):
+    '''
+    @param source a brownie container name, "interface.<name>" or an ABI json file name
+    '''
+    if source.endswith('.json'):
+        return loadABI(source)
+    if source.startswith('interface.'):
+        return getattr(brownie.interface, source[len('interface.'):]).abi
+    return getattr(brownie, source).abi
+
+
+class ContractRegistry:
+
+    def __init__(self):
+        self._handles = {}
+        # id(abi) -> (abi, digest). Keeping a reference to the ABI makes sure the id is not reused.
+        self._abiDigests = {}
+
+    def _abiKey(self, abi):
+        entry = self._abiDigests.get(id(abi))
+        if entry is None:
+            digest = hashlib.sha1(json.dumps(abi, sort_keys=True).encode()).hexdigest()
+            entry = (abi, digest)
+            self._abiDigests[id(abi)] = entry
+        return entry[1]
+
+    def at(self, address, abi, name = "Contract", owner = None):
+        '''
+        returns the handle for (network, address, abi), building it on first access
+        @param owner defaults to the account loaded by config.loadConfig
+        '''
+        key = (network.show_active(), str(address).lower(), self._abiKey(abi), owner and str(owner))
+        contract = self._handles.get(key)
+        if contract is None:
+            if owner is None:
+                owner = getattr(conf, 'acct', None)
+            contract = Contract.from_abi(name, address=address, abi=abi, owner=owner)
+            self._handles[key] = contract
+        return contract
+
+    def get(self, name, abi = None):
+        '''
+        returns the handle of a contract listed in the contracts json
+        @param name the key in the contracts json, e.g. "Staking" or "iDOC"
+        @param abi overrides the default ABI for the name
+        '''
+        contracts = loadContracts()
+        if name not in contracts:
+            raise AttributeError("unknown contract " + name)
+        if abi is None:
+            abi = resolveABI(DEFAULT_ABIS.get(name, name))
+        return self.at(contracts[name], abi, name)
+
+    def clear(self):
+        self._handles = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.get(name)
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+
+registry = ContractRegistry()
+
+def getContract(name, address, abi):
+    '''
+    drop-in replacement for Contract.from_abi(name, address=address, abi=abi, owner=conf.acct)
+    '''
+    return registry.at(address, abi, name)
@@ -0,0 +1,164 @@
+'''
+JSON-RPC batch transport for read-heavy scripts.
+
+Packs many eth_call / eth_getBalance / eth_getStorageAt requests into HTTP JSON-RPC batches. Unlike the
+Multicall contract (see multicall.py) it works against any node and any historical block.
+
+usage:
+    transport = RPCBatchTransport(blockIdentifier = chain.height)
+    balance = transport.call(SOVtoken.balanceOf, user)
+    rbtc = transport.getBalance(user)
+    transport.execute()
+    print(balance.value, rbtc.value)
+
+Requests which got no response or a transient error are retried. Reverted calls are not retried, they end
+with success = False.
+'''
+
+from brownie import *
+from hexbytes import HexBytes
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import time
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+RETRY_DELAY = 1
+REQUEST_TIMEOUT = 60
+
+# errors which mean the call itself failed, retrying them gives the same result
+REVERT_MESSAGES = ['revert', 'invalid opcode', 'out of gas']
+
+
+class RPCRequest:
+
+    def __init__(self, method, params, decoder = None):
+        self.method = method
+        self.params = params
+        self.decoder = decoder
+        self.success = None
+        self.value = None
+        self.error = None
+
+    def payload(self, requestId):
+        return {'jsonrpc': '2.0', 'id': requestId, 'method': self.method, 'params': self.params}
+
+    def resolve(self, response):
+        '''
+        @return False if the request should be retried
+        '''
+        if 'error' in response:
+            self.error = response['error']
+            message = str(self.error.get('message', '')).lower()
+            if any(revert in message for revert in REVERT_MESSAGES):
+                self.success = False
+                return True
+            return False
+        self.success = True
+        self.value = self.decoder(response['result']) if self.decoder else response['result']
+        return True
+
+
+class RPCBatchTransport:
+
+    def __init__(self, endpoint = None, blockIdentifier = 'latest', batchSize = DEFAULT_BATCH_SIZE,
+                 concurrency = DEFAULT_CONCURRENCY, retries = DEFAULT_RETRIES):
+        '''
+        @param endpoint the HTTP endpoint of the node, defaults to the one of the active network
+        @param blockIdentifier the default block of the requests
+        @param batchSize the number of requests in one HTTP request
+        @param concurrency the number of batches sent in parallel
+        @param retries how often a request without a valid response is sent again
+        '''
+        self.endpoint = endpoint or web3.provider.endpoint_uri
+        self.blockIdentifier = blockIdentifier
+        self.batchSize = batchSize
+        self.concurrency = concurrency
+        self.retries = retries
+        self.requests = []
+        self.session = requests.Session()
+
+    def _block(self, blockIdentifier):
+        block = self.blockIdentifier if blockIdentifier is None else blockIdentifier
+        return hex(block) if isinstance(block, int) else block
+
+    def add(self, method, params, decoder = None):
+        request = RPCRequest(method, params, decoder)
+        self.requests.append(request)
+        return request
+
+    def _transaction(self, contractMethod, args, sender, value):
+        transaction = {'to': contractMethod._address, 'data': contractMethod.encode_input(*args)}
+        if sender is not None:
+            transaction['from'] = str(sender)
+        if value:
+            transaction['value'] = hex(value)
+        return transaction
+
+    def call(self, contractMethod, *args, blockIdentifier = None, sender = None, value = 0):
+        '''
+        queues an eth_call of a brownie contract method, the value is decoded with the ABI of the method
+        @param sender, value msg.sender and msg.value of the call, to simulate a transaction
+        '''
+        decoder = lambda result: contractMethod.decode_output(result)
+        return self.add('eth_call', [self._transaction(contractMethod, args, sender, value), self._block(blockIdentifier)], decoder)
+
+    def estimateGas(self, contractMethod, *args, sender = None, value = 0):
+        return self.add('eth_estimateGas', [self._transaction(contractMethod, args, sender, value)], lambda result: int(result, 16))
+
+    def getBalance(self, address, blockIdentifier = None):
+        return self.add('eth_getBalance', [str(address), self._block(blockIdentifier)], lambda result: int(result, 16))
+
+    def getStorageAt(self, address, slot, blockIdentifier = None):
+        return self.add('eth_getStorageAt', [str(address), hex(slot), self._block(blockIdentifier)], HexBytes)
+
+    def getTransactionReceipt(self, txHash):
+        '''
+        the value is None as long as the transaction is not mined
+        '''
+        return self.add('eth_getTransactionReceipt', [str(txHash)])
+
+    def execute(self):
+        '''
+        sends all queued requests and returns their values in the order they were added
+        '''
+        executed = self.requests
+        pending = executed
+        self.requests = []
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                time.sleep(RETRY_DELAY * attempt)
+            batches = [pending[i:i + self.batchSize] for i in range(0, len(pending), self.batchSize)]
+            with ThreadPoolExecutor(max_workers = self.concurrency) as executor:
+                failed = list(executor.map(self.sendBatch, batches))
+            pending = [request for batch in failed for request in batch]
+            if not pending:
+                break
+        if pending:
+            raise Exception(str(len(pending)) + " requests failed, first error: " + str(pending[0].error))
+        return [request.value for request in executed]
+
+    def sendBatch(self, batch):
+        '''
+        @return the requests of the batch which have to be retried
+        '''
+        try:
+            response = self.session.post(self.endpoint, json = [request.payload(i) for i, request in enumerate(batch)], timeout = REQUEST_TIMEOUT)
+            response.raise_for_status()
+            responses = response.json()
+        except (requests.RequestException, ValueError) as e:
+            for request in batch:
+                request.error = {'message': str(e)}
+            return batch
+        # a node which does not support batches answers with a single error object
+        if not isinstance(responses, list):
+            for request in batch:
+                request.error = responses.get('error', responses)
+            return batch
+        byId = {response.get('id'): response for response in responses}
+        retry = []
+        for i, request in enumerate(batch):
+            if i not in byId or not request.resolve(byId[i]):
+                retry.append(request)
+        return retry
@@ -0,0 +1,147 @@
+'''
+Takes a snapshot of the protocol state at a single block and writes it to a JSON file and a CSV file.
+
+The snapshot contains:
+    - every loan pool of the contracts json: supply, borrow, rates, market liquidity and token price
+    - PriceFeeds.queryRate for all pairs of the known tokens
+    - the reserves of the AMM converters
+    - the liquidity mining pools
+
+All values are read with batched calls (see multicall.py), pinned to the same block.
+
+run with:
+    brownie run scripts/contractInteraction/snapshot.py --network rsk-mainnet
+'''
+
+from brownie import *
+import csv
+import json
+import os
+import re
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
+from scripts.contractInteraction.multicall import MulticallBatch
+
+SNAPSHOT_DIR = './snapshots/'
+
+PRICE_FEED_TOKENS = ['WRBTC', 'DoC', 'USDT', 'BPro', 'XUSD', 'SOV', 'ETHs', 'MOC']
+
+LOAN_POOL_FIELDS = ['totalAssetSupply', 'totalAssetBorrow', 'avgBorrowInterestRate', 'supplyInterestRate',
+                    'borrowInterestRate', 'marketLiquidity', 'tokenPrice', 'totalSupply']
+
+def main():
+    conf.loadConfig()
+    snapshot = takeSnapshot()
+    writeSnapshot(snapshot)
+
+def loanPoolNames():
+    return [name for name in conf.contracts if re.match('^i[A-Z]', name)]
+
+def converterNames():
+    return [name for name in conf.contracts if name.startswith('Converter') or name.endswith('Converter')]
+
+def takeSnapshot(blockNumber = None):
+    '''
+    reads the protocol state at the given block, the latest one by default
+    '''
+    if blockNumber is None:
+        blockNumber = chain.height
+    batch = MulticallBatch(blockIdentifier = blockNumber)
+    converterABI = loadABI('./scripts/contractInteraction/ABIs/LiquidityPoolV1Converter.json')
+
+    # round 1: loan pools, prices, liquidity mining and the number of reserves of every converter
+    loanPools = {}
+    for name in loanPoolNames():
+        loanToken = getContract("loanToken", conf.contracts[name], LoanTokenLogicStandard.abi)
+        loanPools[name] = {field: batch.add(getattr(loanToken, field)) for field in LOAN_POOL_FIELDS}
+
+    feeds = getContract("PriceFeeds", conf.contracts['PriceFeeds'], PriceFeeds.abi)
+    tokens = [token for token in PRICE_FEED_TOKENS if token in conf.contracts]
+    prices = {}
+    for source in tokens:
+        for destination in tokens:
+            if source != destination:
+                prices[source + '/' + destination] = batch.add(feeds.queryRate, conf.contracts[source], conf.contracts[destination])
+
+    liquidityMining = None
+    if 'LiquidityMiningProxy' in conf.contracts:
+        lm = getContract("LiquidityMining", conf.contracts['LiquidityMiningProxy'], LiquidityMining.abi)
+        liquidityMining = batch.add(lm.getPoolInfoList)
+
+    converters = {name: getContract("Converter", conf.contracts[name], converterABI) for name in converterNames()}
+    reserveCounts = {name: batch.add(converter.reserveTokenCount) for name, converter in converters.items()}
+    batch.execute()
+
+    # round 2: the reserve tokens
+    reserveTokens = {}
+    for name, count in reserveCounts.items():
+        if count.success:
+            reserveTokens[name] = [batch.add(converters[name].reserveTokens, i) for i in range(count.value)]
+    batch.execute()
+
+    # round 3: the reserve balances
+    reserveBalances = {}
+    for name, tokenCalls in reserveTokens.items():
+        reserveBalances[name] = {token.value: batch.add(converters[name].reserveBalance, token.value) for token in tokenCalls if token.success}
+    batch.execute()
+
+    snapshot = {
+        'network': network.show_active(),
+        'block': blockNumber,
+        'timestamp': chain[blockNumber].timestamp,
+        'loanPools': {},
+        'prices': {},
+        'ammReserves': {},
+        'liquidityMiningPools': [],
+    }
+    for name, fields in loanPools.items():
+        snapshot['loanPools'][name] = {'address': conf.contracts[name]}
+        snapshot['loanPools'][name].update({field: valueOf(call) for field, call in fields.items()})
+    for pair, call in prices.items():
+        snapshot['prices'][pair] = {'rate': call.value[0], 'precision': call.value[1]} if call.success else None
+    for name, balances in reserveBalances.items():
+        snapshot['ammReserves'][name] = {'address': conf.contracts[name]}
+        snapshot['ammReserves'][name].update({token: valueOf(call) for token, call in balances.items()})
+    if liquidityMining is not None and liquidityMining.success:
+        for pool in liquidityMining.value:
+            snapshot['liquidityMiningPools'].append({
+                'poolToken': pool[0],
+                'allocationPoint': pool[1],
+                'lastRewardBlock': pool[2],
+                'accumulatedRewardPerShare': pool[3],
+            })
+    return snapshot
+
+def valueOf(call):
+    return call.value if call.success else None
+
+def flatten(snapshot):
+    '''
+    returns the snapshot as rows of (section, entity, field, value)
+    '''
+    rows = []
+    for section in ['loanPools', 'ammReserves']:
+        for entity, fields in snapshot[section].items():
+            for field, value in fields.items():
+                rows.append((section, entity, field, value))
+    for pair, price in snapshot['prices'].items():
+        for field, value in (price or {'rate': None}).items():
+            rows.append(('prices', pair, field, value))
+    for pool in snapshot['liquidityMiningPools']:
+        for field, value in pool.items():
+            if field != 'poolToken':
+                rows.append(('liquidityMiningPools', pool['poolToken'], field, value))
+    return rows
+
+def writeSnapshot(snapshot, directory = SNAPSHOT_DIR):
+    os.makedirs(directory, exist_ok = True)
+    fileName = directory + 'snapshot_' + snapshot['network'] + '_' + str(snapshot['block'])
+    with open(fileName + '.json', 'w') as file:
+        json.dump(snapshot, file, indent = 2)
+    with open(fileName + '.csv', 'w', newline = '') as file:
+        writer = csv.writer(file)
+        writer.writerow(['block', 'timestamp', 'section', 'entity', 'field', 'value'])
+        for row in flatten(snapshot):
+            writer.writerow([snapshot['block'], snapshot['timestamp']] + list(row))
+    print("snapshot of block", snapshot['block'], "written to", fileName + '.json', "and", fileName + '.csv')
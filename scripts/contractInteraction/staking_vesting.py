@@ -5,41 +5,42 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 def sendSOVFromVestingRegistry():
     amount = 307470805 * 10**14
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=conf.contracts['VestingRegistry'], abi=VestingRegistry.abi, owner=conf.acct)
+    vestingRegistry = getContract("VestingRegistry", conf.contracts['VestingRegistry'], VestingRegistry.abi)
     data = vestingRegistry.transferSOV.encode_input(conf.contracts['multisig'], amount)
     print(data)
 
     sendWithMultisig(conf.contracts['multisig'], vestingRegistry.address, data, conf.acct)
 
 def addAdmin(admin, vestingRegistryAddress):
-    multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=vestingRegistryAddress, abi=VestingRegistry.abi, owner=conf.acct)
+    multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
+    vestingRegistry = getContract("VestingRegistry", vestingRegistryAddress, VestingRegistry.abi)
     data = vestingRegistry.addAdmin.encode_input(admin)
     sendWithMultisig(conf.contracts['multisig'], vestingRegistry.address, data, conf.acct)
 
 def isVestingAdmin(admin, vestingRegistryAddress):
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=vestingRegistryAddress, abi=VestingRegistry.abi, owner=conf.acct)
+    vestingRegistry = getContract("VestingRegistry", vestingRegistryAddress, VestingRegistry.abi)
     print(vestingRegistry.admins(admin))
 
 def readVestingContractForAddress(userAddress):
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=conf.contracts['VestingRegistry'], abi=VestingRegistry.abi, owner=conf.acct)
+    vestingRegistry = getContract("VestingRegistry", conf.contracts['VestingRegistry'], VestingRegistry.abi)
     address = vestingRegistry.getVesting(userAddress)
     if(address == '0x0000000000000000000000000000000000000000'):
-        vestingRegistry = Contract.from_abi("VestingRegistry", address=conf.contracts['VestingRegistry'], abi=VestingRegistry.abi, owner=conf.acct)
+        vestingRegistry = getContract("VestingRegistry", conf.contracts['VestingRegistry'], VestingRegistry.abi)
         address = vestingRegistry.getVesting(userAddress)
 
     print(address)
 
 def readLMVestingContractForAddress(userAddress):
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=conf.contracts['VestingRegistry3'], abi=VestingRegistry.abi, owner=conf.acct)
+    vestingRegistry = getContract("VestingRegistry", conf.contracts['VestingRegistry3'], VestingRegistry.abi)
     address = vestingRegistry.getVesting(userAddress)
     print(address)
 
 def readStakingKickOff():
-    staking = Contract.from_abi("Staking", address=conf.contracts['Staking'], abi=Staking.abi, owner=conf.acct)
+    staking = getContract("Staking", conf.contracts['Staking'], Staking.abi)
     print(staking.kickoffTS())
 
 def stake80KTokens():
@@ -48,13 +49,13 @@ def stake80KTokens():
     # 80K SOV
     amount = 80000 * 10**18
 
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=conf.contracts['VestingRegistry'], abi=VestingRegistry.abi, owner=conf.acct)
+    vestingRegistry = getContract("VestingRegistry", conf.contracts['VestingRegistry'], VestingRegistry.abi)
     vestingAddress = vestingRegistry.getVesting(tokenOwner)
     print("vestingAddress: " + vestingAddress)
     data = vestingRegistry.stakeTokens.encode_input(vestingAddress, amount)
     print(data)
 
-    # multisig = Contract.from_abi("MultiSig", address=conf.contracts['multisig'], abi=MultiSigWallet.abi, owner=conf.acct)
+    # multisig = getContract("MultiSig", conf.contracts['multisig'], MultiSigWallet.abi)
     # tx = multisig.submitTransaction(vestingRegistry.address,0,data)
     # txId = tx.events["Submission"]["transactionId"]
     # print(txId)
@@ -76,7 +77,7 @@ def createVesting():
     cliff = 1 * FOUR_WEEKS
     duration = cliff + (10 - 1) * FOUR_WEEKS
 
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=conf.contracts['VestingRegistry'], abi=VestingRegistry.abi, owner=conf.acct)
+    vestingRegistry = getContract("VestingRegistry", conf.contracts['VestingRegistry'], VestingRegistry.abi)
     data = vestingRegistry.createVesting.encode_input(tokenOwner, amount, cliff, duration)
     print(data)
 
@@ -84,7 +85,7 @@ def createVesting():
 
 def transferSOVtoVestingRegistry(vestingRegistryAddress, amount):
 
-    SOVtoken = Contract.from_abi("SOV", address=conf.contracts['SOV'], abi=SOV.abi, owner=conf.acct)
+    SOVtoken = getContract("SOV", conf.contracts['SOV'], SOV.abi)
     data = SOVtoken.transfer.encode_input(vestingRegistryAddress, amount)
     print(data)
 
@@ -101,7 +102,7 @@ def upgradeStakingRewards():
     print("New staking rewards logic address:", stakingRewards.address)
     
     # Get the proxy contract instance
-    stakingRewardsProxy = Contract.from_abi("StakingRewardsProxy", address=conf.contracts['StakingRewards'], abi=StakingRewardsProxy.abi, owner=conf.acct)
+    stakingRewardsProxy = getContract("StakingRewardsProxy", conf.contracts['StakingRewards'], StakingRewardsProxy.abi)
 
     # Register logic in Proxy
     data = stakingRewardsProxy.setImplementation.encode_input(stakingRewards.address)
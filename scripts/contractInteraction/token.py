@@ -5,15 +5,16 @@ import time;
 import copy
 from scripts.utils import * 
 import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract, loadABI
 
 def getBalance(contractAddress, acct):
-    contract = Contract.from_abi("Token", address=contractAddress, abi=LoanToken.abi, owner=conf.acct)
+    contract = getContract("Token", contractAddress, LoanToken.abi)
     balance = contract.balanceOf(acct)
     print(balance)
     return balance
     
 def buyWRBTC(amount):
-    contract = Contract.from_abi("WRBTC", address=conf.contracts["WRBTC"], abi=WRBTC.abi, owner=conf.acct)
+    contract = getContract("WRBTC", conf.contracts["WRBTC"], WRBTC.abi)
     tx = contract.deposit({'value':amount})
     tx.info()
     print("New balance: ", contract.balanceOf(conf.acct))
@@ -25,14 +26,13 @@ def hasApproval(tokenContractAddr, sender, receiver):
     return allowance
 
 def mintNFT(contractAddress, receiver):
-    abiFile =  open('./scripts/contractInteraction/ABIs/SovrynNft.json')
-    abi = json.load(abiFile)
-    nft = Contract.from_abi("NFT", address=contractAddress, abi=abi, owner=conf.acct)
+    abi = loadABI('./scripts/contractInteraction/ABIs/SovrynNft.json')
+    nft = getContract("NFT", contractAddress, abi)
     nft.mint(receiver)
 
 
 def transferTokensFromWallet(tokenContract, receiver, amount):
-    token = Contract.from_abi("Token", address= tokenContract, abi = TestToken.abi, owner=conf.acct)
+    token = getContract("Token", tokenContract, TestToken.abi)
     token.transfer(receiver, amount)
 
 def sendToWatcher(tokenAddress, amount):
@@ -41,6 +41,6 @@ def sendToWatcher(tokenAddress, amount):
     transferTokensFromWallet(conf.contracts['WRBTC'], conf.contracts['WatcherContract'], amount)
     
 def approveFromMS(tokenContract, receiver, amount):
-    token = Contract.from_abi("Token", address= tokenContract, abi = TestToken.abi, owner=conf.acct)
+    token = getContract("Token", tokenContract, TestToken.abi)
     data = token.approve.encode_input(receiver, amount)
     sendWithMultisig(conf.contracts['multisig'], tokenContract, data, conf.acct)
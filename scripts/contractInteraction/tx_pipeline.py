@@ -0,0 +1,170 @@
+'''
+Nonce-pipelined transaction sender.
+
+Keeps up to maxInFlight transactions of one account in flight instead of waiting for every receipt:
+    - nonces are assigned locally, starting at the pending transaction count of the account
+    - the receipts of all transactions in flight are polled with one JSON-RPC batch per block (see rpc_batch.py)
+    - transactions the node does not know anymore (dropped from the mempool) are broadcast again
+    - transactions which are not mined after stuckBlocks blocks are replaced with the same nonce and a gas price
+      increased by GAS_PRICE_BUMP. All hashes of a transaction are tracked, the first one mined wins
+
+usage:
+    pipeline = TransactionPipeline()
+    for owner, amount in rows:
+        pipeline.submit(vestingCreator.createVesting, owner, amount, cliff, duration)
+    results = pipeline.waitAll()
+    for tx in results:
+        print(tx.status, tx.txid)
+
+    tx = pipeline.submit(SOVtoken.approve, spender, amount)
+    tx.wait()       # the receipt, as a dict of the JSON-RPC response
+'''
+
+from brownie import *
+import time
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.rpc_batch import RPCBatchTransport
+
+DEFAULT_MAX_IN_FLIGHT = 8
+# gas limit = estimate * GAS_BUFFER, the state may change until the transaction is mined
+GAS_BUFFER = 1.2
+# the gas price of a replacement transaction has to be higher than the one it replaces
+GAS_PRICE_BUMP = 1.2
+# blocks after which a transaction in flight is replaced with a higher gas price
+STUCK_BLOCKS = 10
+POLL_INTERVAL = 2
+
+# states of a transaction
+PENDING = 'pending'
+CONFIRMED = 'confirmed'
+REVERTED = 'reverted'
+
+
+class PipelinedTx:
+
+    def __init__(self, pipeline, contractMethod, args, value, gasLimit, nonce):
+        self.pipeline = pipeline
+        self.contractMethod = contractMethod
+        self.args = args
+        self.value = value
+        self.gasLimit = gasLimit
+        self.nonce = nonce
+        # the hash of every broadcast of the transaction, the latest last
+        self.txids = []
+        self.gasPrice = None
+        self.sentBlock = None
+        self.status = PENDING
+        self.receipt = None
+
+    @property
+    def txid(self):
+        # the hash of the transaction which was mined, or the latest one
+        return self.receipt['transactionHash'] if self.receipt else self.txids[-1]
+
+    def broadcast(self, gasPrice):
+        tx = self.contractMethod(*self.args, {
+            'from': self.pipeline.sender,
+            'value': self.value,
+            'nonce': self.nonce,
+            'gas_limit': self.gasLimit,
+            'gas_price': gasPrice,
+            'required_confs': 0,
+        })
+        self.txids.append(tx.txid)
+        self.gasPrice = gasPrice
+        self.sentBlock = web3.eth.blockNumber
+
+    def wait(self):
+        '''
+        @return the receipt, after polling the pipeline until the transaction is mined
+        '''
+        while self.status == PENDING:
+            self.pipeline.poll()
+        return self.receipt
+
+
+class TransactionPipeline:
+
+    def __init__(self, sender = None, maxInFlight = DEFAULT_MAX_IN_FLIGHT, gasPrice = None, stuckBlocks = STUCK_BLOCKS,
+                 pollInterval = POLL_INTERVAL):
+        '''
+        @param sender the sending account, the account of the config by default. No other process may send
+               transactions of the account while the pipeline is used
+        @param gasPrice defaults to the gas price of the node at the time of each submission
+        '''
+        self.sender = sender or conf.acct
+        self.maxInFlight = maxInFlight
+        self.gasPrice = gasPrice
+        self.stuckBlocks = stuckBlocks
+        self.pollInterval = pollInterval
+        self.transport = RPCBatchTransport()
+        self.nonce = web3.eth.getTransactionCount(str(self.sender), 'pending')
+        self.inFlight = []
+        self.submitted = []
+        self.lastPolledBlock = None
+
+    def submit(self, contractMethod, *args, value = 0, gasLimit = None):
+        '''
+        broadcasts a transaction of a brownie contract method with the next nonce, waiting only while maxInFlight
+        transactions are in flight
+        @param gasLimit defaults to the estimate * GAS_BUFFER. The estimate runs against the latest state, pass the
+               gas limit if the transaction depends on transactions in flight
+        @return the PipelinedTx
+        '''
+        while len(self.inFlight) >= self.maxInFlight:
+            self.poll()
+        if gasLimit is None:
+            gasLimit = int(contractMethod.estimate_gas(*args, {'from': self.sender, 'value': value}) * GAS_BUFFER)
+        tx = PipelinedTx(self, contractMethod, args, value, gasLimit, self.nonce)
+        # the nonce is only used up if the node accepted the transaction
+        tx.broadcast(self.gasPrice or web3.eth.gasPrice)
+        self.nonce += 1
+        self.inFlight.append(tx)
+        self.submitted.append(tx)
+        return tx
+
+    def poll(self):
+        '''
+        checks the transactions in flight once per block: collects the receipts, broadcasts dropped transactions
+        again and replaces stuck ones
+        '''
+        block = web3.eth.blockNumber
+        if block == self.lastPolledBlock:
+            time.sleep(self.pollInterval)
+            return
+        self.lastPolledBlock = block
+        receipts = [[self.transport.getTransactionReceipt(txid) for txid in tx.txids] for tx in self.inFlight]
+        known = [self.transport.add('eth_getTransactionByHash', [tx.txids[-1]]) for tx in self.inFlight]
+        self.transport.execute()
+
+        stillInFlight = []
+        for tx, txReceipts, transaction in zip(self.inFlight, receipts, known):
+            receipt = next((request.value for request in txReceipts if request.value is not None), None)
+            if receipt is not None:
+                tx.receipt = receipt
+                tx.status = CONFIRMED if int(receipt['status'], 16) == 1 else REVERTED
+                continue
+            stillInFlight.append(tx)
+            if transaction.value is None:
+                print("nonce", tx.nonce, "was dropped, broadcasting it again")
+                self.rebroadcast(tx, tx.gasPrice)
+            elif block - tx.sentBlock >= self.stuckBlocks:
+                print("nonce", tx.nonce, "is stuck since block", tx.sentBlock, ", bumping the gas price")
+                self.rebroadcast(tx, int(tx.gasPrice * GAS_PRICE_BUMP))
+        self.inFlight = stillInFlight
+
+    def rebroadcast(self, tx, gasPrice):
+        try:
+            tx.broadcast(gasPrice)
+        except Exception as e:
+            # e.g. the nonce was mined in the meantime, the receipt is found with the next poll
+            print("nonce", tx.nonce, "could not be broadcast again:", e)
+
+    def waitAll(self):
+        '''
+        @return all submitted transactions, after all of them are mined
+        '''
+        while self.inFlight:
+            self.poll()
+        return self.submitted
@@ -58,7 +58,7 @@ def main():
         '''
         Next steps:
         1. Set OriginInvestorsClaim and VestingRegistry2 addresses in the relevant config: testnet_contracts.js or mainnet_contracts.js
-        2. Run deploy_orig_claim_step2.py to load investors list by chunks of 250 records
+        2. Run deploy_orig_claim_step2.py to load investors list in gas-sized chunks (resumable, see its journal)
         3. Fund OriginInvestorsClaim with SOV = 9073250102711580000000 (DECIMALS == 18). Should equal to OriginInvestorsClaim.totalAmount()
         4. Run deploy_orig_claim_step3.py to notify the claim contract that users can claim their SOV
         5. Notify origin investors that they can claim their tokens with the cliff == duration == Mar 26 2021
@@ -1,44 +1,24 @@
 from brownie import *
+import scripts.contractInteraction.config as conf
+from scripts.deployment.distribution.distribution_engine import DistributionEngine
+from scripts.deployment.distribution.distribution_verifier import verifyDistribution, printVerification
+from scripts.contractInteraction.list_reader import readList, ORIGIN_CLAIM
 
 import time
 import json
 import csv
 import math
 
-totalAmountSatoshi = 0
-totalAmountSOV = 0
-totalCount = 0
-chunkSize = 250
-rowNumber = 0
-chunksProcessed = 0
-appendAddresses = []
-appendAmounts = []
 # https://github.com/DistributedCollective/SIPS/blob/main/SIP-0006(A1).md
 EX_RATE = 9736
 MULTIPLIER = 10 ** 18
 
 
 def main():
+    conf.loadConfig()
     thisNetwork = network.show_active()
-
-    if thisNetwork == "development":
-        acct = accounts[0]
-        configFile = open(
-            './scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "testnet":
-        acct = accounts.load("rskdeployer")
-        configFile = open(
-            './scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "rsk-mainnet":
-        acct = accounts.load("rskdeployer")
-        configFile = open(
-            './scripts/contractInteraction/mainnet_contracts.json')
-    else:
-        raise Exception("network not supported")
-
-    contracts = json.load(configFile)
-    multisig = contracts['multisig']
-    teamVestingOwner = multisig
+    contracts = conf.contracts
+    acct = conf.acct
 
     balanceBefore = acct.balance()
 
@@ -47,66 +27,57 @@ def main():
         print('Please set originInvestorsClaimAddress and run again')
         return
 
-    claimContract = Contract.from_abi(
-        "OriginInvestorsClaim", address=originInvestorsClaimAddress, abi=OriginInvestorsClaim.abi, owner=acct)
-
-    global rowNumber, chunksSize
     # dataFile = './scripts/deployment/origin_claim_list_final.csv' if thisNetwork == 'rsk-mainnet' else './#scripts/deployment/origin_claim_test_list_3237.csv'
     #dataFile = './scripts/deployment/origin_claim_list_final.csv'
     dataFile = './scripts/deployment/origin_claim_list_final_11_chunk.csv'
 
-    with open(dataFile, 'r') as file:
-        reader = csv.DictReader(file)
-        rowNumber = 0
-        for row in reader:
-            rowNumber += 1
-            processRow(row)
-            if (rowNumber % chunkSize == 0):
-                appendInvestorsList(claimContract)
-
-        if (rowNumber % chunkSize != 0):
-            appendInvestorsList(claimContract)
-        totalCount = rowNumber
+    # the chunks are sized by gas and journaled, running the script again resumes the distribution
+    engine = DistributionEngine('OriginInvestorsClaim', originInvestorsClaimAddress, dataFile + '.' + thisNetwork + '.journal')
+    totals = {'count': 0, 'satoshi': 0, 'SOV': 0}
+    # the data file can be one chunk of the list, so the totals of the contract are compared by their increase by
+    # this run. A resumed run sent a part of the rows before, its totals can't be compared
+    blockBefore = chain.height if not engine.journal.chunks else None
+    summary = engine.run(readRows(dataFile, totals))
+    claimContract = engine.contract
 
     # fund the contract on the testnet, should be done separately manually by using multisig on mainnet
     if thisNetwork != "rsk-mainnet":
         sov = Contract.from_abi(
             "SOV", address=contracts['SOV'], abi=SOV.abi, owner=acct)
-        if sov.balanceOf(acct) < totalAmountSOV:
-            sov.mint(acct, totalAmountSOV)
-        if sov.balanceOf(claimContract.address) < totalAmountSOV:
-            sov.transfer(claimContract.address, totalAmountSOV)
-
-    totals = f'''
-    totalCount: {totalCount}
-    chunkSize: {chunkSize}
-    chunksProcessed: {chunksProcessed}
-    totalAmountSatoshi: {totalAmountSatoshi}
-    totalAmountSOV: {totalAmountSOV}
-    Verify the numbers and call claimContract.setInvestorsAmountsListInitialized()
+        if sov.balanceOf(acct) < totals['SOV']:
+            sov.mint(acct, totals['SOV'])
+        if sov.balanceOf(claimContract.address) < totals['SOV']:
+            sov.transfer(claimContract.address, totals['SOV'])
+
+    report = f'''
+    totalCount: {totals['count']}
+    chunksProcessed: {summary['chunks']}
+    rowsSentByThisRun: {summary['rows']}
+    gasUsed: {summary['gasUsed']}
+    totalAmountSatoshi: {totals['satoshi']}
+    totalAmountSOV: {totals['SOV']}
     '''
-    print(totals)
+    print(report)
+
+    # every investor of the list is read back from the contract
+    verification = verifyDistribution('OriginInvestorsClaim', originInvestorsClaimAddress, readRows(dataFile, {'count': 0, 'satoshi': 0, 'SOV': 0}),
+                                      dataFile + '.' + thisNetwork + '.mismatches.csv', blockBefore = blockBefore)
+    if printVerification(verification):
+        print("The rows match the contract. Once all chunks of the list are sent, call claimContract.setInvestorsAmountsListInitialized()")
+    else:
+        print("Check the mismatches in " + dataFile + '.' + thisNetwork + ".mismatches.csv before calling setInvestorsAmountsListInitialized()")
     print("deployment cost:")
     print((balanceBefore - acct.balance()) / 10**18)
 
 
-def appendInvestorsList(claimContract):
-    global chunksProcessed, rowNumber, chunksProcessed
-    global appendAddresses, appendAmounts
-    chunksProcessed += 1
-    print(f'appending at row: {rowNumber}, chunk: {chunksProcessed}')
-    claimContract.appendInvestorsAmountsList(
-        appendAddresses, appendAmounts)
-    appendAddresses = []
-    appendAmounts = []
-
-
-def processRow(row):
-    global satoshiAmount
-    global appendAddresses, appendAmounts, totalAmountSatoshi, totalAmountSOV
-    satoshiAmount = int(row['value'])
-    SOVAmount = satoshiAmount * MULTIPLIER / EX_RATE
-    appendAddresses.append(row['web3 address'])
-    appendAmounts.append(SOVAmount)
-    totalAmountSatoshi += satoshiAmount
-    totalAmountSOV += SOVAmount
+def readRows(dataFile, totals):
+    '''
+    streams (address, SOV amount) of the rows and sums up the totals
+    '''
+    # duplicates are kept, the rows are numbered in the journal and the verifier reports them
+    for row in readList(dataFile, ORIGIN_CLAIM.withDuplicates('keep')):
+        SOVAmount = row.satoshi * MULTIPLIER // EX_RATE
+        totals['count'] += 1
+        totals['satoshi'] += row.satoshi
+        totals['SOV'] += SOVAmount
+        yield row.investor, SOVAmount
@@ -1,4 +1,7 @@
 from brownie import *
+import scripts.contractInteraction.config as conf
+from scripts.governance.vesting_index import VestingIndex
+from scripts.contractInteraction.list_reader import readList, VESTING_OWNERS
 
 import time
 import json
@@ -6,45 +9,20 @@ import csv
 import math
 
 def main():
-    thisNetwork = network.show_active()
-
     # == Load config =======================================================================================================================
-    if thisNetwork == "development":
-        acct = accounts[0]
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "testnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "rsk-mainnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/mainnet_contracts.json')
-    else:
-        raise Exception("network not supported")
-
-    # load deployed contracts addresses
-    contracts = json.load(configFile)
-
-    vestingRegistry = Contract.from_abi("VestingRegistry", address=contracts['VestingRegistry'], abi=VestingRegistry.abi, owner=acct)
-    staking = Contract.from_abi("Staking", address=contracts['Staking'], abi=Staking.abi, owner=acct)
+    conf.loadConfig()
 
-    data = parseFile('./scripts/deployment/distribution/vestings-test.csv', 10**16)
+    # the team vestings of VestingRegistry and their stakes, see scripts/governance/vesting_index.py
+    index = VestingIndex()
+    index.update()
 
-    for teamVesting in data:
-        tokenOwner = teamVesting
-        vestingAddress = vestingRegistry.getTeamVesting(tokenOwner)
+    for row in readList('./scripts/deployment/distribution/vestings-test.csv', VESTING_OWNERS.withDuplicates('skip')):
+        tokenOwner = row.owner
+        vestings = index.vestingsOf(tokenOwner, registry = 'VestingRegistry', type = 'TeamVesting')
+        vestingAddress = "0x0000000000000000000000000000000000000000"
         balance = 0
-        if (vestingAddress != "0x0000000000000000000000000000000000000000"):
-            balance = staking.balanceOf(vestingAddress)
+        if vestings:
+            vestingAddress = web3.toChecksumAddress(vestings[0]['vesting'])
+            balance = sum(vestings[0]['stakes'].values())
 
         print(tokenOwner + "," + vestingAddress + "," + str(balance / 10**18))
-
-def parseFile(fileName, multiplier):
-    print(fileName)
-    teamVestingList = []
-    with open(fileName, 'r') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            tokenOwner = row[0].replace(" ", "")
-            teamVestingList.append(tokenOwner)
-
-    return teamVestingList
@@ -0,0 +1,189 @@
+'''
+Resumable bulk distribution engine.
+
+Sends (address, amount) rows to a list method of a distribution contract in chunks:
+    OriginInvestorsClaim.appendInvestorsAmountsList(investors, claimAmounts)
+    TokenSender.transferSOVusingList(receivers, amounts)
+
+The rows are streamed from their source. Every chunk is sized by estimate_gas to fit GAS_BUDGET: the size of
+the next chunk is predicted from the gas per row of the previous one and shrunk until the estimate fits.
+
+Every chunk is written to a journal (one JSON object per line, fsynced) before and after it is sent:
+    {"chunk": 3, "firstRow": 600, "rows": 212, "nonce": 41, "status": "sending"}
+    {"chunk": 3, ..., "txHash": "0x..", "status": "submitted"}
+    {"chunk": 3, ..., "status": "confirmed", "gasUsed": 6012345}
+A new run with the same journal skips the rows of confirmed chunks, waits for submitted ones and resends
+reverted ones. A chunk which was being sent when the run died is only resent if its nonce is still unused;
+otherwise the run stops, because the transaction may have landed without its hash being journaled.
+
+usage:
+    engine = DistributionEngine('TokenSender', conf.contracts['TokenSender'], './distribution.journal')
+    summary = engine.run(rows)      # rows: iterable of (address, amount)
+'''
+
+from brownie import *
+import json
+import os
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+
+# gas_limit of brownie-config
+GAS_LIMIT = 6800000
+# chunks are sized to this share of the gas limit, the estimate depends on the state at the time of the estimate
+GAS_BUDGET = int(GAS_LIMIT * 0.9)
+# gas limit of the transaction = estimate * GAS_BUFFER, capped by GAS_LIMIT
+GAS_BUFFER = 1.2
+FIRST_CHUNK_SIZE = 50
+MAX_CHUNK_SIZE = 1000
+
+# contract name -> list method
+TARGETS = {
+    'OriginInvestorsClaim': 'appendInvestorsAmountsList',
+    'TokenSender': 'transferSOVusingList',
+}
+
+# states of a chunk
+SENDING = 'sending'
+SUBMITTED = 'submitted'
+CONFIRMED = 'confirmed'
+REVERTED = 'reverted'
+
+
+class DistributionJournal:
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        # chunk number -> the latest entry of the chunk
+        self.chunks = {}
+        if os.path.exists(fileName):
+            with open(fileName, 'r') as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.chunks[entry['chunk']] = entry
+
+    def write(self, entry):
+        with open(self.fileName, 'a') as file:
+            file.write(json.dumps(entry) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self.chunks[entry['chunk']] = dict(entry)
+
+    def nextRow(self):
+        # chunks are contiguous, the next chunk starts after the last journaled one
+        return max((entry['firstRow'] + entry['rows'] for entry in self.chunks.values()), default = 0)
+
+
+class DistributionEngine:
+
+    def __init__(self, targetName, targetAddress, journalFile, sender = None):
+        if targetName not in TARGETS:
+            raise Exception("unsupported distribution contract " + targetName + ", supported: " + ', '.join(TARGETS))
+        self.sender = sender or conf.acct
+        abi = {'OriginInvestorsClaim': OriginInvestorsClaim.abi, 'TokenSender': TokenSender.abi}[targetName]
+        self.contract = getContract(targetName, targetAddress, abi)
+        self.method = getattr(self.contract, TARGETS[targetName])
+        self.journal = DistributionJournal(journalFile)
+        self.gasPerRow = None
+
+    def run(self, rows):
+        '''
+        @param rows an iterable of (address, amount), in the same order on every run with the same journal
+        @return a summary with the rows and the amount sent by this run, and the number and the gas used of all
+                confirmed chunks of the journal
+        '''
+        rows = iter(rows)
+        summary = {'rows': 0, 'amount': 0, 'chunks': 0, 'gasUsed': 0}
+        resend = self.recover()
+        # rows of journaled chunks are skipped, reverted chunks are resent with their original rows
+        buffered = []
+        nextRow = self.journal.nextRow()
+        for index, row in enumerate(rows):
+            if index < nextRow:
+                for entry in resend:
+                    if entry['firstRow'] <= index < entry['firstRow'] + entry['rows']:
+                        entry.setdefault('data', []).append(row)
+                continue
+            buffered.append(row)
+            if len(buffered) >= MAX_CHUNK_SIZE:
+                buffered = self.sendRows(buffered, nextRow, summary)
+                nextRow = self.journal.nextRow()
+        for entry in resend:
+            self.sendChunk(entry['chunk'], entry['firstRow'], entry['data'], summary)
+        while buffered:
+            buffered = self.sendRows(buffered, nextRow, summary)
+            nextRow = self.journal.nextRow()
+
+        for entry in self.journal.chunks.values():
+            if entry['status'] == CONFIRMED:
+                summary['chunks'] += 1
+                summary['gasUsed'] += entry.get('gasUsed', 0)
+        return summary
+
+    def recover(self):
+        '''
+        settles the chunks which were not confirmed by the previous run
+        @return the journal entries of the chunks which have to be resent
+        '''
+        resend = []
+        confirmedNonce = self.sender.nonce
+        for entry in sorted(self.journal.chunks.values(), key = lambda entry: entry['chunk']):
+            if entry['status'] == SUBMITTED:
+                self.confirm(entry, web3.eth.waitForTransactionReceipt(entry['txHash'], timeout = 600))
+            elif entry['status'] == SENDING:
+                if entry['nonce'] < confirmedNonce:
+                    raise Exception("chunk " + str(entry['chunk']) + " was being sent with nonce " + str(entry['nonce']) + " which is used now. "
+                                    "Check the transaction of the nonce and write its status to " + self.journal.fileName)
+                resend.append(entry)
+            if self.journal.chunks[entry['chunk']]['status'] == REVERTED:
+                resend.append(entry)
+        return resend
+
+    def sendRows(self, rows, firstRow, summary):
+        '''
+        sends one gas-sized chunk from the start of the rows
+        @return the rows which did not fit into the chunk
+        '''
+        size = min(len(rows), self.predictSize())
+        while True:
+            gas = self.estimate(rows[:size])
+            if gas <= GAS_BUDGET or size == 1:
+                break
+            size = max(1, min(size - 1, int(size * GAS_BUDGET / gas * 0.95)))
+        self.gasPerRow = gas / size
+        chunk = max(self.journal.chunks.keys(), default = -1) + 1
+        self.sendChunk(chunk, firstRow, rows[:size], summary, gas)
+        return rows[size:]
+
+    def predictSize(self):
+        if self.gasPerRow is None:
+            return FIRST_CHUNK_SIZE
+        return max(1, min(MAX_CHUNK_SIZE, int(GAS_BUDGET / self.gasPerRow)))
+
+    def estimate(self, rows):
+        addresses, amounts = zip(*rows)
+        return self.method.estimate_gas(list(addresses), list(amounts), {'from': self.sender})
+
+    def sendChunk(self, chunk, firstRow, rows, summary, gas = None):
+        if gas is None:
+            gas = self.estimate(rows)
+        addresses, amounts = zip(*rows)
+        entry = {'chunk': chunk, 'firstRow': firstRow, 'rows': len(rows), 'nonce': self.sender.nonce, 'status': SENDING}
+        self.journal.write(entry)
+        print("chunk", chunk, "rows", firstRow, "-", firstRow + len(rows) - 1, "estimated gas", gas)
+        tx = self.method(list(addresses), list(amounts), {'from': self.sender, 'nonce': entry['nonce'],
+                                                          'gas_limit': min(int(gas * GAS_BUFFER), GAS_LIMIT), 'required_confs': 0})
+        entry.update(txHash = tx.txid, status = SUBMITTED)
+        self.journal.write(entry)
+        tx.wait(1)
+        self.confirm(entry, web3.eth.getTransactionReceipt(tx.txid))
+        if self.journal.chunks[chunk]['status'] != CONFIRMED:
+            raise Exception("chunk " + str(chunk) + " reverted: " + tx.txid + ", run again to resend it")
+        summary['rows'] += len(rows)
+        summary['amount'] += sum(amounts)
+
+    def confirm(self, entry, receipt):
+        entry = dict(entry, status = CONFIRMED if receipt['status'] == 1 else REVERTED, gasUsed = receipt['gasUsed'])
+        entry.pop('data', None)
+        self.journal.write(entry)
@@ -0,0 +1,122 @@
+'''
+Reconciliation of a bulk distribution (see distribution_engine.py) with its source rows.
+
+Re-reads the result of every row with multicall batches at one block and diffs it against the intended amount:
+    OriginInvestorsClaim: investorsAmountsList(investor) == amount. appendInvestorsAmountsList keeps the first
+                          amount of an investor, so later rows of the same investor are reported as duplicates.
+                          With blockBefore, the increase of totalAmount and investorsQty since blockBefore is
+                          checked against the rows of investors which had no amount at blockBefore. With
+                          completeList, totalAmount and investorsQty are checked against the sums of the rows,
+                          they have to match before setInvestorsAmountsListInitialized is called.
+    TokenSender:          SOV.balanceOf(receiver) - balance at blockBefore == sum of the amounts of the receiver.
+                          Without blockBefore the balance only has to be at least the amount.
+
+The mismatches are written to a CSV report.
+
+usage:
+    result = verifyDistribution('OriginInvestorsClaim', address, rows, './origin_claim_mismatches.csv')
+'''
+
+from brownie import *
+import csv
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+
+
+def verifyDistribution(targetName, targetAddress, rows, reportFile, blockNumber = None, blockBefore = None, completeList = False):
+    '''
+    @param rows an iterable of (address, amount), the source rows of the distribution
+    @param blockNumber the block the distribution is verified at, the latest one by default
+    @param blockBefore a block before the distribution, to compare the differences of the balances (TokenSender)
+           or of the totals (OriginInvestorsClaim)
+    @param completeList OriginInvestorsClaim only: the rows are the whole list, the totals of the contract have to
+           match them
+    @return a dict with the number of rows, the mismatches and the block
+    '''
+    if blockNumber is None:
+        blockNumber = chain.height
+    expected = {}
+    duplicates = []
+    for index, (address, amount) in enumerate(rows):
+        address = address.lower()
+        if address in expected:
+            duplicates.append((index, address, amount))
+            if targetName == 'OriginInvestorsClaim':
+                continue
+            amount += expected[address]
+        expected[address] = amount
+
+    if targetName == 'OriginInvestorsClaim':
+        contract = getContract("OriginInvestorsClaim", targetAddress, OriginInvestorsClaim.abi)
+        batch = MulticallBatch(blockIdentifier = blockNumber, requireSuccess = True)
+        calls = {address: batch.add(contract.investorsAmountsList, address) for address in expected}
+        totalAmount = batch.add(contract.totalAmount)
+        investorsQty = batch.add(contract.investorsQty)
+        batch.execute()
+        actual = {address: call.value for address, call in calls.items()}
+        mismatches = [(address, amount, actual[address]) for address, amount in expected.items() if actual[address] != amount]
+        totals = {}
+        if blockBefore is not None:
+            batch = MulticallBatch(blockIdentifier = blockBefore, requireSuccess = True)
+            before = {address: batch.add(contract.investorsAmountsList, address) for address in expected}
+            totalAmountBefore = batch.add(contract.totalAmount)
+            investorsQtyBefore = batch.add(contract.investorsQty)
+            batch.execute()
+            # only investors without an amount are added to the totals
+            added = [amount for address, amount in expected.items() if before[address].value == 0]
+            totals = {
+                'totalAmount': (sum(added), totalAmount.value - totalAmountBefore.value),
+                'investorsQty': (len(added), investorsQty.value - investorsQtyBefore.value),
+            }
+        elif completeList:
+            totals = {
+                'totalAmount': (sum(expected.values()), totalAmount.value),
+                'investorsQty': (len(expected), investorsQty.value),
+            }
+    elif targetName == 'TokenSender':
+        contract = getContract("TokenSender", targetAddress, TokenSender.abi)
+        token = getContract("SOV", contract.SOV(), SOV.abi)
+        batch = MulticallBatch(blockIdentifier = blockNumber, requireSuccess = True)
+        calls = {address: batch.add(token.balanceOf, address) for address in expected}
+        batch.execute()
+        actual = {address: call.value for address, call in calls.items()}
+        if blockBefore is not None:
+            batch = MulticallBatch(blockIdentifier = blockBefore, requireSuccess = True)
+            before = {address: batch.add(token.balanceOf, address) for address in expected}
+            batch.execute()
+            actual = {address: balance - before[address].value for address, balance in actual.items()}
+            mismatches = [(address, amount, actual[address]) for address, amount in expected.items() if actual[address] != amount]
+            totals = {'amount': (sum(expected.values()), sum(actual.values()))}
+        else:
+            mismatches = [(address, amount, actual[address]) for address, amount in expected.items() if actual[address] < amount]
+            totals = {}
+    else:
+        raise Exception("unsupported distribution contract " + targetName)
+
+    writeReport(reportFile, mismatches, duplicates)
+    return {
+        'block': blockNumber,
+        'rows': len(expected) + len(duplicates),
+        'mismatches': mismatches,
+        'duplicates': duplicates,
+        # name -> (expected, actual)
+        'totals': totals,
+    }
+
+def writeReport(reportFile, mismatches, duplicates):
+    with open(reportFile, 'w', newline = '') as file:
+        writer = csv.writer(file)
+        writer.writerow(['address', 'expected', 'actual', 'difference', 'status'])
+        for address, amount, actual in mismatches:
+            writer.writerow([address, amount, actual, actual - amount, 'mismatch'])
+        for index, address, amount in duplicates:
+            writer.writerow([address, amount, '', '', 'duplicate of an earlier row, row ' + str(index)])
+
+def printVerification(result):
+    print("verified", result['rows'], "rows at block", result['block'])
+    for name, (expected, actual) in result['totals'].items():
+        print(name.ljust(15), "expected", expected, "actual", actual, "" if expected == actual else "MISMATCH")
+    print(len(result['mismatches']), "mismatches,", len(result['duplicates']), "duplicate rows")
+    return not result['mismatches'] and all(expected == actual for expected, actual in result['totals'].values())
@@ -1,4 +1,7 @@
 from brownie import *
+import scripts.contractInteraction.config as conf
+from scripts.deployment.distribution.distribution_engine import DistributionEngine
+from scripts.contractInteraction.list_reader import readList, TEAM_ORIGIN
 
 import time
 import json
@@ -6,68 +9,25 @@ import csv
 import math
 
 def main():
-    thisNetwork = network.show_active()
-
     # == Load config =======================================================================================================================
-    if thisNetwork == "development":
-        acct = accounts[0]
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "testnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "rsk-mainnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/mainnet_contracts.json')
-    else:
-        raise Exception("network not supported")
-
-    # load deployed contracts addresses
-    contracts = json.load(configFile)
-
-    tokenSender = Contract.from_abi("TokenSender", address=contracts['TokenSender'], abi=TokenSender.abi, owner=acct)
+    conf.loadConfig()
+    acct = conf.acct
 
     balanceBefore = acct.balance()
-    totalAmount = 0
 
     # amounts examples: 308.135, 441.555
-    data = parseFile('./scripts/deployment/distribution/team-origin.csv', 10**15)
-    totalAmount += data["totalAmount"]
-    # tokenSender.transferSOVusingList(data["receivers"], data["amounts"])
+    fileName = './scripts/deployment/distribution/team-origin.csv'
+    rows = [(row.receiver, row.amount) for row in readList(fileName, TEAM_ORIGIN)]
+    totalAmount = sum(amount for _, amount in rows)
 
     # 875.39
     print("=======================================")
     print("SOV amount:")
     print(totalAmount / 10**18)
 
+    # the chunks are sized by gas and journaled, running the script again resumes the distribution
+    # engine = DistributionEngine('TokenSender', conf.contracts['TokenSender'], fileName + '.' + network.show_active() + '.journal')
+    # print(engine.run(rows))
+
     print("deployment cost:")
     print((balanceBefore - acct.balance()) / 10**18)
-
-
-def parseFile(fileName, multiplier):
-    print(fileName)
-    totalAmount = 0
-    receivers = []
-    amounts = []
-    with open(fileName, 'r') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            tokenOwner = row[3].replace(" ", "")
-            amount = row[1].replace(",", "").replace(".", "")
-            amount = int(amount) * multiplier
-            totalAmount += amount
-
-            receivers.append(tokenOwner)
-            amounts.append(amount)
-
-            # print("=======================================")
-            # print("'" + tokenOwner + "', ")
-            # print(amount)
-
-    # print(receivers)
-    # print(amounts)
-
-    return {
-               "totalAmount": totalAmount,
-               "receivers": receivers,
-                "amounts": amounts
-            }
@@ -0,0 +1,219 @@
+'''
+Bulk vesting creation planner of VestingRegistry.
+
+All rows are checked against the chain before anything is sent, with multicall batches at one block:
+    - getVesting / getTeamVesting of every owner, then cliff and duration of the existing vestings
+    - the authorization of the sender (owner or admin of the registry) and its SOV balance
+
+Every row is classified:
+    create    no vesting of the type yet: createVesting / createTeamVesting, then the funding
+    topup     a vesting of the type with the same schedule exists (or is created by an earlier row): the funding
+    conflict  a vesting of the type exists with a different schedule, an earlier row of the owner has a
+              different schedule, or the owner is invalid
+    noop      the amount is zero, or with skipFunded the vesting already holds at least the amount staked
+
+The funding is one SOV.approveAndCall(vesting, amount, stakeTokensWithApproval(sender, amount)) per row instead
+of approve + stakeTokens, so it can be estimated and sent without waiting for an approval. A plan with conflicts
+or precheck errors is not executed, so conflicts surface before any SOV moves.
+
+The dry-run plan carries the gas of every transaction. Creations and the funding of existing vestings are
+estimated with batched eth_estimateGas; the funding of vestings which don't exist yet is extrapolated from the
+gas per staking period of the estimated fundings (gasExact = False).
+
+The plan is executed in two pipelined phases (see tx_pipeline.py): all creations, then all fundings.
+
+usage:
+    plan = planVestings(registry, rows)       # rows: (owner, amount, cliff, duration, isTeam), cliff and duration in seconds
+    printPlan(plan)
+    if not plan['conflicts'] and not plan['errors']:
+        executePlan(plan)
+'''
+
+from brownie import *
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.rpc_batch import RPCBatchTransport
+from scripts.contractInteraction.tx_pipeline import TransactionPipeline, CONFIRMED
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+FOUR_WEEKS = 4 * 7 * 24 * 60 * 60
+# the block gas limit of brownie-config
+BLOCK_GAS_LIMIT = 6800000
+
+CREATE = 'create'
+TOPUP = 'topup'
+CONFLICT = 'conflict'
+NOOP = 'noop'
+
+
+def stakingPeriods(cliff, duration):
+    # VestingLogic stakes in FOUR_WEEKS steps from the cliff to the duration
+    return (duration - cliff) // FOUR_WEEKS + 1
+
+def vestingContract(address):
+    return Contract.from_abi("VestingLogic", address = address, abi = VestingLogic.abi)
+
+def fundingCall(SOVtoken, vesting, sender, amount):
+    data = vestingContract(vesting).stakeTokensWithApproval.encode_input(str(sender), amount)
+    return (SOVtoken.approveAndCall, vesting, amount, data)
+
+def planVestings(registry, rows, sender = None, skipFunded = False, blockNumber = None):
+    '''
+    @param registry the VestingRegistry contract
+    @param rows an iterable of (owner, amount, cliff, duration, isTeam), cliff and duration in seconds
+    @param skipFunded rows of existing vestings which hold at least the amount staked are no-ops, to run a
+           partly executed plan again
+    @return the plan: the rows with their action, vesting and gas, the conflicts, the precheck errors and the totals
+    '''
+    sender = sender or conf.acct
+    if blockNumber is None:
+        blockNumber = chain.height
+    staking = getContract("Staking", registry.staking(), Staking.abi)
+    SOVtoken = getContract("SOV", registry.SOV(), SOV.abi)
+    rows = [{'row': index, 'owner': owner, 'amount': amount, 'cliff': cliff, 'duration': duration, 'isTeam': isTeam}
+            for index, (owner, amount, cliff, duration, isTeam) in enumerate(rows)]
+
+    # existing vestings, the authorization and the balance of the sender
+    batch = MulticallBatch(blockIdentifier = blockNumber)
+    owners = sorted(set((row['owner'], row['isTeam']) for row in rows if web3.isAddress(row['owner'])))
+    vestingCalls = {(owner, isTeam): batch.add(registry.getTeamVesting if isTeam else registry.getVesting, owner) for owner, isTeam in owners}
+    registryOwner = batch.add(registry.owner)
+    isAdmin = batch.add(registry.admins, sender)
+    balance = batch.add(SOVtoken.balanceOf, sender)
+    batch.execute()
+    existing = {key: call.value for key, call in vestingCalls.items() if call.success and call.value != ZERO_ADDRESS}
+
+    # schedules and staked amounts of the existing vestings
+    batch = MulticallBatch(blockIdentifier = blockNumber, requireSuccess = True)
+    scheduleCalls = {}
+    for vesting in set(existing.values()):
+        contract = vestingContract(vesting)
+        scheduleCalls[vesting] = (batch.add(contract.cliff), batch.add(contract.duration), batch.add(staking.balanceOf, vesting))
+    batch.execute()
+    schedules = {vesting: tuple(call.value for call in calls) for vesting, calls in scheduleCalls.items()}
+
+    conflicts = []
+    # (owner, isTeam) -> schedule of the vesting, existing or created by an earlier row
+    planned = {key: schedules[vesting][:2] for key, vesting in existing.items()}
+    for row in rows:
+        key = (row['owner'], row['isTeam'])
+        row['vesting'] = existing.get(key)
+        if not web3.isAddress(row['owner']) or row['owner'] == ZERO_ADDRESS:
+            row['action'], row['reason'] = CONFLICT, "invalid owner"
+        elif key in planned and planned[key] != (row['cliff'], row['duration']):
+            row['action'] = CONFLICT
+            row['reason'] = "vesting " + (row['vesting'] or "of an earlier row") + " has cliff " + str(planned[key][0]) + " and duration " + str(planned[key][1])
+        elif row['amount'] == 0:
+            row['action'], row['reason'] = NOOP, "zero amount"
+        elif skipFunded and row['vesting'] and schedules[row['vesting']][2] >= row['amount']:
+            row['action'], row['reason'] = NOOP, "already funded"
+        else:
+            row['action'] = TOPUP if key in planned else CREATE
+            planned[key] = (row['cliff'], row['duration'])
+        if row['action'] == CONFLICT:
+            conflicts.append(row)
+
+    errors = []
+    if registryOwner.value.lower() != str(sender).lower() and not isAdmin.value:
+        errors.append(str(sender) + " is neither owner nor admin of the registry")
+    amount = sum(row['amount'] for row in rows if row['action'] in (CREATE, TOPUP))
+    if balance.value < amount:
+        errors.append("the SOV balance " + str(balance.value) + " of " + str(sender) + " is below the amount " + str(amount))
+
+    # the estimates of an unauthorized or underfunded sender would fail for every row
+    if not errors:
+        errors += estimateGas(registry, SOVtoken, sender, rows)
+    gas = {
+        'create': sum(row.get('createGas', 0) for row in rows if row['action'] == CREATE),
+        'funding': sum(row.get('fundingGas', 0) for row in rows if row['action'] in (CREATE, TOPUP)),
+    }
+    return {
+        'registry': registry,
+        'SOV': SOVtoken,
+        'sender': sender,
+        'block': blockNumber,
+        'rows': rows,
+        'conflicts': conflicts,
+        'errors': errors,
+        'amount': amount,
+        'gas': gas,
+        'aboveBlockGasLimit': [row for row in rows if max(row.get('createGas', 0), row.get('fundingGas', 0)) > BLOCK_GAS_LIMIT],
+    }
+
+def estimateGas(registry, SOVtoken, sender, rows):
+    transport = RPCBatchTransport()
+    creates = [(row, transport.estimateGas(registry.createTeamVesting if row['isTeam'] else registry.createVesting,
+                                           row['owner'], row['amount'], row['cliff'], row['duration'], sender = sender))
+               for row in rows if row['action'] == CREATE]
+    # the funding of an existing vesting doesn't depend on the other rows as long as the balance covers all of them
+    fundings = [(row, transport.estimateGas(*fundingCall(SOVtoken, row['vesting'], sender, row['amount']), sender = sender))
+                for row in rows if row['action'] == TOPUP and row['vesting']]
+    transport.execute()
+    errors = ["row " + str(row['row']) + " of " + row['owner'] + " would fail: " + str(request.error)
+              for row, request in creates + fundings if not request.success]
+    fundings = [(row, request) for row, request in fundings if request.success]
+    for row, request in creates:
+        if request.success:
+            row['createGas'] = request.value
+    for row, request in fundings:
+        row['fundingGas'], row['gasExact'] = request.value, True
+
+    # vestings which don't exist yet: extrapolated from the gas per staking period of the estimated fundings
+    periods = sum(stakingPeriods(row['cliff'], row['duration']) for row, _ in fundings)
+    gasPerPeriod = sum(row['fundingGas'] for row, _ in fundings) / periods if periods else None
+    for row in rows:
+        if row['action'] in (CREATE, TOPUP) and 'fundingGas' not in row:
+            row['fundingGas'] = int(gasPerPeriod * stakingPeriods(row['cliff'], row['duration'])) if gasPerPeriod else 0
+            row['gasExact'] = False
+    return errors
+
+def printPlan(plan):
+    print("vesting plan at block", plan['block'], "for", len(plan['rows']), "rows")
+    for action in (CREATE, TOPUP, NOOP, CONFLICT):
+        rows = [row for row in plan['rows'] if row['action'] == action]
+        print(action.ljust(10), len(rows), "rows,", sum(row['amount'] for row in rows) / 1e18, "SOV")
+    for row in plan['conflicts']:
+        print("CONFLICT row", row['row'], row['owner'], "team" if row['isTeam'] else "", row['reason'])
+    for error in plan['errors']:
+        print("ERROR", error)
+    exact = all(row.get('gasExact', True) for row in plan['rows'])
+    print("gas: create", plan['gas']['create'], "funding", plan['gas']['funding'], "" if exact else "(partly extrapolated)")
+    for row in plan['aboveBlockGasLimit']:
+        print("ABOVE BLOCK GAS LIMIT row", row['row'], row['owner'])
+    print("SOV amount:", plan['amount'] / 1e18)
+
+def executePlan(plan, maxInFlight = None):
+    '''
+    sends the creations, waits for all of them and sends the fundings to the vestings read back from the registry
+    @return the pipelined transactions of the fundings
+    '''
+    if plan['conflicts'] or plan['errors']:
+        raise Exception("the plan has " + str(len(plan['conflicts'])) + " conflicts and " + str(len(plan['errors'])) + " errors")
+    registry, SOVtoken, sender = plan['registry'], plan['SOV'], plan['sender']
+    options = {} if maxInFlight is None else {'maxInFlight': maxInFlight}
+
+    pipeline = TransactionPipeline(sender = sender, **options)
+    for row in plan['rows']:
+        if row['action'] == CREATE:
+            method = registry.createTeamVesting if row['isTeam'] else registry.createVesting
+            pipeline.submit(method, row['owner'], row['amount'], row['cliff'], row['duration'])
+    failed = [tx for tx in pipeline.waitAll() if tx.status != CONFIRMED]
+    if failed:
+        raise Exception(str(len(failed)) + " vesting creations reverted, e.g. " + failed[0].txid + ". No SOV was sent, plan again")
+
+    batch = MulticallBatch(requireSuccess = True)
+    created = {(row['owner'], row['isTeam']): batch.add(registry.getTeamVesting if row['isTeam'] else registry.getVesting, row['owner'])
+               for row in plan['rows'] if row['action'] == CREATE}
+    batch.execute()
+    pipeline = TransactionPipeline(sender = sender, **options)
+    for row in plan['rows']:
+        if row['action'] in (CREATE, TOPUP):
+            row['vesting'] = row['vesting'] or created[(row['owner'], row['isTeam'])].value
+            pipeline.submit(*fundingCall(SOVtoken, row['vesting'], sender, row['amount']))
+    fundings = pipeline.waitAll()
+    for tx in fundings:
+        if tx.status != CONFIRMED:
+            print("funding reverted:", tx.txid, tx.args[:2])
+    return fundings
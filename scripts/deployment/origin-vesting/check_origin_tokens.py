@@ -1,4 +1,7 @@
 from brownie import *
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.rpc_batch import RPCBatchTransport
 
 import time
 import json
@@ -6,57 +9,63 @@ import csv
 import math
 from datetime import date
 
-def main():
-    thisNetwork = network.show_active()
+# number of csv rows read with one round of batched requests
+ROWS_PER_ROUND = 1000
 
+def main():
     # == Load config =======================================================================================================================
-    if thisNetwork == "development":
-        acct = accounts[0]
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "testnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "rsk-mainnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/mainnet_contracts.json')
-    else:
-        raise Exception("network not supported")
-
-    # load deployed contracts addresses
-    contracts = json.load(configFile)
-
-    SOVtoken = Contract.from_abi("SOV", address=contracts['SOV'], abi=SOV.abi, owner=acct)
-    staking = Contract.from_abi("Staking", address=contracts['Staking'], abi=Staking.abi, owner=acct)
-    vestingRegistry = Contract.from_abi("VestingRegistry2", address=contracts['VestingRegistry2'], abi=VestingRegistry2.abi, owner=acct)
-
-    totalBalance = 0
-    totalStaked = 0
-    totalVested = 0
+    conf.loadConfig()
+    contracts = conf.contracts
+
+    SOVtoken = getContract("SOV", contracts['SOV'], SOV.abi)
+    staking = getContract("Staking", contracts['Staking'], Staking.abi)
+    vestingRegistry = getContract("VestingRegistry2", contracts['VestingRegistry2'], VestingRegistry2.abi)
+
+    # all rows are read at the same block
+    transport = RPCBatchTransport(blockIdentifier = chain.height)
+
+    totals = {'balance': 0, 'staked': 0, 'vested': 0}
     # parse data
     print("account,balance,staked,vested(Origin))")
     with open('./scripts/deployment/origin-vesting/origin_claim_list.csv', 'r') as file:
         reader = csv.reader(file)
+        users = []
         for row in reader:
-            user = row[1]
+            users.append(row[1])
+            if len(users) == ROWS_PER_ROUND:
+                checkUsers(transport, SOVtoken, staking, vestingRegistry, users, totals)
+                users = []
+        if users:
+            checkUsers(transport, SOVtoken, staking, vestingRegistry, users, totals)
 
-            balance = SOVtoken.balanceOf(user)
-            totalBalance += balance
+    print("totalBalance: " + str(totals['balance'] / 10**18))
+    print("totalStaked: " + str(totals['staked'] / 10**18))
+    print("totalVested: " + str(totals['vested'] / 10**18))
 
-            stakedTokens = staking.balanceOf(user)
-            totalStaked += stakedTokens
+def checkUsers(transport, SOVtoken, staking, vestingRegistry, users, totals):
+    # first round: everything which only depends on the user address
+    balances = [transport.call(SOVtoken.balanceOf, user) for user in users]
+    staked = [transport.call(staking.balanceOf, user) for user in users]
+    vestings = [transport.call(vestingRegistry.getVesting, user) for user in users]
+    transport.execute()
 
-            vestingAddress = vestingRegistry.getVesting(user)
-            vestedTokens = staking.balanceOf(vestingAddress)
-            totalVested += vestedTokens
+    # second round: vested tokens and the stakes of users with staked tokens
+    vested = [transport.call(staking.balanceOf, vesting.value) for vesting in vestings]
+    stakes = [transport.call(staking.getStakes, user) if stakedTokens.value > 0 else None for user, stakedTokens in zip(users, staked)]
+    transport.execute()
 
-            data = user + "," + str(balance / 10**18) + "," + str(stakedTokens / 10**18) + "," + str(vestedTokens / 10**18)
-            if (stakedTokens > 0):
-                stakes = staking.getStakes(user)
-                ts = stakes[0][0]
-                # data += "," + time.strftime("%Y-%m-%d %H:%M:%S", ts) +  "," + str(stakes[0])
-                data += "," + str(date.fromtimestamp(ts)) +  "," + str(stakes[0])
-            print(data)
+    for i, user in enumerate(users):
+        balance = balances[i].value
+        stakedTokens = staked[i].value
+        vestedTokens = vested[i].value
+        totals['balance'] += balance
+        totals['staked'] += stakedTokens
+        totals['vested'] += vestedTokens
 
-    print("totalBalance: " + str(totalBalance / 10**18))
-    print("totalStaked: " + str(totalStaked / 10**18))
-    print("totalVested: " + str(totalVested / 10**18))
+        data = user + "," + str(balance / 10**18) + "," + str(stakedTokens / 10**18) + "," + str(vestedTokens / 10**18)
+        if (stakedTokens > 0):
+            userStakes = stakes[i].value
+            ts = userStakes[0][0]
+            # data += "," + time.strftime("%Y-%m-%d %H:%M:%S", ts) +  "," + str(stakes[0])
+            data += "," + str(date.fromtimestamp(ts)) +  "," + str(userStakes[0])
+        print(data)
@@ -1,4 +1,6 @@
 from brownie import *
+import scripts.contractInteraction.config as conf
+from scripts.governance.vesting_index import VestingIndex
 
 import time
 import json
@@ -6,26 +8,12 @@ import csv
 import math
 
 def main():
-    thisNetwork = network.show_active()
-
     # == Load config =======================================================================================================================
-    if thisNetwork == "development":
-        acct = accounts[0]
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "testnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "rsk-mainnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/mainnet_contracts.json')
-    else:
-        raise Exception("network not supported")
-
-    # load deployed contracts addresses
-    contracts = json.load(configFile)
+    conf.loadConfig()
 
-    staking = Contract.from_abi("Staking", address=contracts['Staking'], abi=Staking.abi, owner=acct)
-    vestingRegistry = Contract.from_abi("VestingRegistry2", address=contracts['VestingRegistry2'], abi=VestingRegistry2.abi, owner=acct)
+    # the vestings of VestingRegistry2 with their schedules and stakes, see scripts/governance/vesting_index.py
+    index = VestingIndex()
+    index.update()
 
     DAY = 24 * 60 * 60
     TWO_WEEKS = 2 * 7 * DAY
@@ -34,23 +22,22 @@ def main():
         reader = csv.reader(file)
         for row in reader:
             user = row[1]
-            vestingAddress = vestingRegistry.getVesting(user)
-            if (vestingAddress != "0x0000000000000000000000000000000000000000"):
-                vesting = Contract.from_abi("VestingLogic", address=vestingAddress, abi=VestingLogic.abi, owner=acct)
-                startDate = vesting.startDate()
-                cliff = vesting.cliff()
+            vestings = index.vestingsOf(user, registry = 'VestingRegistry2', type = 'Vesting')
+            if vestings:
+                vesting = vestings[0]
+                startDate = vesting['startDate']
+                cliff = vesting['cliff']
                 date = startDate + cliff # VestingLogic.sol#117 - for (uint256 i = startDate + cliff; i <= end; i += FOUR_WEEKS) {
                 # WeightedStaking._adjustDateForOrigin
-                adjustedDate = staking.timestampToLockDate(date)
+                adjustedDate = index.mirror.timestampToLockDate(date)
                 # //origin vesting contracts have different dates
                 # //we need to add 2 weeks to get end of period (by default, it's start)
                 if (date != adjustedDate):
                     date = adjustedDate + TWO_WEEKS
                 #
-                endDate = vesting.endDate()
-                stakes = staking.getStakes(vesting)
-                stakeDates = stakes[0]
+                endDate = vesting['endDate']
+                stakeDates = list(vesting['stakes'].keys())
                 isEndOfInterval = False
                 if (date == endDate and (len(stakeDates) == 0 or date == stakeDates[0])):
                     isEndOfInterval = True
-                print(user + "," + vestingAddress + "," + str(startDate) + "," + str(cliff) + "," + str(endDate) + "," + str(date) + "," + str(isEndOfInterval) + "," + str(stakeDates))
+                print(user + "," + web3.toChecksumAddress(vesting['vesting']) + "," + str(startDate) + "," + str(cliff) + "," + str(endDate) + "," + str(date) + "," + str(isEndOfInterval) + "," + str(stakeDates))
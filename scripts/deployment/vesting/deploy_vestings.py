@@ -5,6 +5,9 @@ import json
 import csv
 import math
 
+from scripts.contractInteraction.tx_pipeline import TransactionPipeline
+from scripts.contractInteraction.list_reader import readList, BTC_RETURNED
+
 def main():
     thisNetwork = network.show_active()
 
@@ -54,25 +57,15 @@ def main():
         vestingCreator = Contract.from_abi("OrigingVestingCreator", address=contracts['OrigingVestingCreator'], abi=OrigingVestingCreator.abi, owner=acct)
 
     # == Vesting contracts =================================================================================================================
-    btcAmount = 0
+    satoshiAmount = 0
     vestingList = []
-    with open('./scripts/deployment/vesting/BTC to be returned(PA).csv', 'r') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            # tokenOwner = row[1].replace(" ", "")
-            tokenOwner = row[1]
-            amount = int(int(float(row[2]) * 10**8 * 10**18) / TOKEN_PRICE)
-            btcAmount += float(row[2])
-            vestingList.append([tokenOwner, amount])
-
-    with open('./scripts/deployment/vesting/BTC to be returned(R&U).csv', 'r') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            # tokenOwner = row[1].replace(" ", "")
-            tokenOwner = row[1]
-            amount = int(int(float(row[2]) * 10**8 * 10**18) / TOKEN_PRICE)
-            btcAmount += float(row[2])
-            vestingList.append([tokenOwner, amount])
+    for fileName in ['./scripts/deployment/vesting/BTC to be returned(PA).csv', './scripts/deployment/vesting/BTC to be returned(R&U).csv']:
+        for row in readList(fileName, BTC_RETURNED):
+            # exact: satoshi * 10**18 / TOKEN_PRICE
+            amount = row.satoshi * 10**18 // TOKEN_PRICE
+            satoshiAmount += row.satoshi
+            vestingList.append([row.owner, amount])
+    btcAmount = satoshiAmount / 10**8
 
     print("vestingList:")
     print(vestingList)
@@ -91,6 +84,8 @@ def main():
     print("Vesting Amount:", vestingAmount)
     print("BTC Amount:", btcAmount)
 
+    # the vestings are queued with consecutive nonces instead of waiting for every receipt
+    pipeline = TransactionPipeline(sender = acct)
     for vesting in vestingList:
         tokenOwner = vesting[0]
         amount = vesting[1]
@@ -101,7 +96,11 @@ def main():
         print(duration)
         print((duration - cliff) / FOUR_WEEKS + 1)
 
-        vestingCreator.createVesting(tokenOwner, amount, cliff, duration)
+        pipeline.submit(vestingCreator.createVesting, tokenOwner, amount, cliff, duration)
+
+    for tx in pipeline.waitAll():
+        if tx.status != 'confirmed':
+            print("createVesting reverted:", tx.txid, tx.args)
 
     print("deployment cost:")
     print((balanceBefore - acct.balance()) / 10**18)
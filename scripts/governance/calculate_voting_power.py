@@ -3,6 +3,7 @@ from brownie.network.contract import InterfaceContainer
 import json
 import time;
 import copy
+from scripts.governance.voting_power import computeWeightByDate
 
 def main():
     
@@ -24,9 +25,8 @@ def loadConfig():
 
 def calculateVotingPower(sovAmount, stakeTime):
 
-    staking = Contract.from_abi("Staking", address=contracts['Staking'], abi=Staking.abi, owner=acct)
-    
-    weight = staking.computeWeightByDate(stakeTime, 0)
+    # same integer math as Staking.computeWeightByDate, without the call
+    weight = int(computeWeightByDate([int(stakeTime)], 0)[0])
     votingPower = int(sovAmount) * weight
 
     print('======================================')
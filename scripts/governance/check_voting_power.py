@@ -0,0 +1,104 @@
+'''
+Differential check of the offline voting power engine (voting_power.py) against the views of the Staking
+contract on a local chain.
+
+Deploys SOV, Staking and FeeSharingProxy, stakes, delegates, extends and withdraws (also early, with penalty)
+with random values from the test accounts, then compares at several blocks:
+    computeWeightByDate, weightedStakeByDate, getPriorWeightedStake, getPriorVotes, getPriorTotalVotingPower
+
+run with:
+    brownie run scripts/governance/check_voting_power.py
+'''
+
+from brownie import *
+import random
+
+from scripts.contractInteraction.event_ingestion import EventIngestion
+from scripts.staking.staking_checkpoints import StakingCheckpoints, TWO_WEEKS
+from scripts.governance.voting_power import VotingPowerEngine, computeWeightByDate
+
+ACTIONS = 60
+SEED = 1
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+def main():
+    if network.show_active() != "development":
+        raise Exception("the check deploys its own contracts, run it on the development network")
+    random.seed(SEED)
+    acct = accounts[0]
+    stakers = accounts[1:6]
+
+    SOVtoken = acct.deploy(SOV, 10**26)
+    stakingLogic = acct.deploy(Staking)
+    staking = acct.deploy(StakingProxy, SOVtoken.address)
+    staking.setImplementation(stakingLogic.address)
+    staking = Contract.from_abi("Staking", address=staking.address, abi=Staking.abi, owner=acct)
+    # the protocol is not used by transferTokens, which is the only function called by Staking
+    feeSharing = acct.deploy(FeeSharingProxy, acct, staking.address)
+    staking.setFeeSharing(feeSharing.address)
+    kickoffTS = staking.kickoffTS()
+
+    for staker in stakers:
+        SOVtoken.transfer(staker, 10**24)
+        SOVtoken.approve(staking.address, 10**24, {'from': staker})
+
+    checkpoints = [chain.height]
+    for i in range(ACTIONS):
+        randomAction(staking, stakers, kickoffTS)
+        if i % 10 == 9:
+            chain.sleep(random.randint(1, 6) * 7 * 24 * 60 * 60)
+            chain.mine()
+            checkpoints.append(chain.height)
+    chain.mine()
+
+    mirror = StakingCheckpoints(stakingAddress = staking.address, feeSharingAddress = feeSharing.address,
+                                startBlock = checkpoints[0], engine = EventIngestion(':memory:'))
+    engine = VotingPowerEngine(mirror)
+    engine.update(chain.height - 1)
+
+    mismatches = 0
+    for blockNumber in checkpoints[1:]:
+        timestamp = chain[blockNumber].timestamp
+        start = mirror.timestampToLockDate(timestamp)
+        dates = [start + i * TWO_WEEKS for i in range(79)]
+        weights = computeWeightByDate(dates, start)
+        mismatches += compare("computeWeightByDate", [staking.computeWeightByDate(date, start) for date in dates], list(weights))
+
+        votes = engine.getPriorVotes(blockNumber, timestamp)
+        weighted = engine.getPriorWeightedStake(blockNumber, timestamp)
+        byDate = engine.weightedStakeByDate(blockNumber, dates[3], start)
+        for staker in stakers:
+            account = staker.address.lower()
+            mismatches += compare("getPriorVotes " + account, staking.getPriorVotes(staker, blockNumber, timestamp), votes.get(account, 0))
+            mismatches += compare("getPriorWeightedStake " + account, staking.getPriorWeightedStake(staker, blockNumber, timestamp), weighted.get(account, 0))
+            mismatches += compare("weightedStakeByDate " + account, staking.weightedStakeByDate(staker, dates[3], start, blockNumber), byDate.get(account, 0))
+        mismatches += compare("getPriorTotalVotingPower", staking.getPriorTotalVotingPower(blockNumber, timestamp), engine.getPriorTotalVotingPower(blockNumber, timestamp))
+        print("block", blockNumber, "checked")
+
+    if mismatches:
+        raise Exception(str(mismatches) + " mismatches")
+    print("the offline engine matches the contract at", len(checkpoints) - 1, "blocks")
+
+def randomAction(staking, stakers, kickoffTS):
+    staker = random.choice(stakers)
+    now = chain.time()
+    dates, stakes = staking.getStakes(staker)
+    action = random.random()
+    if action < 0.5 or len(dates) == 0:
+        until = now + random.randint(3, 78) * TWO_WEEKS
+        delegatee = random.choice(stakers + [ZERO_ADDRESS])
+        staking.stake(random.randint(1, 10**22), until, staker, delegatee, {'from': staker})
+    elif action < 0.65:
+        staking.delegate(random.choice(stakers), random.choice(dates), {'from': staker})
+    elif action < 0.8:
+        index = random.randrange(len(dates))
+        staking.extendStakingDuration(dates[index], dates[index] + random.randint(1, 4) * TWO_WEEKS, {'from': staker})
+    else:
+        index = random.randrange(len(dates))
+        staking.withdraw(random.randint(1, stakes[index]), dates[index], staker, {'from': staker})
+
+def compare(name, onChain, offline):
+    if onChain != offline:
+        print("mismatch", name, "contract:", onChain, "engine:", offline)
+        return 1
+    return 0
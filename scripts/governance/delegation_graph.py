@@ -0,0 +1,125 @@
+'''
+Delegation graph of the Staking contract.
+
+Staking delegates per lock date, so the delegation of an account is spread over (delegator, lock date) keys,
+e.g. VestingLogic.delegate delegates every FOUR_WEEKS lock date of a vesting contract. The graph is rebuilt
+from the events of the Staking contract:
+    - DelegateChanged sets the delegatee of a (delegator, lock date)
+    - ExtendedStakingDuration moves the delegatee to the new lock date, unless it already has one (like
+      Staking.extendStakingDuration, which does not emit DelegateChanged)
+The delegated stakes are the current user stakes of the local mirror of the staking checkpoints (see
+scripts/staking/staking_checkpoints.py), weighted like WeightedStaking.computeWeightByDate.
+
+usage:
+    graph = DelegationGraph()
+    graph.update()
+    graph.topDelegatees(20)
+    graph.delegatorsOf(delegatee)
+'''
+
+from brownie import *
+import calendar
+import time
+
+from scripts.contractInteraction.event_ingestion import EventStream
+from scripts.governance.voting_power import VotingPowerEngine, computeWeightByDate, WEIGHT_FACTOR
+
+DELEGATION_EVENTS = ['DelegateChanged', 'ExtendedStakingDuration']
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class DelegationGraph:
+
+    def __init__(self, votingPowerEngine = None, startBlock = 0):
+        self.votingPowerEngine = votingPowerEngine or VotingPowerEngine()
+        self.mirror = self.votingPowerEngine.mirror
+        self.stream = EventStream('delegationGraph', [self.mirror.staking.address], Staking.abi, DELEGATION_EVENTS, startBlock)
+        # (delegator, lock date) -> delegatee
+        self.delegates = {}
+        # delegatee -> set of (delegator, lock date)
+        self.delegators = {}
+        self.lastBlock = -1
+
+    def update(self, toBlock = None):
+        toBlock = self.votingPowerEngine.update(toBlock)
+        self.mirror.engine.ingest(self.stream, toBlock)
+        for event in self.mirror.engine.events(self.stream.name, fromBlock = self.lastBlock + 1, toBlock = toBlock):
+            args = event['args']
+            if event['event'] == 'DelegateChanged':
+                self.setDelegate(args['delegator'], args['lockedUntil'], args['toDelegate'])
+            else:
+                previous = self.delegates.get((args['staker'], args['previousDate']), ZERO_ADDRESS)
+                if self.delegates.get((args['staker'], args['newDate']), ZERO_ADDRESS) == ZERO_ADDRESS:
+                    self.setDelegate(args['staker'], args['newDate'], previous)
+                self.setDelegate(args['staker'], args['previousDate'], ZERO_ADDRESS)
+        self.lastBlock = toBlock
+        return toBlock
+
+    def setDelegate(self, delegator, lockDate, delegatee):
+        key = (delegator, lockDate)
+        previous = self.delegates.pop(key, None)
+        if previous is not None:
+            self.delegators[previous].discard(key)
+        if delegatee != ZERO_ADDRESS:
+            self.delegates[key] = delegatee
+            self.delegators.setdefault(delegatee, set()).add(key)
+
+    def weights(self, timestamp):
+        '''
+        @return the weight of every lock date which counts for the voting power at the timestamp
+        '''
+        start, dates = self.votingPowerEngine.lockDates(timestamp)
+        return dict(zip(dates.tolist(), computeWeightByDate(dates, start).tolist()))
+
+    def delegatorsOf(self, delegatee, timestamp = None):
+        '''
+        @return the delegations to the delegatee: dicts with delegator, lockDate, stake and power (the weighted
+                stake), most power first. Expired lock dates are left out
+        '''
+        if timestamp is None:
+            timestamp = calendar.timegm(time.gmtime())
+        weights = self.weights(timestamp)
+        delegations = []
+        for delegator, lockDate in self.delegators.get(delegatee.lower(), ()):
+            stake = self.mirror.currentBalance(delegator, lockDate)
+            if lockDate in weights and stake > 0:
+                delegations.append({
+                    'delegator': delegator,
+                    'lockDate': lockDate,
+                    'stake': stake,
+                    'power': stake * weights[lockDate] // WEIGHT_FACTOR,
+                })
+        return sorted(delegations, key = lambda delegation: -delegation['power'])
+
+    def delegatedPower(self, timestamp = None):
+        '''
+        @return delegatee -> {'own': power of the own stakes, 'delegated': power delegated by other accounts,
+                'delegators': number of other delegating accounts}
+        '''
+        if timestamp is None:
+            timestamp = calendar.timegm(time.gmtime())
+        weights = self.weights(timestamp)
+        power = {}
+        for (delegator, lockDate), delegatee in self.delegates.items():
+            if lockDate not in weights:
+                continue
+            stake = self.mirror.currentBalance(delegator, lockDate)
+            if stake == 0:
+                continue
+            entry = power.setdefault(delegatee, {'own': 0, 'delegated': 0, 'delegators': set()})
+            if delegator == delegatee:
+                entry['own'] += stake * weights[lockDate] // WEIGHT_FACTOR
+            else:
+                entry['delegated'] += stake * weights[lockDate] // WEIGHT_FACTOR
+                entry['delegators'].add(delegator)
+        for entry in power.values():
+            entry['delegators'] = len(entry['delegators'])
+        return power
+
+    def topDelegatees(self, n = 20, timestamp = None):
+        '''
+        @return the n delegatees with the highest voting power: (delegatee, own + delegated power, details)
+        '''
+        power = self.delegatedPower(timestamp)
+        ranking = sorted(power.items(), key = lambda item: -(item[1]['own'] + item[1]['delegated']))
+        return [(delegatee, entry['own'] + entry['delegated'], entry) for delegatee, entry in ranking[:n]]
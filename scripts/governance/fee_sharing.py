@@ -0,0 +1,203 @@
+'''
+Offline engine of the fees claimable from the FeeSharingProxy.
+
+FeeSharingProxy._getAccumulatedFees walks the token checkpoints of a loan pool token and pays the share
+    numTokens * getPriorWeightedStake(user, checkpoint.blockNumber - 1, checkpoint.timestamp) / totalWeightedStake
+of every checkpoint which was not processed by the user yet. Inside one call the weighted stake of the first
+checkpoint of a lock date is reused for the following checkpoints of the same lock date, so the result of a
+withdraw depends on where its range of _maxCheckpoints starts.
+
+The engine reads the token checkpoints and the processed checkpoints of all stakers with multicall batches,
+then computes the weighted stakes of all stakers at once with the voting power engine (see voting_power.py),
+once per lock date and range start instead of once per user and checkpoint. Vesting contracts are stakers, so
+the fees of VestingLogic.collectDividends are covered as well.
+
+usage:
+    fees = FeeSharingEngine()
+    fees.update()
+    fees.claimable(loanPoolToken)                         # account -> FeeSharingProxy.getAccumulatedFees
+    fees.withdrawPlan(loanPoolToken, maxCheckpoints = 10) # account -> amounts of the withdraw calls needed
+
+    brownie run scripts/governance/fee_sharing.py --network rsk-mainnet
+'''
+
+from brownie import *
+import numpy as np
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.event_ingestion import EventStream
+from scripts.staking.staking_checkpoints import TWO_WEEKS
+from scripts.governance.voting_power import VotingPowerEngine
+
+# FeeSharingProxy.MAX_CHECKPOINTS, the upper bound of _maxCheckpoints
+MAX_CHECKPOINTS = 100
+
+
+class TokenCheckpoints:
+    '''
+    the checkpoints of one loan pool token, as arrays
+    '''
+
+    def __init__(self):
+        self.blockNumber = np.zeros(0, dtype = np.int64)
+        self.timestamp = np.zeros(0, dtype = np.int64)
+        self.totalWeightedStake = np.zeros(0, dtype = object)
+        self.numTokens = np.zeros(0, dtype = object)
+
+    def __len__(self):
+        return len(self.blockNumber)
+
+    def append(self, checkpoints):
+        # (blockNumber, timestamp, totalWeightedStake, numTokens) like FeeSharingProxy.tokenCheckpoints
+        if not checkpoints:
+            return
+        blockNumber, timestamp, totalWeightedStake, numTokens = zip(*checkpoints)
+        self.blockNumber = np.concatenate([self.blockNumber, np.array(blockNumber, dtype = np.int64)])
+        self.timestamp = np.concatenate([self.timestamp, np.array(timestamp, dtype = np.int64)])
+        self.totalWeightedStake = np.concatenate([self.totalWeightedStake, np.array(totalWeightedStake, dtype = object)])
+        self.numTokens = np.concatenate([self.numTokens, np.array(numTokens, dtype = object)])
+
+
+class FeeSharingEngine:
+
+    def __init__(self, votingPowerEngine = None, feeSharingAddress = None, startBlock = 0):
+        self.votingPowerEngine = votingPowerEngine or VotingPowerEngine()
+        self.mirror = self.votingPowerEngine.mirror
+        self.feeSharing = getContract("FeeSharingProxy", feeSharingAddress or conf.contracts['FeeSharingProxy'], FeeSharingProxy.abi)
+        self.stream = EventStream('feeSharingCheckpoints', [self.feeSharing.address], FeeSharingProxy.abi, ['CheckpointAdded'], startBlock)
+        # loan pool token -> TokenCheckpoints
+        self.checkpoints = {}
+        # loan pool token -> account -> FeeSharingProxy.processedCheckpoints
+        self.processed = {}
+        self.blockNumber = None
+
+    def update(self, toBlock = None):
+        '''
+        mirrors the staking checkpoints and reads the new token checkpoints and the processed checkpoints of all
+        stakers at the block the mirror is at
+        '''
+        self.blockNumber = self.votingPowerEngine.update(toBlock)
+        self.mirror.engine.ingest(self.stream, self.blockNumber)
+        tokens = set(event['args']['token'] for event in self.mirror.engine.events(self.stream.name, toBlock = self.blockNumber))
+        for token in tokens:
+            self.checkpoints.setdefault(token, TokenCheckpoints())
+
+        batch = MulticallBatch(blockIdentifier = self.blockNumber, requireSuccess = True)
+        counts = {token: batch.add(self.feeSharing.numTokenCheckpoints, token) for token in self.checkpoints}
+        batch.execute()
+        batch = MulticallBatch(blockIdentifier = self.blockNumber, requireSuccess = True)
+        newCheckpoints = {token: [batch.add(self.feeSharing.tokenCheckpoints, token, i) for i in range(len(self.checkpoints[token]), count.value)]
+                          for token, count in counts.items()}
+        accounts = self.votingPowerEngine.userSeries.accounts
+        processed = {token: [batch.add(self.feeSharing.processedCheckpoints, account, token) for account in accounts] for token in self.checkpoints}
+        batch.execute()
+
+        for token, calls in newCheckpoints.items():
+            self.checkpoints[token].append([tuple(call.value) for call in calls])
+        self.processed = {token: dict(zip(accounts, (call.value for call in calls))) for token, calls in processed.items()}
+        return self.blockNumber
+
+    def weightedStakes(self, token, indexes):
+        '''
+        @return checkpoint index -> array of getPriorWeightedStake(user, blockNumber - 1, timestamp) of all stakers
+        '''
+        checkpoints = self.checkpoints[token]
+        stakes = {}
+        for index in indexes:
+            weighted = self.votingPowerEngine.getPriorWeightedStake(int(checkpoints.blockNumber[index]) - 1, int(checkpoints.timestamp[index]))
+            stakes[index] = np.array(list(weighted.values()), dtype = object)
+        return stakes
+
+    def accumulate(self, token, ranges):
+        '''
+        computes _getAccumulatedFees for ranges of checkpoints
+        @param ranges (start, end) -> indexes of the stakers processing the checkpoints start..end - 1 in one call
+        @return (start, end) -> array of the amounts of these stakers
+        '''
+        checkpoints = self.checkpoints[token]
+        lockDates = (checkpoints.timestamp - self.mirror.kickoffTS) // TWO_WEEKS * TWO_WEEKS + self.mirror.kickoffTS
+        # the first checkpoint of every run of checkpoints with the same lock date
+        runStart = np.maximum.accumulate(np.where(np.concatenate([[True], lockDates[1:] != lockDates[:-1]]), np.arange(len(checkpoints)), 0))
+        # the weighted stake is cached from the first checkpoint of the lock date inside of the range
+        sources = {(start, end): np.maximum(runStart[start:end], start) for start, end in ranges}
+        needed = set()
+        for source in sources.values():
+            needed.update(source.tolist())
+        stakes = self.weightedStakes(token, sorted(needed))
+
+        amounts = {}
+        for (start, end), users in ranges.items():
+            if start >= end:
+                amounts[(start, end)] = np.zeros(len(users), dtype = object)
+                continue
+            if np.any(checkpoints.totalWeightedStake[start:end] == 0):
+                raise Exception("FeeSharingProxy: a checkpoint of " + token + " has no weighted stake, the call reverts with a division by zero")
+            weighted = np.stack([stakes[index][users] for index in sources[(start, end)].tolist()])
+            shares = weighted * checkpoints.numTokens[start:end, None] // checkpoints.totalWeightedStake[start:end, None]
+            amounts[(start, end)] = shares.sum(axis = 0)
+        return amounts
+
+    def claimable(self, token, accounts = None):
+        '''
+        @return account -> FeeSharingProxy.getAccumulatedFees(account, token), without zero amounts
+        '''
+        plan = self.withdrawPlan(token, 0, accounts)
+        return {account: calls[0] for account, calls in plan.items() if calls and calls[0] > 0}
+
+    def withdrawPlan(self, token, maxCheckpoints, accounts = None):
+        '''
+        @param maxCheckpoints the _maxCheckpoints of the withdraw calls, 0 for a single call over all checkpoints
+               like getAccumulatedFees
+        @return account -> the amounts of the withdraw calls needed to process all checkpoints, in order. Accounts
+                without unprocessed checkpoints are left out
+        '''
+        allAccounts = self.votingPowerEngine.userSeries.accounts
+        position = {account: i for i, account in enumerate(allAccounts)}
+        accounts = allAccounts if accounts is None else [account.lower() for account in accounts if account.lower() in position]
+        count = len(self.checkpoints.get(token, ()))
+        if count == 0:
+            return {}
+        step = min(maxCheckpoints, MAX_CHECKPOINTS) if maxCheckpoints > 0 else count
+
+        ranges = {}
+        calls = {}
+        for account in accounts:
+            start = self.processed[token][account]
+            calls[account] = [(i, min(i + step, count)) for i in range(start, count, step)]
+            for callRange in calls[account]:
+                ranges.setdefault(callRange, []).append(position[account])
+        amounts = self.accumulate(token, {callRange: np.array(users, dtype = np.int64) for callRange, users in ranges.items()})
+
+        # the amounts are in the order of the users of each range
+        offsets = {callRange: dict(zip(users, range(len(users)))) for callRange, users in ranges.items()}
+        return {account: [amounts[callRange][offsets[callRange][position[account]]] for callRange in callRanges]
+                for account, callRanges in calls.items() if callRanges}
+
+    def withdrawCalls(self, maxCheckpoints):
+        '''
+        @return account -> token -> the number of withdraw calls with maxCheckpoints needed to process all checkpoints
+        '''
+        if maxCheckpoints < 1:
+            raise Exception("maxCheckpoints must be at least 1, got " + str(maxCheckpoints))
+        step = min(maxCheckpoints, MAX_CHECKPOINTS)
+        calls = {}
+        for token, checkpoints in self.checkpoints.items():
+            for account, start in self.processed[token].items():
+                if start < len(checkpoints):
+                    calls.setdefault(account, {})[token] = -(-(len(checkpoints) - start) // step)
+        return calls
+
+
+def main():
+    conf.loadConfig()
+    fees = FeeSharingEngine()
+    blockNumber = fees.update()
+    print("fees claimable at block", blockNumber)
+    for token in fees.checkpoints:
+        claimable = fees.claimable(token)
+        calls = fees.withdrawCalls(MAX_CHECKPOINTS)
+        print(token, len(fees.checkpoints[token]), "checkpoints", len(claimable), "accounts with fees, total", sum(claimable.values()))
+        for account, amount in sorted(claimable.items(), key = lambda entry: -entry[1])[:20]:
+            print('   ', account, amount, calls[account][token], "withdraw calls")
@@ -0,0 +1,262 @@
+'''
+Local index of the proposals and votes of GovernorOwner and GovernorAdmin.
+
+ProposalCreated, VoteCast, ProposalQueued, ProposalExecuted and ProposalCanceled are ingested with the event
+ingestion engine (see scripts/contractInteraction/event_ingestion.py). The index tables live in the database
+of the engine and are written in the same transaction as the stream cursor, so a restart never applies an
+event twice.
+
+Per proposal the index keeps the actions (with the calldata decoded by the function signature), the running
+for / against totals, the quorum of the proposal and the status, computed like GovernorAlpha.state.
+
+usage:
+    index = ProposalIndex()
+    index.update()
+    index.openProposals()
+    index.nonVoters('GovernorOwner', proposalId)     # delegatees with voting power which did not vote
+
+    brownie run scripts/governance/proposal_index.py --network rsk-mainnet
+'''
+
+from brownie import *
+from eth_abi import decode_abi
+from hexbytes import HexBytes
+import json
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.event_ingestion import EventIngestion, EventStream, CONFIRMATIONS, jsonValue
+from scripts.governance.voting_power import VotingPowerEngine
+
+GOVERNORS = ['GovernorOwner', 'GovernorAdmin']
+GOVERNOR_EVENTS = ['ProposalCreated', 'VoteCast', 'ProposalQueued', 'ProposalExecuted', 'ProposalCanceled']
+# Timelock.GRACE_PERIOD
+GRACE_PERIOD = 14 * 24 * 60 * 60
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS proposals (
+    governor TEXT,
+    id INTEGER,
+    proposer TEXT,
+    description TEXT,
+    startBlock INTEGER,
+    endBlock INTEGER,
+    startTime INTEGER,
+    quorum TEXT,
+    forVotes TEXT,
+    againstVotes TEXT,
+    voters INTEGER,
+    eta INTEGER,
+    canceled INTEGER,
+    executed INTEGER,
+    createdBlock INTEGER,
+    PRIMARY KEY (governor, id)
+);
+CREATE TABLE IF NOT EXISTS proposalActions (
+    governor TEXT,
+    proposalId INTEGER,
+    position INTEGER,
+    target TEXT,
+    value TEXT,
+    signature TEXT,
+    calldata TEXT,
+    args TEXT,
+    PRIMARY KEY (governor, proposalId, position)
+);
+CREATE TABLE IF NOT EXISTS votes (
+    governor TEXT,
+    proposalId INTEGER,
+    voter TEXT,
+    support INTEGER,
+    votes TEXT,
+    blockNumber INTEGER,
+    PRIMARY KEY (governor, proposalId, voter)
+);
+'''
+
+
+class ProposalIndex:
+
+    def __init__(self, engine = None, startBlock = 0):
+        self.engine = engine or EventIngestion()
+        self.db = self.engine.db
+        self.db.executescript(SCHEMA)
+        self.governors = {}
+        self.streams = []
+        for name in GOVERNORS:
+            if name in conf.contracts:
+                self.governors[name] = getContract("GovernorAlpha", conf.contracts[name], GovernorAlpha.abi)
+                self.streams.append(EventStream(name, [conf.contracts[name]], GovernorAlpha.abi, GOVERNOR_EVENTS, startBlock))
+        self.majorityPercentageVotes = {}
+
+    # -- indexing ---------------------------------------------------------------------------------------------------
+
+    def update(self, toBlock = None):
+        if toBlock is None:
+            toBlock = chain.height - CONFIRMATIONS
+        for stream in self.streams:
+            self.engine.ingest(stream, toBlock, self.applyEvents)
+        self.readProposalParameters()
+        return toBlock
+
+    def applyEvents(self, stream, events):
+        governor = stream.name
+        for event in events:
+            args = event['args']
+            name = event['event']
+            if name == 'ProposalCreated':
+                self.storeProposal(governor, args, event['blockNumber'])
+            elif name == 'VoteCast':
+                self.storeVote(governor, args, event['blockNumber'])
+            elif name == 'ProposalQueued':
+                self.db.execute("UPDATE proposals SET eta = ? WHERE governor = ? AND id = ?", (args['eta'], governor, args['id']))
+            elif name == 'ProposalExecuted':
+                self.db.execute("UPDATE proposals SET executed = 1 WHERE governor = ? AND id = ?", (governor, args['id']))
+            elif name == 'ProposalCanceled':
+                self.db.execute("UPDATE proposals SET canceled = 1 WHERE governor = ? AND id = ?", (governor, args['id']))
+
+    def storeProposal(self, governor, args, blockNumber):
+        self.db.execute(
+            "INSERT OR REPLACE INTO proposals (governor, id, proposer, description, startBlock, endBlock, forVotes, againstVotes, voters, eta, canceled, executed, createdBlock) "
+            "VALUES (?, ?, ?, ?, ?, ?, '0', '0', 0, 0, 0, 0, ?)",
+            (governor, args['id'], args['proposer'], args['description'], args['startBlock'], args['endBlock'], blockNumber)
+        )
+        actions = zip(args['targets'], args['values'], args['signatures'], args['calldatas'])
+        for position, (target, value, signature, calldata) in enumerate(actions):
+            self.db.execute(
+                "INSERT OR REPLACE INTO proposalActions (governor, proposalId, position, target, value, signature, calldata, args) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (governor, args['id'], position, target, str(value), signature, calldata, json.dumps(decodeCalldata(signature, calldata)))
+            )
+
+    def storeVote(self, governor, args, blockNumber):
+        self.db.execute(
+            "INSERT OR REPLACE INTO votes (governor, proposalId, voter, support, votes, blockNumber) VALUES (?, ?, ?, ?, ?, ?)",
+            (governor, args['proposalId'], args['voter'], int(args['support']), str(args['votes']), blockNumber)
+        )
+        row = self.db.execute("SELECT forVotes, againstVotes, voters FROM proposals WHERE governor = ? AND id = ?", (governor, args['proposalId'])).fetchone()
+        column = 'forVotes' if args['support'] else 'againstVotes'
+        self.db.execute(
+            "UPDATE proposals SET " + column + " = ?, voters = ? WHERE governor = ? AND id = ?",
+            (str(int(row[column]) + args['votes']), row['voters'] + 1, governor, args['proposalId'])
+        )
+
+    def readProposalParameters(self):
+        '''
+        reads the quorum and the start time of new proposals, which are not part of ProposalCreated
+        '''
+        rows = self.db.execute("SELECT governor, id FROM proposals WHERE quorum IS NULL").fetchall()
+        batch = MulticallBatch()
+        proposalCalls = [(row['governor'], row['id'], batch.add(self.governors[row['governor']].proposals, row['id'])) for row in rows]
+        majorityCalls = {name: batch.add(governor.majorityPercentageVotes) for name, governor in self.governors.items()}
+        batch.execute()
+        for governor, proposalId, call in proposalCalls:
+            # id, startBlock, endBlock, forVotes, againstVotes, quorum, majorityPercentage, eta, startTime, canceled, executed, proposer
+            self.db.execute("UPDATE proposals SET quorum = ?, startTime = ? WHERE governor = ? AND id = ?",
+                            (str(call.value[5]), call.value[8], governor, proposalId))
+        self.db.commit()
+        self.majorityPercentageVotes = {name: call.value for name, call in majorityCalls.items()}
+
+    # -- queries ----------------------------------------------------------------------------------------------------
+
+    def proposals(self, governor = None, blockNumber = None, timestamp = None):
+        '''
+        @return the proposals with their tally and their status at the block, the latest block by default
+        '''
+        if blockNumber is None:
+            blockNumber = chain.height
+            timestamp = chain[blockNumber].timestamp
+        query = "SELECT * FROM proposals" + (" WHERE governor = ?" if governor else "") + " ORDER BY governor, id"
+        proposals = []
+        for row in self.db.execute(query, (governor,) if governor else ()):
+            proposal = dict(row)
+            proposal['forVotes'] = int(proposal['forVotes'])
+            proposal['againstVotes'] = int(proposal['againstVotes'])
+            proposal['quorum'] = int(proposal['quorum'] or 0)
+            proposal['state'] = self.state(proposal, blockNumber, timestamp)
+            totalVotes = proposal['forVotes'] + proposal['againstVotes']
+            proposal['quorumProgress'] = totalVotes / proposal['quorum'] if proposal['quorum'] else None
+            proposals.append(proposal)
+        return proposals
+
+    def openProposals(self, governor = None):
+        return [proposal for proposal in self.proposals(governor) if proposal['state'] in ('Pending', 'Active')]
+
+    def state(self, proposal, blockNumber, timestamp):
+        '''
+        GovernorAlpha.state at the given block
+        '''
+        if proposal['canceled']:
+            return 'Canceled'
+        if blockNumber <= proposal['startBlock']:
+            return 'Pending'
+        if blockNumber <= proposal['endBlock']:
+            return 'Active'
+        totalVotes = proposal['forVotes'] + proposal['againstVotes']
+        totalVotesMajorityPercentage = totalVotes // 100 * self.majorityPercentageVotes[proposal['governor']]
+        if proposal['forVotes'] <= totalVotesMajorityPercentage or totalVotes < proposal['quorum']:
+            return 'Defeated'
+        if proposal['eta'] == 0:
+            return 'Succeeded'
+        if proposal['executed']:
+            return 'Executed'
+        if timestamp >= proposal['eta'] + GRACE_PERIOD:
+            return 'Expired'
+        return 'Queued'
+
+    def actions(self, governor, proposalId):
+        rows = self.db.execute("SELECT * FROM proposalActions WHERE governor = ? AND proposalId = ? ORDER BY position", (governor, proposalId))
+        return [dict(row, args = json.loads(row['args'])) for row in rows]
+
+    def votes(self, governor, proposalId):
+        rows = self.db.execute("SELECT * FROM votes WHERE governor = ? AND proposalId = ? ORDER BY blockNumber", (governor, proposalId))
+        return [dict(row, votes = int(row['votes'])) for row in rows]
+
+    def nonVoters(self, governor, proposalId, engine = None):
+        '''
+        @param engine the voting power engine (see voting_power.py), a new one by default
+        @return (delegatee, votes) of the delegatees with voting power for the proposal which did not vote yet,
+                most votes first
+        '''
+        proposal = self.db.execute("SELECT * FROM proposals WHERE governor = ? AND id = ?", (governor, proposalId)).fetchone()
+        if engine is None:
+            engine = VotingPowerEngine()
+            engine.update()
+        votes = engine.getPriorVotes(proposal['startBlock'], proposal['startTime'])
+        voted = set(vote['voter'] for vote in self.votes(governor, proposalId))
+        return sorted(((account, power) for account, power in votes.items() if power > 0 and account not in voted), key = lambda entry: -entry[1])
+
+
+def decodeCalldata(signature, calldata):
+    '''
+    @return the arguments of the calldata of a proposal action, None if they can't be decoded with the signature
+    '''
+    types = splitTypes(signature[signature.find('(') + 1:signature.rfind(')')])
+    try:
+        return [jsonValue(value) for value in decode_abi(types, bytes(HexBytes(calldata)))]
+    except Exception:
+        return None
+
+def splitTypes(types):
+    # splits at the top level commas, tuple types keep their components
+    result = []
+    depth = 0
+    current = ''
+    for character in types:
+        if character == ',' and depth == 0:
+            result.append(current)
+            current = ''
+            continue
+        depth += {'(': 1, ')': -1}.get(character, 0)
+        current += character
+    if current:
+        result.append(current)
+    return result
+
+def main():
+    conf.loadConfig()
+    index = ProposalIndex()
+    index.update()
+    for proposal in index.openProposals():
+        print(proposal['governor'], proposal['id'], proposal['state'], 'for', proposal['forVotes'] / 1e18, 'against',
+              proposal['againstVotes'] / 1e18, 'quorum', proposal['quorum'] / 1e18, 'voters', proposal['voters'])
@@ -0,0 +1,140 @@
+'''
+Batch projection of the StakingRewards of all stakers.
+
+StakingRewards.getStakerCurrentReward sums, for every lock date i since the last withdrawal of the staker,
+    getPriorWeightedStake(staker, referenceBlock(i), i)
+with referenceBlock(i) = block.number - 1 - (block.timestamp - i) / 30, capped by the stake at stopBlock. The
+reference block only depends on the lock date and on the block the view is called at, so the weighted stakes of
+all stakers are computed once per (block, lock date) with the voting power engine (see voting_power.py) and
+cached, and the reward of every staker is a sum over a range of lock dates.
+
+Projected rewards assume that the stakes do not change after the block of the mirror: reference blocks after it
+use the stakes of the mirror block.
+
+usage:
+    rewards = StakingRewardsProjector()
+    rewards.update()
+    rewards.currentRewards()                        # staker -> (lastWithdrawalInterval, amount)
+    rewards.projectRewards(timestamp)               # the same, if the rewards were collected at the timestamp
+
+    brownie run scripts/governance/staking_rewards.py --network rsk-mainnet
+'''
+
+from brownie import *
+import numpy as np
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.staking.staking_checkpoints import TWO_WEEKS
+from scripts.governance.voting_power import VotingPowerEngine
+
+BASE_RATE = 2975
+DIVISOR = 2600000
+# seconds per block assumed by StakingRewards to find the reference block of a lock date
+BLOCK_TIME = 30
+
+
+class StakingRewardsProjector:
+
+    def __init__(self, votingPowerEngine = None, stakingRewardsAddress = None):
+        self.votingPowerEngine = votingPowerEngine or VotingPowerEngine()
+        self.mirror = self.votingPowerEngine.mirror
+        self.stakingRewards = getContract("StakingRewards", stakingRewardsAddress or conf.contracts['StakingRewardsProxy'], StakingRewards.abi)
+        # (block, lock date) -> weighted stakes of all stakers
+        self.cache = {}
+        self.blockNumber = None
+
+    def update(self, toBlock = None):
+        '''
+        mirrors the staking checkpoints and reads the parameters of StakingRewards and the last withdrawal of all
+        stakers at the block the mirror is at
+        '''
+        self.blockNumber = self.votingPowerEngine.update(toBlock)
+        self.cache = {}
+        self.stakers = self.votingPowerEngine.userSeries.accounts
+        batch = MulticallBatch(blockIdentifier = self.blockNumber, requireSuccess = True)
+        parameters = [batch.add(method) for method in (self.stakingRewards.startTime, self.stakingRewards.maxDuration,
+                                                       self.stakingRewards.stopBlock, self.stakingRewards.deploymentBlock)]
+        withdrawals = [batch.add(self.stakingRewards.withdrawals, staker) for staker in self.stakers]
+        batch.execute()
+        self.startTime, self.maxDuration, self.stopBlock, self.deploymentBlock = [call.value for call in parameters]
+        self.withdrawals = np.array([call.value for call in withdrawals], dtype = np.int64)
+        return self.blockNumber
+
+    def weightedStakes(self, blockNumber, date):
+        '''
+        @return the getPriorWeightedStake of all stakers at the block for the lock date, cached
+        '''
+        blockNumber = min(blockNumber, self.blockNumber)
+        key = (blockNumber, date)
+        if key not in self.cache:
+            weighted = self.votingPowerEngine.getPriorWeightedStake(blockNumber, date)
+            self.cache[key] = np.array([weighted[staker] for staker in self.stakers], dtype = object)
+        return self.cache[key]
+
+    def rewardsForDate(self, blockNumber, date):
+        # StakingRewards._computeRewardForDate for all stakers
+        weighted = self.weightedStakes(blockNumber, date)
+        if self.stopBlock > 0:
+            weighted = np.minimum(weighted, self.weightedStakes(self.stopBlock, date))
+        return weighted
+
+    def currentRewards(self, blockNumber = None, timestamp = None, considerMaxDuration = True):
+        '''
+        StakingRewards.getStakerCurrentReward of all stakers, as if called in the block
+        @return staker -> (lastWithdrawalInterval, amount), stakers without reward are left out
+        '''
+        if blockNumber is None:
+            blockNumber = self.blockNumber + 1
+            timestamp = chain[self.blockNumber].timestamp
+        lastFinalisedBlock = blockNumber - 1
+        lastStakingInterval = self.mirror.timestampToLockDate(timestamp)
+        lastWithdrawalInterval = np.where(self.withdrawals > 0, self.withdrawals, self.startTime)
+        if considerMaxDuration:
+            addedMaxDuration = lastWithdrawalInterval + self.maxDuration
+            capped = (addedMaxDuration - self.mirror.kickoffTS) // TWO_WEEKS * TWO_WEEKS + self.mirror.kickoffTS
+            duration = np.where(addedMaxDuration < timestamp, capped, lastStakingInterval)
+        else:
+            duration = np.full(len(self.stakers), lastStakingInterval, dtype = np.int64)
+        active = lastWithdrawalInterval <= lastStakingInterval
+        if not np.any(active):
+            return {}
+
+        # the lock dates of all stakers are on the same two weeks grid, starting at StakingRewards.startTime
+        first = int(lastWithdrawalInterval[active].min())
+        dates = list(range(first, int(duration[active].max()), TWO_WEEKS))
+        rewards = np.zeros((len(dates) + 1, len(self.stakers)), dtype = object)
+        for row, date in enumerate(dates):
+            referenceBlock = max(lastFinalisedBlock - (timestamp - date) // BLOCK_TIME, self.deploymentBlock)
+            rewards[row + 1] = rewards[row] + self.rewardsForDate(referenceBlock, date)
+
+        # the sum over the lock dates lastWithdrawalInterval..duration - 1 of every staker, from the cumulative sums
+        startRow = np.clip((lastWithdrawalInterval - first) // TWO_WEEKS, 0, len(dates))
+        endRow = np.clip(-(-(duration - first) // TWO_WEEKS), 0, len(dates))
+        columns = np.arange(len(self.stakers))
+        weightedStake = np.where(endRow > startRow, rewards[endRow, columns] - rewards[startRow, columns], 0)
+
+        result = {}
+        for i in np.nonzero(active)[0]:
+            if weightedStake[i] > 0:
+                result[self.stakers[i]] = (int(duration[i]), weightedStake[i] * BASE_RATE // DIVISOR)
+        return result
+
+    def projectRewards(self, timestamp, considerMaxDuration = True):
+        '''
+        the rewards of all stakers if they collected them at the timestamp, with the stakes of the mirror block
+        '''
+        now = chain[self.blockNumber].timestamp
+        blockNumber = self.blockNumber + 1 + max(timestamp - now, 0) // BLOCK_TIME
+        return self.currentRewards(blockNumber, timestamp, considerMaxDuration)
+
+
+def main():
+    conf.loadConfig()
+    rewards = StakingRewardsProjector()
+    blockNumber = rewards.update()
+    current = rewards.currentRewards()
+    print("staking rewards at block", blockNumber, "of", len(current), "stakers, total", sum(amount for _, amount in current.values()) / 1e18)
+    for staker, (interval, amount) in sorted(current.items(), key = lambda entry: -entry[1][1])[:20]:
+        print(staker, amount / 1e18, "until", interval)
@@ -0,0 +1,106 @@
+'''
+Aggregate SOV unlock curve of the vesting contracts.
+
+VestingLogic stakes its tokens in FOUR_WEEKS steps from startDate + cliff to endDate, on lock dates aligned to
+TWO_WEEKS by Staking.timestampToLockDate. A stake can be withdrawn once its lock date has passed, so the stakes
+of the vesting contracts per lock date are the unlock schedule. They are taken from the vesting index (see
+vesting_index.py) and summed into one curve per cohort with array operations over all contracts and lock dates.
+
+Only the vestings of the vesting index are covered: the ones created by the vesting registries (createVesting,
+createTeamVesting and the cSOV exchanges) and by LockedSOV. Vesting contracts deployed directly, e.g. with the
+VestingFactory, are not part of the curve.
+
+Cohorts:
+    by = 'registry'  VestingRegistry, VestingRegistry2, VestingRegistry3, LockedSOV
+    by = 'type'      Vesting, TeamVesting
+    by = 'cohort'    team (TeamVesting), origin (VestingRegistry2), lockedSOV, vesting (the others)
+
+usage:
+    forecast = unlockForecast(index, by = 'cohort')
+    writeForecast(forecast, './unlock_forecast.csv')
+
+    brownie run scripts/governance/unlock_forecast.py --network rsk-mainnet
+'''
+
+from brownie import *
+import calendar
+import csv
+import numpy as np
+import time
+
+import scripts.contractInteraction.config as conf
+from scripts.staking.staking_checkpoints import TWO_WEEKS
+from scripts.governance.vesting_index import VestingIndex
+
+
+def cohortOf(vesting, by):
+    if by == 'registry':
+        return vesting['registry'] or 'LockedSOV'
+    if by == 'type':
+        return vesting['type']
+    if vesting['type'] == 'TeamVesting':
+        return 'team'
+    if vesting['registry'] == 'VestingRegistry2':
+        return 'origin'
+    if vesting['lockedSOV']:
+        return 'lockedSOV'
+    return 'vesting'
+
+def unlockForecast(index, by = 'cohort', fromTimestamp = None):
+    '''
+    covers the vestings created by the registries and LockedSOV only, see the module docstring
+    @param fromTimestamp the stakes with earlier lock dates count as unlocked at the first date, now by default
+    @return a dict with the lock dates, the cohorts, the amounts unlocking per cohort and date (matrix) and the
+            cumulative unlocked amounts (matrix)
+    '''
+    if fromTimestamp is None:
+        fromTimestamp = calendar.timegm(time.gmtime())
+    table = index.table()
+    vestings = [vesting for owned in table.values() for vesting in owned.values()]
+    cohorts = sorted(set(cohortOf(vesting, by) for vesting in vestings))
+    cohortIndex = {cohort: i for i, cohort in enumerate(cohorts)}
+
+    lockDates = []
+    amounts = []
+    rows = []
+    for vesting in vestings:
+        for lockDate, amount in vesting['stakes'].items():
+            lockDates.append(lockDate)
+            amounts.append(amount)
+            rows.append(cohortIndex[cohortOf(vesting, by)])
+    if not lockDates:
+        return {'dates': [], 'cohorts': cohorts, 'unlocking': np.zeros((len(cohorts), 0), dtype = object), 'unlocked': np.zeros((len(cohorts), 0), dtype = object)}
+
+    lockDates = np.array(lockDates, dtype = np.int64)
+    first = index.mirror.timestampToLockDate(fromTimestamp)
+    dates = np.arange(first, max(int(lockDates.max()), first) + 1, TWO_WEEKS, dtype = np.int64)
+    # stakes which are unlocked already are counted at the first date
+    columns = np.searchsorted(dates, np.maximum(lockDates, first))
+    unlocking = np.zeros((len(cohorts), len(dates)), dtype = object)
+    np.add.at(unlocking, (np.array(rows, dtype = np.int64), columns), np.array(amounts, dtype = object))
+    return {'dates': dates.tolist(), 'cohorts': cohorts, 'unlocking': unlocking, 'unlocked': np.cumsum(unlocking, axis = 1)}
+
+def writeForecast(forecast, fileName):
+    with open(fileName, 'w', newline = '') as file:
+        writer = csv.writer(file)
+        writer.writerow(['date'] + [cohort + '_unlocking' for cohort in forecast['cohorts']] + [cohort + '_unlocked' for cohort in forecast['cohorts']] + ['total_unlocked'])
+        for column, date in enumerate(forecast['dates']):
+            unlocking = list(forecast['unlocking'][:, column])
+            unlocked = list(forecast['unlocked'][:, column])
+            writer.writerow([time.strftime('%Y-%m-%d', time.gmtime(date))] + [amount / 1e18 for amount in unlocking + unlocked] + [sum(unlocked) / 1e18])
+    print(len(forecast['dates']), "lock dates written to", fileName)
+
+def main():
+    conf.loadConfig()
+    index = VestingIndex()
+    index.update()
+    # every stake of the index is counted exactly once in each curve
+    staked = sum(int(row['amount']) for row in index.db.execute("SELECT amount FROM vestingStakes"))
+    for by in ['cohort', 'registry']:
+        forecast = unlockForecast(index, by)
+        total = sum(forecast['unlocked'][:, -1]) if forecast['dates'] else 0
+        if total != staked:
+            raise Exception("the " + by + " curve unlocks " + str(total) + " but the vestings stake " + str(staked))
+        for cohort, unlocked in zip(forecast['cohorts'], forecast['unlocked']):
+            print(by, cohort, unlocked[-1] / 1e18 if len(unlocked) else 0)
+        writeForecast(forecast, './unlock_forecast_' + by + '_' + network.show_active() + '.csv')
@@ -0,0 +1,224 @@
+'''
+Index of all vesting contracts of VestingRegistry, VestingRegistry2, VestingRegistry3 and LockedSOV.
+
+The vesting contracts are discovered from VestingCreated and TeamVestingCreated of the registries and from
+VestingCreated of LockedSOV, ingested with the event ingestion engine (see event_ingestion.py). The registries
+emit the events on every createVesting call, also for existing vestings, so the vesting address is the key.
+exchangeAllCSOV of VestingRegistry and VestingRegistry2 creates the vesting of the caller without VestingCreated
+and only emits CSOVTokensExchanged(caller, amount), so the vestings of those callers are read with getVesting.
+The schedules (startDate, cliff, duration, endDate) are read with multicall batches, the stakes of the vesting
+contracts come from the local mirror of the staking checkpoints (see scripts/staking/staking_checkpoints.py).
+
+Tables in the database of the event ingestion engine:
+    vestings(vesting, owner, registry, type, lockedSOV, cliff, duration, startDate, endDate, createdBlock)
+    vestingStakes(vesting, lockDate, amount)
+    csovExchanges(registry, owner, blockNumber, vesting)      vesting is NULL until it was read from the registry
+
+usage:
+    index = VestingIndex()
+    index.update()
+    index.vestingsOf(owner)                   # the vestings of the owner with schedules and stakes
+    index.vesting(vestingAddress)
+    index.table()                             # owner -> vesting -> schedule and stakes
+
+    brownie run scripts/governance/vesting_index.py --network rsk-mainnet
+'''
+
+from brownie import *
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.event_ingestion import EventStream, CONFIRMATIONS
+from scripts.staking.staking_checkpoints import StakingCheckpoints
+
+REGISTRIES = ['VestingRegistry', 'VestingRegistry2', 'VestingRegistry3']
+REGISTRY_EVENTS = ['VestingCreated', 'TeamVestingCreated']
+# the registries with exchangeAllCSOV
+CSOV_REGISTRIES = ['VestingRegistry', 'VestingRegistry2']
+VESTING_TYPES = {'VestingCreated': 'Vesting', 'TeamVestingCreated': 'TeamVesting'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS vestings (
+    vesting TEXT PRIMARY KEY,
+    owner TEXT,
+    registry TEXT,
+    type TEXT,
+    lockedSOV INTEGER DEFAULT 0,
+    cliff INTEGER,
+    duration INTEGER,
+    startDate INTEGER,
+    endDate INTEGER,
+    createdBlock INTEGER
+);
+CREATE INDEX IF NOT EXISTS vestingsByOwner ON vestings (owner);
+CREATE TABLE IF NOT EXISTS vestingStakes (
+    vesting TEXT,
+    lockDate INTEGER,
+    amount TEXT,
+    PRIMARY KEY (vesting, lockDate)
+);
+CREATE TABLE IF NOT EXISTS csovExchanges (
+    registry TEXT,
+    owner TEXT,
+    blockNumber INTEGER,
+    vesting TEXT,
+    PRIMARY KEY (registry, owner)
+);
+'''
+
+
+class VestingIndex:
+
+    def __init__(self, mirror = None, startBlock = 0):
+        '''
+        @param mirror the staking checkpoints the stakes are taken from, a new one on the default database by default
+        '''
+        self.mirror = mirror or StakingCheckpoints()
+        self.engine = self.mirror.engine
+        self.db = self.engine.db
+        self.db.executescript(SCHEMA)
+        self.streams = []
+        for name in REGISTRIES:
+            if name in conf.contracts:
+                events = REGISTRY_EVENTS + ['CSOVTokensExchanged'] if name in CSOV_REGISTRIES else REGISTRY_EVENTS
+                self.streams.append(EventStream(name, [conf.contracts[name]], VestingRegistry.abi, events, startBlock))
+        if 'LockedSOV' in conf.contracts:
+            self.streams.append(EventStream('LockedSOV', [conf.contracts['LockedSOV']], LockedSOV.abi, ['VestingCreated'], startBlock))
+
+    # -- indexing ---------------------------------------------------------------------------------------------------
+
+    def update(self, toBlock = None):
+        '''
+        discovers the new vesting contracts, reads the schedules which are not fixed yet and refreshes the stakes
+        @return the block the index is at
+        '''
+        if toBlock is None:
+            toBlock = chain.height - CONFIRMATIONS
+        self.mirror.update(toBlock)
+        for stream in self.streams:
+            self.engine.ingest(stream, toBlock, self.applyEvents)
+        self.resolveCSOVVestings(toBlock)
+        self.readSchedules(toBlock)
+        self.refreshStakes()
+        return toBlock
+
+    def applyEvents(self, stream, events):
+        for event in events:
+            args = event['args']
+            if stream.name == 'LockedSOV':
+                # the vesting is created by the registry of LockedSOV, which emits its own event
+                self.db.execute(
+                    "INSERT OR IGNORE INTO vestings (vesting, owner, registry, type, createdBlock) VALUES (?, ?, NULL, 'Vesting', ?)",
+                    (args['_vesting'], args['_userAddress'], event['blockNumber'])
+                )
+                self.db.execute("UPDATE vestings SET lockedSOV = 1 WHERE vesting = ?", (args['_vesting'],))
+            elif event['event'] == 'CSOVTokensExchanged':
+                # the vesting is read with getVesting after the ingestion, a caller can exchange only once
+                self.db.execute("INSERT OR IGNORE INTO csovExchanges (registry, owner, blockNumber) VALUES (?, ?, ?)",
+                                (stream.name, args['caller'], event['blockNumber']))
+            else:
+                self.db.execute(
+                    "INSERT INTO vestings (vesting, owner, registry, type, cliff, duration, createdBlock) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (vesting) DO UPDATE SET registry = excluded.registry, type = excluded.type, "
+                    "cliff = excluded.cliff, duration = excluded.duration WHERE registry IS NULL",
+                    (args['vesting'], args['tokenOwner'], stream.name, VESTING_TYPES[event['event']], args['cliff'], args['duration'], event['blockNumber'])
+                )
+
+    def resolveCSOVVestings(self, blockNumber):
+        '''
+        reads the vestings of the cSOV exchanges which are not resolved yet with one multicall batch
+        '''
+        rows = self.db.execute("SELECT * FROM csovExchanges WHERE vesting IS NULL").fetchall()
+        if not rows:
+            return
+        registries = {name: getContract(name, conf.contracts[name], VestingRegistry.abi) for name in set(row['registry'] for row in rows)}
+        batch = MulticallBatch(blockIdentifier = blockNumber, requireSuccess = True)
+        calls = [(row, batch.add(registries[row['registry']].getVesting, row['owner'])) for row in rows]
+        batch.execute()
+        for row, call in calls:
+            vesting = str(call.value).lower()
+            # the schedule is read by readSchedules, the vesting may already be known from VestingCreated
+            self.db.execute(
+                "INSERT INTO vestings (vesting, owner, registry, type, createdBlock) VALUES (?, ?, ?, 'Vesting', ?) "
+                "ON CONFLICT (vesting) DO UPDATE SET registry = excluded.registry, type = excluded.type WHERE registry IS NULL",
+                (vesting, row['owner'], row['registry'], row['blockNumber'])
+            )
+            self.db.execute("UPDATE csovExchanges SET vesting = ? WHERE registry = ? AND owner = ?", (vesting, row['registry'], row['owner']))
+        self.db.commit()
+
+    def readSchedules(self, blockNumber):
+        '''
+        reads the schedules of the vestings which did not stake yet, startDate and endDate are set on the first stake
+        '''
+        rows = self.db.execute("SELECT vesting FROM vestings WHERE startDate IS NULL OR startDate = 0").fetchall()
+        batch = MulticallBatch(blockIdentifier = blockNumber)
+        calls = []
+        for row in rows:
+            vesting = Contract.from_abi("VestingLogic", address = row['vesting'], abi = VestingLogic.abi)
+            calls.append((row['vesting'], [batch.add(method) for method in (vesting.cliff, vesting.duration, vesting.startDate, vesting.endDate)]))
+        batch.execute()
+        for vesting, schedule in calls:
+            if all(call.success for call in schedule):
+                self.db.execute("UPDATE vestings SET cliff = ?, duration = ?, startDate = ?, endDate = ? WHERE vesting = ?",
+                                [call.value for call in schedule] + [vesting])
+        self.db.commit()
+
+    def refreshStakes(self):
+        self.db.execute("DELETE FROM vestingStakes")
+        for row in self.db.execute("SELECT vesting FROM vestings").fetchall():
+            dates, stakes = self.mirror.getStakes(row['vesting'])
+            self.db.executemany("INSERT INTO vestingStakes (vesting, lockDate, amount) VALUES (?, ?, ?)",
+                                [(row['vesting'], date, str(stake)) for date, stake in zip(dates, stakes)])
+        self.db.commit()
+
+    # -- queries ----------------------------------------------------------------------------------------------------
+
+    def stakes(self, vesting):
+        '''
+        @return lock date -> stake of the vesting contract, like Staking.getStakes
+        '''
+        rows = self.db.execute("SELECT lockDate, amount FROM vestingStakes WHERE vesting = ? ORDER BY lockDate", (vesting.lower(),))
+        return {row['lockDate']: int(row['amount']) for row in rows}
+
+    def vesting(self, vesting):
+        row = self.db.execute("SELECT * FROM vestings WHERE vesting = ?", (vesting.lower(),)).fetchone()
+        return dict(row, stakes = self.stakes(row['vesting'])) if row else None
+
+    def vestingsOf(self, owner, registry = None, type = None):
+        '''
+        @return the vestings of the owner, optionally of one registry and type ('Vesting' or 'TeamVesting')
+        '''
+        query = "SELECT * FROM vestings WHERE owner = ?"
+        params = [owner.lower()]
+        if registry is not None:
+            query += " AND registry = ?"
+            params.append(registry)
+        if type is not None:
+            query += " AND type = ?"
+            params.append(type)
+        return [dict(row, stakes = self.stakes(row['vesting'])) for row in self.db.execute(query + " ORDER BY createdBlock", params).fetchall()]
+
+    def table(self):
+        '''
+        @return owner -> vesting -> the row of the vesting with its stakes
+        '''
+        stakes = {}
+        for row in self.db.execute("SELECT * FROM vestingStakes ORDER BY lockDate"):
+            stakes.setdefault(row['vesting'], {})[row['lockDate']] = int(row['amount'])
+        table = {}
+        for row in self.db.execute("SELECT * FROM vestings ORDER BY createdBlock"):
+            table.setdefault(row['owner'], {})[row['vesting']] = dict(row, stakes = stakes.get(row['vesting'], {}))
+        return table
+
+
+def main():
+    conf.loadConfig()
+    index = VestingIndex()
+    blockNumber = index.update()
+    table = index.table()
+    vestings = [vesting for owned in table.values() for vesting in owned.values()]
+    print(len(vestings), "vesting contracts of", len(table), "owners indexed up to block", blockNumber)
+    for registry in REGISTRIES + [None]:
+        selected = [vesting for vesting in vestings if vesting['registry'] == registry]
+        print(registry or 'LockedSOV only', len(selected), "vestings, staked", sum(sum(vesting['stakes'].values()) for vesting in selected) / 1e18)
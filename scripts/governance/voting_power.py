@@ -0,0 +1,189 @@
+'''
+Offline voting power engine.
+
+Computes the voting power of all stakers at once from the local mirror of the staking checkpoints (see
+scripts/staking/staking_checkpoints.py), with the integer math of WeightedStaking:
+    - computeWeightByDate
+    - weightedStakeByDate / getPriorWeightedStake (stakes of the users)
+    - getPriorVotes (stakes delegated to the delegatees)
+    - getPriorTotalVotingPower (total stakes)
+    - the early unstaking penalty of Staking._getPunishedAmount, the only place weightScaling is applied
+
+The stakes of all accounts for all lock dates are looked up with one np.searchsorted over all checkpoints and
+kept in NumPy object arrays holding python ints, the weights are computed once per lock date. uint96 overflows
+raise like add96 / mul96.
+
+usage:
+    engine = VotingPowerEngine()
+    engine.update()
+    votes = engine.getPriorVotes(blockNumber, timestamp)    # delegatee -> votes
+    ranking = engine.votingPowerRanking(blockNumber, timestamp)
+'''
+
+from brownie import *
+import numpy as np
+
+from scripts.staking.staking_checkpoints import StakingCheckpoints, TWO_WEEKS, MAX_DURATION
+
+DAY = 24 * 60 * 60
+MAX_VOTING_WEIGHT = 9
+WEIGHT_FACTOR = 10
+MAX_DURATION_POW_2 = 1092 * 1092
+UINT96_MAX = 2**96 - 1
+
+# checkpoints are searched by (series index << BLOCK_BITS) + block number, blocks are uint32 in Checkpoints.sol
+BLOCK_BITS = 32
+
+
+def computeWeightByDate(dates, startDate):
+    '''
+    WeightedStaking.computeWeightByDate for an array of dates
+    '''
+    remainingTime = np.asarray(dates, dtype = np.int64) - startDate
+    if np.any(remainingTime < 0) or np.any(remainingTime > MAX_DURATION):
+        raise Exception("WeightedStaking::computeWeightByDate: date needs to be between startDate and startDate + MAX_DURATION")
+    x = (MAX_DURATION - remainingTime) // DAY
+    return WEIGHT_FACTOR + MAX_VOTING_WEIGHT * WEIGHT_FACTOR * (MAX_DURATION_POW_2 - x * x) // MAX_DURATION_POW_2
+
+def computePunishedAmounts(amounts, untils, timestamp, kickoffTS, weightScaling):
+    '''
+    Staking._getPunishedAmount for arrays of amounts and lock dates, withdrawn at the timestamp
+    '''
+    date = (timestamp - kickoffTS) // TWO_WEEKS * TWO_WEEKS + kickoffTS
+    weights = computeWeightByDate(untils, date).astype(object)
+    # weight * weightScaling and amount * weight are unchecked uint96 operations
+    weights = (weights * weightScaling) % 2**96
+    return np.asarray(amounts, dtype = object) * weights % 2**96 // WEIGHT_FACTOR // 100
+
+def checkUint96(values, message):
+    if len(values) and max(values) > UINT96_MAX:
+        raise Exception(message)
+    return values
+
+
+class CheckpointSeries:
+    '''
+    all checkpoints of one kind (user or delegate) in flat arrays, sorted by series and block
+    '''
+
+    def __init__(self, checkpointsByAccount):
+        self.accounts = sorted(checkpointsByAccount.keys())
+        seriesAccount = []
+        seriesDate = []
+        keys = []
+        stakes = []
+        for accountIndex, account in enumerate(self.accounts):
+            for date, (blocks, values) in sorted(checkpointsByAccount[account].items()):
+                series = len(seriesDate)
+                seriesAccount.append(accountIndex)
+                seriesDate.append(date)
+                keys.extend((series << BLOCK_BITS) + block for block in blocks)
+                stakes.extend(values)
+        self.seriesAccount = np.array(seriesAccount, dtype = np.int64)
+        self.seriesDate = np.array(seriesDate, dtype = np.int64)
+        self.keys = np.array(keys, dtype = np.int64)
+        self.stakes = np.array(stakes, dtype = object)
+
+    def stakesAt(self, blockNumber, dates):
+        '''
+        @return a matrix of the stakes at the block, one row per account and one column per date
+        '''
+        matrix = np.zeros((len(self.accounts), len(dates)), dtype = object)
+        if len(self.seriesDate) == 0:
+            return matrix
+        dates = np.asarray(dates, dtype = np.int64)
+        column = np.searchsorted(dates, self.seriesDate)
+        inRange = column < len(dates)
+        inRange[inRange] = dates[column[inRange]] == self.seriesDate[inRange]
+        series = np.nonzero(inRange)[0]
+        # the last checkpoint of every series at or before the block, like the binary search of WeightedStaking
+        index = np.searchsorted(self.keys, (series << BLOCK_BITS) + blockNumber, side = 'right') - 1
+        found = (index >= 0) & ((self.keys[np.maximum(index, 0)] >> BLOCK_BITS) == series)
+        matrix[self.seriesAccount[series[found]], column[series[found]]] = self.stakes[index[found]]
+        return matrix
+
+
+class VotingPowerEngine:
+
+    def __init__(self, mirror = None):
+        self.mirror = mirror or StakingCheckpoints()
+        self.userSeries = None
+        self.delegateSeries = None
+
+    def update(self, toBlock = None):
+        blockNumber = self.mirror.update(toBlock)
+        self.userSeries = CheckpointSeries(self.mirror.user)
+        self.delegateSeries = CheckpointSeries(self.mirror.delegate)
+        return blockNumber
+
+    def lockDates(self, timestamp):
+        '''
+        @return the dates getPriorVotes iterates over: the lock date of the timestamp up to MAX_DURATION later
+        '''
+        start = self.mirror.timestampToLockDate(timestamp)
+        return start, np.arange(start, start + MAX_DURATION + 1, TWO_WEEKS, dtype = np.int64)
+
+    def weightedPower(self, stakes, weights, message):
+        # mul96(staked, weight) / WEIGHT_FACTOR per date, then add96 over the dates
+        products = stakes * weights.astype(object)
+        checkUint96(products.ravel(), message)
+        power = products // WEIGHT_FACTOR
+        return checkUint96(power.sum(axis = 1) if power.size else np.zeros(len(stakes), dtype = object), message)
+
+    def checkBlock(self, blockNumber):
+        if blockNumber > self.mirror.lastBlock:
+            raise Exception("block " + str(blockNumber) + " is not mirrored yet, the mirror is at block " + str(self.mirror.lastBlock))
+
+    def getPriorVotes(self, blockNumber, timestamp):
+        '''
+        @return delegatee -> Staking.getPriorVotes(delegatee, blockNumber, timestamp), for all delegatees
+        '''
+        self.checkBlock(blockNumber)
+        start, dates = self.lockDates(timestamp)
+        stakes = self.delegateSeries.stakesAt(blockNumber, dates)
+        votes = self.weightedPower(stakes, computeWeightByDate(dates, start), "WeightedStaking::getPriorVotes: overflow on total voting power computation")
+        return dict(zip(self.delegateSeries.accounts, votes))
+
+    def getPriorWeightedStake(self, blockNumber, timestamp):
+        '''
+        @return user -> Staking.getPriorWeightedStake(user, blockNumber, timestamp), for all users
+        '''
+        self.checkBlock(blockNumber)
+        start, dates = self.lockDates(timestamp)
+        stakes = self.userSeries.stakesAt(blockNumber, dates)
+        weighted = self.weightedPower(stakes, computeWeightByDate(dates, start), "WeightedStaking::getPriorWeightedStake: overflow on total weight computation")
+        return dict(zip(self.userSeries.accounts, weighted))
+
+    def weightedStakeByDate(self, blockNumber, date, startDate):
+        '''
+        @return user -> Staking.weightedStakeByDate(user, date, startDate, blockNumber), for all users
+        '''
+        self.checkBlock(blockNumber)
+        stakes = self.userSeries.stakesAt(blockNumber, [date])
+        weighted = self.weightedPower(stakes, computeWeightByDate([date], startDate), "WeightedStaking::weightedStakeByDate: multiplication overflow")
+        return dict(zip(self.userSeries.accounts, weighted))
+
+    def getPriorTotalVotingPower(self, blockNumber, timestamp):
+        self.checkBlock(blockNumber)
+        start, dates = self.lockDates(timestamp)
+        stakes = np.array([[self.mirror.getPriorTotalStakesForDate(int(date), blockNumber) for date in dates]], dtype = object)
+        return self.weightedPower(stakes, computeWeightByDate(dates, start), "WeightedStaking::getPriorTotalVotingPower: overflow on total voting power computation")[0]
+
+    def votingPowerRanking(self, blockNumber, timestamp):
+        '''
+        @return (delegatee, votes) of all delegatees with votes, most votes first
+        '''
+        votes = self.getPriorVotes(blockNumber, timestamp)
+        return sorted(((account, power) for account, power in votes.items() if power > 0), key = lambda entry: -entry[1])
+
+
+def printVotingPowerRanking(blockNumber = None, top = 50):
+    engine = VotingPowerEngine()
+    mirrored = engine.update()
+    blockNumber = mirrored if blockNumber is None else blockNumber
+    ranking = engine.votingPowerRanking(blockNumber, chain[blockNumber].timestamp)
+    total = engine.getPriorTotalVotingPower(blockNumber, chain[blockNumber].timestamp)
+    print("voting power at block", blockNumber, "total", total)
+    for account, votes in ranking[:top]:
+        print(account, votes, str(round(votes * 100 / total, 4)) + '%' if total else '')
+    return ranking
@@ -0,0 +1,125 @@
+'''
+Time series of the total voting power and of the voting power of delegatees.
+
+Samples Staking.getPriorTotalVotingPower and Staking.getPriorVotes over a block range at a fixed stride, with
+the timestamp of each sampled block. The samples are read with concurrent JSON-RPC batches (see rpc_batch.py)
+and every (block, query) result is cached in SQLite: blocks behind CONFIRMATIONS never change, so they are
+only read once. The series is written to a CSV file with one row per sampled block.
+
+usage:
+    series = votingPowerSeries(fromBlock, toBlock, stride = 2880, delegatees = [...])
+    writeSeries(series, './voting_power.csv')
+
+    brownie run scripts/governance/voting_power_series.py --network rsk-mainnet
+'''
+
+from brownie import *
+import csv
+import os
+import sqlite3
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.rpc_batch import RPCBatchTransport
+from scripts.contractInteraction.event_ingestion import CONFIRMATIONS
+
+INDEX_DIR = './indexes/'
+# about one day of RSK blocks
+DEFAULT_STRIDE = 2880
+DEFAULT_SAMPLES = 365
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS samples (
+    query TEXT,
+    blockNumber INTEGER,
+    value TEXT,
+    PRIMARY KEY (query, blockNumber)
+);
+'''
+
+
+class SampleCache:
+
+    def __init__(self, fileName = None):
+        if fileName is None:
+            os.makedirs(INDEX_DIR, exist_ok = True)
+            fileName = INDEX_DIR + 'voting_power_' + network.show_active() + '.db'
+        self.db = sqlite3.connect(fileName)
+        self.db.executescript(SCHEMA)
+
+    def get(self, query, blocks):
+        '''
+        @return block -> cached value of the query
+        '''
+        values = {}
+        for i in range(0, len(blocks), 500):
+            chunk = blocks[i:i + 500]
+            rows = self.db.execute(
+                "SELECT blockNumber, value FROM samples WHERE query = ? AND blockNumber IN (" + ','.join('?' * len(chunk)) + ")",
+                [query] + chunk
+            )
+            values.update((blockNumber, int(value)) for blockNumber, value in rows)
+        return values
+
+    def put(self, query, values):
+        self.db.executemany("INSERT OR REPLACE INTO samples (query, blockNumber, value) VALUES (?, ?, ?)",
+                            [(query, blockNumber, str(value)) for blockNumber, value in values.items()])
+        self.db.commit()
+
+
+def votingPowerSeries(fromBlock, toBlock, stride = DEFAULT_STRIDE, delegatees = (), cache = None, transport = None):
+    '''
+    @param delegatees the accounts to sample getPriorVotes for, besides the total voting power
+    @return a list of dicts with the block, its timestamp, the total voting power and the votes of every delegatee
+    '''
+    staking = getContract("Staking", conf.contracts['Staking'], Staking.abi)
+    cache = cache or SampleCache()
+    head = chain.height
+    final = head - CONFIRMATIONS
+    transport = transport or RPCBatchTransport(blockIdentifier = head)
+    blocks = list(range(fromBlock, min(toBlock, head - 1) + 1, stride))
+
+    timestamps = sample(cache, transport, 'timestamp', blocks, final,
+        lambda block: transport.add('eth_getBlockByNumber', [hex(block), False], lambda result: int(result['timestamp'], 16)))
+    total = sample(cache, transport, 'total', blocks, final,
+        lambda block: transport.call(staking.getPriorTotalVotingPower, block, timestamps[block]))
+    votes = {}
+    for delegatee in delegatees:
+        votes[delegatee] = sample(cache, transport, 'votes:' + str(delegatee).lower(), blocks, final,
+            lambda block: transport.call(staking.getPriorVotes, delegatee, block, timestamps[block]))
+
+    series = []
+    for block in blocks:
+        row = {'block': block, 'timestamp': timestamps[block], 'total': total[block]}
+        row.update((delegatee, values[block]) for delegatee, values in votes.items())
+        series.append(row)
+    return series
+
+def sample(cache, transport, query, blocks, final, request):
+    '''
+    @param request queues the request of one block on the transport
+    @return block -> value, read from the cache where possible, None for reverted calls (e.g. before the
+            deployment of the contract). Only values of final blocks are cached
+    '''
+    values = cache.get(query, blocks)
+    missing = {block: request(block) for block in blocks if block not in values}
+    transport.execute()
+    values.update((block, pending.value if pending.success else None) for block, pending in missing.items())
+    cache.put(query, {block: values[block] for block in missing if block <= final and values[block] is not None})
+    return values
+
+def writeSeries(series, fileName):
+    if not series:
+        return
+    with open(fileName, 'w', newline = '') as file:
+        writer = csv.DictWriter(file, fieldnames = list(series[0].keys()))
+        writer.writeheader()
+        writer.writerows(series)
+    print(len(series), "samples written to", fileName)
+
+def main():
+    conf.loadConfig()
+    toBlock = chain.height - 1
+    fromBlock = max(1, toBlock - DEFAULT_STRIDE * (DEFAULT_SAMPLES - 1))
+    series = votingPowerSeries(fromBlock, toBlock)
+    writeSeries(series, './voting_power_' + network.show_active() + '.csv')
@@ -0,0 +1,146 @@
+'''
+Sweep of the locked and unlocked balances of all LockedSOV users.
+
+LockedSOV can't enumerate its users. Every balance is created by LockedSOV.deposit / depositSOV, which emit
+Deposited(_initiator, _userAddress, ...) also when called by LiquidityMining or LockedSOVRewardTransferLogic,
+so the users are discovered from Deposited with the event ingestion engine (see event_ingestion.py). The
+balances only change with Deposited, Withdrawn, TokenStaked and UserTransfered, so an update only reads the
+balances of the users of new events, with multicall batches at the block the events were ingested up to.
+
+Table in the database of the event ingestion engine:
+    lockedSOVBalances(user, locked, unlocked, blockNumber, initiators)
+
+usage:
+    sweep = LockedSOVSweep()
+    sweep.update()
+    sweep.balances()                          # user -> (locked, unlocked)
+    sweep.withdrawAndStakeGas()               # gas of withdrawAndStakeTokens for every user with a balance
+
+    brownie run scripts/locked/locked_sov_sweep.py --network rsk-mainnet
+'''
+
+from brownie import *
+import json
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.multicall import MulticallBatch
+from scripts.contractInteraction.rpc_batch import RPCBatchTransport
+from scripts.contractInteraction.event_ingestion import EventIngestion, EventStream, CONFIRMATIONS
+
+LOCKED_SOV_EVENTS = ['Deposited', 'Withdrawn', 'TokenStaked', 'UserTransfered']
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+# the block gas limit of brownie-config
+BLOCK_GAS_LIMIT = 6800000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS lockedSOVBalances (
+    user TEXT PRIMARY KEY,
+    locked TEXT,
+    unlocked TEXT,
+    blockNumber INTEGER,
+    initiators TEXT
+);
+'''
+
+
+class LockedSOVSweep:
+
+    def __init__(self, engine = None, lockedSOVAddress = None, startBlock = 0):
+        self.engine = engine or EventIngestion()
+        self.db = self.engine.db
+        self.db.executescript(SCHEMA)
+        self.lockedSOV = getContract("LockedSOV", lockedSOVAddress or conf.contracts['LockedSOV'], LockedSOV.abi)
+        self.stream = EventStream('lockedSOVBalances', [self.lockedSOV.address], LockedSOV.abi, LOCKED_SOV_EVENTS, startBlock)
+
+    def update(self, toBlock = None):
+        '''
+        ingests the new events and reads the balances of their users at the block
+        @return the block the balances are read at
+        '''
+        if toBlock is None:
+            toBlock = chain.height - CONFIRMATIONS
+        self.engine.ingest(self.stream, toBlock, self.applyEvents)
+        # changed users are marked with blockNumber -1 in the same transaction as the events, which also covers
+        # a run that stopped before reading the balances
+        users = [row['user'] for row in self.db.execute("SELECT user FROM lockedSOVBalances WHERE blockNumber = -1")]
+        self.readBalances(users, toBlock)
+        return toBlock
+
+    def applyEvents(self, stream, events):
+        for event in events:
+            args = event['args']
+            if event['event'] == 'Deposited':
+                user = args['_userAddress']
+                row = self.db.execute("SELECT initiators FROM lockedSOVBalances WHERE user = ?", (user,)).fetchone()
+                initiators = set(json.loads(row['initiators'])) if row else set()
+                initiators.add(args['_initiator'])
+                self.db.execute(
+                    "INSERT INTO lockedSOVBalances (user, locked, unlocked, blockNumber, initiators) VALUES (?, '0', '0', -1, ?) "
+                    "ON CONFLICT (user) DO UPDATE SET initiators = excluded.initiators, blockNumber = -1",
+                    (user, json.dumps(sorted(initiators)))
+                )
+            else:
+                # Withdrawn, TokenStaked and UserTransfered are emitted with the user as _initiator
+                user = args['_initiator']
+                self.db.execute("UPDATE lockedSOVBalances SET blockNumber = -1 WHERE user = ?", (user,))
+
+    def readBalances(self, users, blockNumber):
+        batch = MulticallBatch(blockIdentifier = blockNumber, requireSuccess = True)
+        calls = [(user, batch.add(self.lockedSOV.getLockedBalance, user), batch.add(self.lockedSOV.getUnlockedBalance, user)) for user in users]
+        batch.execute()
+        self.db.executemany("UPDATE lockedSOVBalances SET locked = ?, unlocked = ?, blockNumber = ? WHERE user = ?",
+                            [(str(locked.value), str(unlocked.value), blockNumber, user) for user, locked, unlocked in calls])
+        self.db.commit()
+
+    def balances(self, minBalance = 1):
+        '''
+        @return user -> (locked, unlocked) of the users with at least minBalance locked or unlocked SOV
+        '''
+        balances = {}
+        for row in self.db.execute("SELECT user, locked, unlocked FROM lockedSOVBalances"):
+            locked, unlocked = int(row['locked']), int(row['unlocked'])
+            if locked >= minBalance or unlocked >= minBalance:
+                balances[row['user']] = (locked, unlocked)
+        return balances
+
+    def initiators(self, user):
+        '''
+        @return the contracts and accounts which deposited for the user, e.g. LockedSOVRewardTransferLogic
+        '''
+        row = self.db.execute("SELECT initiators FROM lockedSOVBalances WHERE user = ?", (user.lower(),)).fetchone()
+        return json.loads(row['initiators']) if row else []
+
+    def withdrawAndStakeGas(self, users = None):
+        '''
+        estimates withdrawAndStakeTokens(0x0) sent by every user with a balance, in batches of eth_estimateGas.
+        The first call of a user also deploys the vesting contract of the user
+        @return a dict with the gas per user, the total, the users whose call would fail and the ones above the
+                block gas limit
+        '''
+        users = sorted(self.balances().keys()) if users is None else [user.lower() for user in users]
+        transport = RPCBatchTransport()
+        estimates = {user: transport.estimateGas(self.lockedSOV.withdrawAndStakeTokens, ZERO_ADDRESS, sender = user) for user in users}
+        transport.execute()
+        gas = {user: request.value for user, request in estimates.items() if request.success}
+        return {
+            'gas': gas,
+            'total': sum(gas.values()),
+            'failed': {user: request.error for user, request in estimates.items() if not request.success},
+            'aboveBlockGasLimit': [user for user, value in gas.items() if value > BLOCK_GAS_LIMIT],
+        }
+
+
+def main():
+    conf.loadConfig()
+    sweep = LockedSOVSweep()
+    blockNumber = sweep.update()
+    balances = sweep.balances()
+    print(len(balances), "LockedSOV users with a balance at block", blockNumber)
+    print("locked:  ", sum(locked for locked, _ in balances.values()) / 1e18)
+    print("unlocked:", sum(unlocked for _, unlocked in balances.values()) / 1e18)
+    report = sweep.withdrawAndStakeGas()
+    print("withdrawAndStakeTokens for", len(report['gas']), "users:", report['total'], "gas")
+    if report['gas']:
+        print("max gas of one user:", max(report['gas'].values()))
+    print(len(report['failed']), "calls would fail,", len(report['aboveBlockGasLimit']), "above the block gas limit")
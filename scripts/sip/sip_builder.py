@@ -0,0 +1,186 @@
+'''
+Declarative SIP builder and local lifecycle simulation.
+
+A proposal is described by a JSON spec:
+    {
+        "governor": "GovernorOwner",
+        "description": "SIP-0016: Proposal to upgrade Staking contract, Details: ..., sha256: ...",
+        "actions": [
+            {"target": "$Staking", "signature": "setImplementation(address)", "args": ["$StakingLogic2"]},
+            {"target": "$SOV", "signature": "symbol()", "value": 0}
+        ]
+    }
+Strings starting with $ are names of the contracts json. The calldata of every action is encoded from its
+signature, so no contract ABI and no slicing of encode_input output is needed.
+
+simulateProposal runs propose -> castVote -> queue -> execute on the development network against a local
+governance deployment (SOV, Staking, Timelock, GovernorAlpha), mining the voting period and moving the time
+past the Timelock delay. It reports the gas of every step and of every action, and flags everything which
+would not fit into an RSK block.
+
+usage:
+    spec = loadSpec('./scripts/sip/specs/SIP-0016.json')
+    proposal = buildProposal(spec)
+    simulateProposal(spec)
+
+    brownie run scripts/sip/sip_builder.py main ./scripts/sip/specs/SIP-0016.json
+'''
+
+from brownie import *
+from eth_abi import encode_abi
+from hexbytes import HexBytes
+import json
+
+import scripts.contractInteraction.config as conf
+from scripts.governance.proposal_index import splitTypes
+
+RSK_BLOCK_GAS_LIMIT = 6800000
+# governance parameters of the local deployment
+TIMELOCK_DELAY = 3 * 60 * 60
+QUORUM_PERCENTAGE_VOTES = 20
+MAJORITY_PERCENTAGE_VOTES = 70
+STAKE_AMOUNT = 10**24
+
+
+def loadSpec(fileName):
+    with open(fileName, 'r') as file:
+        return json.load(file)
+
+def resolve(value, contracts):
+    '''
+    replaces $name by the address of the contract, also inside of lists
+    '''
+    if isinstance(value, list):
+        return [resolve(item, contracts) for item in value]
+    if isinstance(value, str) and value.startswith('$'):
+        return contracts[value[1:]]
+    return value
+
+def encodeArgs(signature, args):
+    types = splitTypes(signature[signature.find('(') + 1:signature.rfind(')')])
+    if len(types) != len(args):
+        raise Exception(signature + ": expected " + str(len(types)) + " arguments, got " + str(len(args)))
+    values = [bytes(HexBytes(arg)) if type.startswith('bytes') and isinstance(arg, str) else arg for type, arg in zip(types, args)]
+    return '0x' + encode_abi(types, values).hex()
+
+def buildProposal(spec, contracts = None):
+    '''
+    @param contracts name -> address for the $names, the contracts json by default
+    @return the governor address and the arguments of GovernorAlpha.propose
+    '''
+    contracts = contracts or conf.contracts
+    proposal = {
+        'governor': resolve('$' + spec['governor'], contracts),
+        'targets': [],
+        'values': [],
+        'signatures': [],
+        'calldatas': [],
+        'description': spec['description'],
+    }
+    for action in spec['actions']:
+        args = resolve(action.get('args', []), contracts)
+        proposal['targets'].append(resolve(action['target'], contracts))
+        proposal['values'].append(int(action.get('value', 0)))
+        proposal['signatures'].append(action['signature'])
+        proposal['calldatas'].append(encodeArgs(action['signature'], args))
+    return proposal
+
+def propose(proposal, sender):
+    governor = Contract.from_abi("GovernorAlpha", address=proposal['governor'], abi=GovernorAlpha.abi, owner=sender)
+    return governor.propose(proposal['targets'], proposal['values'], proposal['signatures'], proposal['calldatas'], proposal['description'])
+
+def deployLocalGovernance(acct):
+    '''
+    deploys SOV, Staking, Timelock and GovernorAlpha, with the Timelock administrated by the governor, Staking owned
+    by the Timelock and enough stake of acct to propose and to reach the quorum alone
+    @return name -> contract, the names can be used in the spec
+    '''
+    SOVtoken = acct.deploy(SOV, 10**26)
+    stakingLogic = acct.deploy(Staking)
+    staking = acct.deploy(StakingProxy, SOVtoken.address)
+    staking.setImplementation(stakingLogic.address)
+    stakingProxy = staking
+    staking = Contract.from_abi("Staking", address=staking.address, abi=Staking.abi, owner=acct)
+    SOVtoken.approve(staking.address, STAKE_AMOUNT)
+    staking.stake(STAKE_AMOUNT, chain.time() + 1092 * 24 * 60 * 60, acct, acct)
+
+    timelock = acct.deploy(Timelock, acct, TIMELOCK_DELAY)
+    governor = acct.deploy(GovernorAlpha, timelock.address, staking.address, acct, QUORUM_PERCENTAGE_VOTES, MAJORITY_PERCENTAGE_VOTES)
+    eta = chain.time() + TIMELOCK_DELAY + 60
+    data = '0x' + timelock.setPendingAdmin.encode_input(governor.address)[10:]
+    timelock.queueTransaction(timelock.address, 0, "setPendingAdmin(address)", data, eta)
+    chain.sleep(TIMELOCK_DELAY + 120)
+    chain.mine()
+    timelock.executeTransaction(timelock.address, 0, "setPendingAdmin(address)", data, eta)
+    governor.__acceptAdmin()
+    staking.transferOwnership(timelock.address)
+    stakingProxy.setProxyOwner(timelock.address)
+    # the stake has to be in a block before the proposal
+    chain.mine()
+    return {'SOV': SOVtoken, 'Staking': staking, 'Timelock': timelock, 'GovernorOwner': governor, 'GovernorAdmin': governor}
+
+def simulateProposal(spec, acct = None, localContracts = None):
+    '''
+    @param localContracts name -> contract of the local governance deployment, a new one by default. They
+           take precedence over the contracts json when resolving the spec, other names resolve to the addresses
+           of the contracts json, which may have no code on the local chain
+    @return the gas report
+    '''
+    if network.show_active() != "development":
+        raise Exception("the simulation mines blocks and moves the time, run it on the development network")
+    acct = acct or accounts[0]
+    localContracts = localContracts or deployLocalGovernance(acct)
+    contracts = dict(getattr(conf, 'contracts', {}))
+    contracts.update((name, contract.address) for name, contract in localContracts.items())
+    proposal = buildProposal(spec, contracts)
+    governor = Contract.from_abi("GovernorAlpha", address=proposal['governor'], abi=GovernorAlpha.abi, owner=acct)
+    timelock = Contract.from_abi("Timelock", address=governor.timelock(), abi=Timelock.abi, owner=acct)
+
+    report = {'steps': {}, 'actions': [], 'warnings': []}
+    tx = propose(proposal, acct)
+    proposalId = tx.return_value
+    report['steps']['propose'] = tx.gas_used
+    chain.mine(governor.votingDelay() + 1)
+
+    report['steps']['castVote'] = governor.castVote(proposalId, True).gas_used
+    chain.mine(governor.votingPeriod())
+
+    report['steps']['queue'] = governor.queue(proposalId).gas_used
+    chain.sleep(timelock.delay() + 60)
+    chain.mine()
+
+    # the gas of every action, called by the timelock like Timelock.executeTransaction does
+    for target, value, signature, calldata in zip(proposal['targets'], proposal['values'], proposal['signatures'], proposal['calldatas']):
+        data = '0x' + web3.keccak(text = signature).hex()[-64:][:8] + calldata[2:] if signature else calldata
+        try:
+            gas = web3.eth.estimateGas({'from': timelock.address, 'to': target, 'value': value, 'data': data})
+        except Exception as e:
+            gas = None
+            report['warnings'].append(signature + " on " + target + " would fail: " + str(e))
+        report['actions'].append({'target': target, 'signature': signature, 'gas': gas})
+
+    executeTx = governor.execute(proposalId, {'value': sum(proposal['values'])})
+    report['steps']['execute'] = executeTx.gas_used
+    state = governor.state(proposalId)
+    if state != 7:
+        report['warnings'].append("the proposal ended in state " + str(state) + " instead of Executed")
+
+    for step, gas in report['steps'].items():
+        if gas > RSK_BLOCK_GAS_LIMIT:
+            report['warnings'].append(step + " needs " + str(gas) + " gas, more than the RSK block gas limit of " + str(RSK_BLOCK_GAS_LIMIT))
+    printReport(report)
+    return report
+
+def printReport(report):
+    print('=============================================================')
+    for step, gas in report['steps'].items():
+        print(step.ljust(20), gas)
+    for action in report['actions']:
+        print('  ' + action['signature'].ljust(40), action['target'], action['gas'])
+    for warning in report['warnings']:
+        print('WARNING:', warning)
+    print('=============================================================')
+
+def main(specFile):
+    conf.loadConfig()
+    simulateProposal(loadSpec(specFile))
@@ -8,6 +8,8 @@ from brownie.network.contract import InterfaceContainer
 import json
 import time
 
+from scripts.sip.sip_builder import loadSpec, buildProposal
+
 def main():
 
     # Load the contracts and acct depending on the network.
@@ -102,6 +104,11 @@ def createProposal(governorAddr, target, value, signature, data, description):
     # tx = governor.propose(target, value, signature, data, description)
     # tx.info()
 
+def createProposalFromSpec(specFile):
+    # see sip_builder.py for the spec format, simulate it first with sip_builder.simulateProposal
+    proposal = buildProposal(loadSpec(specFile), contracts)
+    createProposal(proposal['governor'], proposal['targets'], proposal['values'], proposal['signatures'], proposal['calldatas'], proposal['description'])
+
 def createProposalSIP0005():
     dummyAddress = contracts['GovernorOwner']
     dummyContract = Contract.from_abi("DummyContract", address=dummyAddress, abi=DummyContract.abi, owner=acct)
@@ -1,51 +1,137 @@
+'''
+Audits the locked stakes of the users of processed-list.csv.
+
+All users are read at the same block with batched getStakes calls (see rpc_batch.py). Completed users are
+recorded in a journal next to the output, so an interrupted audit resumes with the remaining users at the
+same block. The journal is removed when all users are done, the next audit starts at a new block. The result
+is a CSV with the locked amount of every user per lock date.
+
+run with:
+    brownie run scripts/staking/check_user_stakes.py --network rsk-mainnet
+'''
+
 from brownie import *
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import registry
+from scripts.contractInteraction.rpc_batch import RPCBatchTransport
 
-import calendar
-import time
-import json
 import csv
-import math
+import json
+import os
+from datetime import datetime
 
-def main():
-    thisNetwork = network.show_active()
+USER_LIST = './scripts/staking/processed-list.csv'
+OUTPUT_FILE = './scripts/staking/user-stakes.csv'
+# number of users read with one round of batched requests, the journal is written after every round
+USERS_PER_ROUND = 500
 
+def main():
     # == Load config =======================================================================================================================
-    if thisNetwork == "development":
-        acct = accounts[0]
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "testnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/testnet_contracts.json')
-    elif thisNetwork == "rsk-mainnet":
-        acct = accounts.load("rskdeployer")
-        configFile =  open('./scripts/contractInteraction/mainnet_contracts.json')
-    else:
-        raise Exception("network not supported")
-
-    # load deployed contracts addresses
-    contracts = json.load(configFile)
-
-    staking = Contract.from_abi("Staking", address=contracts['Staking'], abi=Staking.abi, owner=acct)
-
-    DAY = 24 * 60 * 60
-    TWO_WEEKS = 2 * 7 * DAY
-    # parse data
-
-    ts = calendar.timegm(time.gmtime())
+    conf.loadConfig()
+
+    auditUserStakes(USER_LIST, OUTPUT_FILE)
+
+def auditUserStakes(userList, outputFile, blockNumber = None):
+    '''
+    @param blockNumber the block to read the stakes at, the latest one by default. A resumed audit keeps the
+           block of the journal, a different block raises
+    @return the total locked amount
+    '''
+    staking = registry.Staking
+    journal = Journal(outputFile + '.journal')
+    blockNumber = journal.start(blockNumber)
+    # the rows of the users done are in the output, without them the total would be computed from a partial file
+    if journal.done and (not os.path.exists(outputFile) or os.path.getsize(outputFile) == 0):
+        raise Exception("the journal " + journal.fileName + " has " + str(len(journal.done)) + " users done, but " + outputFile +
+                        " is missing or empty. Remove the journal to restart the audit")
+    timestamp = chain[blockNumber].timestamp
+    print("auditing stakes at block", blockNumber)
+
+    with open(userList, 'r') as file:
+        users = [row[0] for row in csv.reader(file) if row]
+    pending = [user for user in dict.fromkeys(users) if user.lower() not in journal.done]
+    print(len(pending), "of", len(users), "users left")
+
+    transport = RPCBatchTransport(blockIdentifier = blockNumber)
+    newFile = len(journal.done) == 0
+    if not newFile:
+        dropIncompleteRows(outputFile, journal.done)
+    with open(outputFile, 'w' if newFile else 'a', newline = '') as output:
+        writer = csv.writer(output)
+        if newFile:
+            writer.writerow(['user', 'lockDate', 'date', 'amount'])
+        for start in range(0, len(pending), USERS_PER_ROUND):
+            chunk = pending[start:start + USERS_PER_ROUND]
+            stakes = [transport.call(staking.getStakes, user) for user in chunk]
+            transport.execute()
+            for user, userStakes in zip(chunk, stakes):
+                dates, amounts = userStakes.value
+                for date, amount in zip(dates, amounts):
+                    if int(date) > timestamp:
+                        writer.writerow([user, date, datetime.utcfromtimestamp(date).strftime('%Y-%m-%d'), amount])
+            output.flush()
+            journal.complete(chunk)
+            print(len(journal.done), "users done")
+    journal.finish()
+
     totalLockedAmount = 0
-    with open('./scripts/staking/processed-list.csv', 'r') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            user = row[0]
-
-            stakes = staking.getStakes(user)
-            stakeDates = stakes[0]
-            stakeAmounts = stakes[1]
-
-            userLockedAmount = 0
-            for index, value in enumerate(stakeDates):
-                if (int(value) > ts):
-                    userLockedAmount += stakeAmounts[index]
-
-            totalLockedAmount += userLockedAmount
-            print(user + ", " + str(userLockedAmount) + ", " + str(stakeDates) + ", " + str(stakeAmounts))
+    with open(outputFile, 'r') as output:
+        for row in csv.DictReader(output):
+            totalLockedAmount += int(row['amount'])
+    print("totalLockedAmount:", totalLockedAmount / 10**18)
+    return totalLockedAmount
+
+def dropIncompleteRows(outputFile, done):
+    '''
+    removes the rows of users which were written, but not recorded in the journal before the audit stopped
+    '''
+    with open(outputFile, 'r', newline = '') as file:
+        rows = list(csv.reader(file))
+    with open(outputFile, 'w', newline = '') as file:
+        writer = csv.writer(file)
+        writer.writerow(rows[0])
+        writer.writerows(row for row in rows[1:] if row[0].lower() in done)
+
+
+class Journal:
+    '''
+    the block of the audit in the first line, then one completed user per line
+    '''
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.done = set()
+
+    def start(self, blockNumber = None):
+        '''
+        @param blockNumber the block of a new journal, the latest one by default
+        @return the block of an existing journal, otherwise a new journal is started at the given block
+        '''
+        if os.path.exists(self.fileName):
+            with open(self.fileName, 'r') as file:
+                lines = file.read().splitlines()
+            if lines:
+                journalBlock = json.loads(lines[0])['block']
+                if blockNumber is not None and blockNumber != journalBlock:
+                    raise Exception("the audit in " + self.fileName + " is at block " + str(journalBlock) + ", not " + str(blockNumber) +
+                                    ". Resume it without a block or remove the journal")
+                self.done = set(line.lower() for line in lines[1:] if line)
+                return journalBlock
+        if blockNumber is None:
+            blockNumber = chain.height
+        with open(self.fileName, 'w') as file:
+            file.write(json.dumps({'block': blockNumber}) + '\n')
+        return blockNumber
+
+    def complete(self, users):
+        with open(self.fileName, 'a') as file:
+            for user in users:
+                file.write(user + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self.done.update(user.lower() for user in users)
+
+    def finish(self):
+        # the audit is complete, a later audit must not resume it
+        if os.path.exists(self.fileName):
+            os.remove(self.fileName)
@@ -0,0 +1,223 @@
+'''
+Local mirror of the staking checkpoints of the Staking contract.
+
+totalStakingCheckpoints and userStakingCheckpoints are rebuilt from the events of the Staking contract, which
+are ingested with the event ingestion engine (see scripts/contractInteraction/event_ingestion.py):
+    - TokensStaked: increases the stake of the user and the total stake of the lock date
+    - StakingWithdrawn: decreases them by the withdrawn amount. The event holds the amount after the penalty
+      for early unstaking, the penalty is taken from the TokensTransferred event the Staking contract causes on
+      the FeeSharingProxy in the same transaction
+    - ExtendedStakingDuration: moves the stake from the previous lock date to the new one
+
+delegateStakingCheckpoints are rebuilt from DelegateStakeChanged, which is emitted with the new stake on every
+write of a delegate checkpoint.
+
+Checkpoints are written like Checkpoints.sol (one checkpoint per block) and looked up with a bisection like
+WeightedStaking.getPriorTotalStakesForDate / _getPriorUserStakeByDate.
+
+usage:
+    mirror = StakingCheckpoints()
+    mirror.update()
+    mirror.getPriorTotalStakesForDate(lockDate, blockNumber)
+    mirror.getPriorUserStakeByDate(user, lockDate, blockNumber)
+    mirror.stakedPerLockDate()
+'''
+
+from brownie import *
+from bisect import bisect_right
+import calendar
+import time
+
+import scripts.contractInteraction.config as conf
+from scripts.contractInteraction.registry import getContract
+from scripts.contractInteraction.event_ingestion import EventIngestion, EventStream, CONFIRMATIONS
+
+TWO_WEEKS = 1209600
+MAX_DURATION = 1092 * 24 * 60 * 60
+# number of lock dates from the current one to the latest possible one
+LOCK_DATES = MAX_DURATION // TWO_WEEKS
+
+STAKING_EVENTS = ['TokensStaked', 'StakingWithdrawn', 'ExtendedStakingDuration']
+DELEGATE_EVENTS = ['DelegateStakeChanged']
+
+
+class StakingCheckpoints:
+
+    def __init__(self, stakingAddress = None, feeSharingAddress = None, startBlock = 0, engine = None):
+        '''
+        @param startBlock the block the Staking contract was deployed at, the events are read from there
+        @param engine the event ingestion engine, with the default database of the network by default
+        '''
+        self.staking = getContract("Staking", stakingAddress or conf.contracts['Staking'], Staking.abi)
+        feeSharingAddress = feeSharingAddress or conf.contracts['FeeSharingProxy']
+        self.kickoffTS = self.staking.kickoffTS()
+        self.engine = engine or EventIngestion()
+        self.stakingStream = EventStream('stakingCheckpoints', [self.staking.address], Staking.abi, STAKING_EVENTS, startBlock)
+        self.delegateStream = EventStream('delegateCheckpoints', [self.staking.address], Staking.abi, DELEGATE_EVENTS, startBlock)
+        self.feeSharingStream = EventStream('feeSharingTransfers', [feeSharingAddress], FeeSharingProxy.abi, ['TokensTransferred'], startBlock)
+        # date -> ([fromBlock], [stake])
+        self.total = {}
+        # account -> date -> ([fromBlock], [stake])
+        self.user = {}
+        self.delegate = {}
+        self.lastBlock = -1
+
+    # -- building ---------------------------------------------------------------------------------------------------
+
+    def update(self, toBlock = None):
+        '''
+        ingests the new events and applies them to the checkpoints
+        @return the block the mirror is at
+        '''
+        if toBlock is None:
+            toBlock = chain.height - CONFIRMATIONS
+        self.engine.ingest(self.stakingStream, toBlock)
+        self.engine.ingest(self.delegateStream, toBlock)
+        self.engine.ingest(self.feeSharingStream, toBlock)
+        fromBlock = self.lastBlock + 1
+        events = self.engine.events(self.stakingStream.name, fromBlock = fromBlock, toBlock = toBlock)
+        transfers = self.engine.events(self.feeSharingStream.name, event = 'TokensTransferred', fromBlock = fromBlock, toBlock = toBlock)
+        self.apply(events, self.penalties(transfers))
+        self.applyDelegateEvents(self.engine.events(self.delegateStream.name, fromBlock = fromBlock, toBlock = toBlock))
+        self.lastBlock = toBlock
+        return toBlock
+
+    def penalties(self, transfers):
+        '''
+        @return transaction hash -> the penalties the Staking contract transferred in the transaction, in log order
+        '''
+        staking = self.staking.address.lower()
+        penalties = {}
+        for transfer in transfers:
+            if transfer['args']['sender'] == staking:
+                penalties.setdefault(transfer['transactionHash'], []).append((transfer['logIndex'], transfer['args']['amount']))
+        return penalties
+
+    def apply(self, events, penalties):
+        for event in events:
+            args = event['args']
+            blockNumber = event['blockNumber']
+            if event['event'] == 'TokensStaked':
+                self.changeStake(args['staker'], args['lockedUntil'], args['amount'], blockNumber)
+            elif event['event'] == 'StakingWithdrawn':
+                amount = args['amount'] + self.penaltyOf(event, penalties)
+                self.changeStake(args['staker'], args['until'], -amount, blockNumber)
+            elif event['event'] == 'ExtendedStakingDuration':
+                self.changeStake(args['staker'], args['previousDate'], -args['amountStaked'], blockNumber)
+                self.changeStake(args['staker'], args['newDate'], args['amountStaked'], blockNumber)
+
+    def applyDelegateEvents(self, events):
+        for event in events:
+            args = event['args']
+            checkpoints = self.delegate.setdefault(args['delegate'], {}).setdefault(args['lockedUntil'], ([], []))
+            writeCheckpoint(checkpoints, event['blockNumber'], args['newBalance'])
+
+    def penaltyOf(self, event, penalties):
+        # the penalty is transferred right before StakingWithdrawn is emitted
+        transfers = penalties.get(event['transactionHash'], [])
+        for i, (logIndex, amount) in enumerate(transfers):
+            if logIndex < event['logIndex']:
+                del transfers[i]
+                return amount
+        return 0
+
+    def changeStake(self, account, date, amount, blockNumber):
+        userCheckpoints = self.user.setdefault(account, {}).setdefault(date, ([], []))
+        totalCheckpoints = self.total.setdefault(date, ([], []))
+        writeCheckpoint(userCheckpoints, blockNumber, latestStake(userCheckpoints) + amount)
+        writeCheckpoint(totalCheckpoints, blockNumber, latestStake(totalCheckpoints) + amount)
+
+    # -- views ------------------------------------------------------------------------------------------------------
+
+    def timestampToLockDate(self, timestamp):
+        return (timestamp - self.kickoffTS) // TWO_WEEKS * TWO_WEEKS + self.kickoffTS
+
+    def adjustDateForOrigin(self, date):
+        adjustedDate = self.timestampToLockDate(date)
+        return date if adjustedDate == date else adjustedDate + TWO_WEEKS
+
+    def getPriorTotalStakesForDate(self, date, blockNumber):
+        return priorStake(self.total.get(date), blockNumber)
+
+    def getPriorUserStakeByDate(self, account, date, blockNumber):
+        date = self.adjustDateForOrigin(date)
+        return priorStake(self.user.get(account.lower(), {}).get(date), blockNumber)
+
+    def getPriorStakeByDateForDelegatee(self, account, date, blockNumber):
+        return priorStake(self.delegate.get(account.lower(), {}).get(date), blockNumber)
+
+    def getCurrentStakedUntil(self, date):
+        return latestStake(self.total.get(date))
+
+    def currentBalance(self, account, date):
+        return latestStake(self.user.get(account.lower(), {}).get(date))
+
+    def lockDates(self, timestamp = None):
+        '''
+        @return the lock dates following the lock date of the timestamp, up to the latest possible one
+        '''
+        if timestamp is None:
+            timestamp = calendar.timegm(time.gmtime())
+        start = self.timestampToLockDate(timestamp)
+        return [start + i * TWO_WEEKS for i in range(1, LOCK_DATES + 1)]
+
+    def getStakes(self, account, timestamp = None):
+        '''
+        @return the dates and the stakes of the account, like Staking.getStakes
+        '''
+        dates = []
+        stakes = []
+        for date, checkpoints in sorted(self.user.get(account.lower(), {}).items()):
+            stake = latestStake(checkpoints)
+            if stake > 0 and (timestamp is None or date <= self.timestampToLockDate(timestamp + MAX_DURATION)):
+                dates.append(date)
+                stakes.append(stake)
+        return dates, stakes
+
+    def stakedPerLockDate(self, timestamp = None, blockNumber = None):
+        '''
+        @return lock date -> total stake, for the lock dates following the timestamp
+        @param blockNumber the stakes at the block, the latest ones by default
+        '''
+        if blockNumber is None:
+            return {date: self.getCurrentStakedUntil(date) for date in self.lockDates(timestamp)}
+        return {date: self.getPriorTotalStakesForDate(date, blockNumber) for date in self.lockDates(timestamp)}
+
+    def stakesPerUser(self, timestamp = None, blockNumber = None):
+        '''
+        @return account -> lock date -> stake, for the lock dates following the timestamp, without empty stakes
+        '''
+        dates = set(self.lockDates(timestamp))
+        stakes = {}
+        for account, userDates in self.user.items():
+            for date, checkpoints in userDates.items():
+                if date not in dates:
+                    continue
+                stake = latestStake(checkpoints) if blockNumber is None else priorStake(checkpoints, blockNumber)
+                if stake > 0:
+                    stakes.setdefault(account, {})[date] = stake
+        return stakes
+
+
+def writeCheckpoint(checkpoints, blockNumber, newStake):
+    # Checkpoints._writeUserCheckpoint: a second change in the same block overwrites the checkpoint of the block
+    blocks, stakes = checkpoints
+    if newStake < 0:
+        raise Exception("staked amount underflow at block " + str(blockNumber))
+    if blocks and blocks[-1] == blockNumber:
+        stakes[-1] = newStake
+    else:
+        blocks.append(blockNumber)
+        stakes.append(newStake)
+
+def latestStake(checkpoints):
+    return checkpoints[1][-1] if checkpoints and checkpoints[0] else 0
+
+def priorStake(checkpoints, blockNumber):
+    '''
+    the stake of the last checkpoint at or before the block, like the binary search of WeightedStaking
+    '''
+    if not checkpoints:
+        return 0
+    index = bisect_right(checkpoints[0], blockNumber) - 1
+    return checkpoints[1][index] if index >= 0 else 0
@@ -0,0 +1,79 @@
+const { expect } = require("chai");
+const { expectRevert, BN } = require("@openzeppelin/test-helpers");
+
+const Multicall = artifacts.require("Multicall");
+const TestToken = artifacts.require("TestToken");
+
+const TOTAL_SUPPLY = new BN(10).pow(new BN(24));
+
+contract("Multicall:", (accounts) => {
+	let root, account1;
+	let multicall, token;
+
+	before(async () => {
+		[root, account1, ...accounts] = accounts;
+	});
+
+	beforeEach(async () => {
+		multicall = await Multicall.new();
+		token = await TestToken.new("Test", "TST", 18, TOTAL_SUPPLY);
+		await token.transfer(account1, 1000);
+	});
+
+	function encode(method, args) {
+		let tokenInterface = new web3.eth.Contract(token.abi, token.address);
+		return tokenInterface.methods[method](...args).encodeABI();
+	}
+
+	describe("aggregate", () => {
+		it("returns the results of all calls", async () => {
+			let calls = [
+				{ target: token.address, callData: encode("balanceOf", [root]) },
+				{ target: token.address, callData: encode("balanceOf", [account1]) },
+				{ target: token.address, callData: encode("totalSupply", []) },
+			];
+			let result = await multicall.aggregate.call(calls);
+
+			expect(result.blockNumber).to.be.bignumber.equal(new BN(await web3.eth.getBlockNumber()));
+			expect(web3.eth.abi.decodeParameter("uint256", result.returnData[0])).to.be.equal(TOTAL_SUPPLY.sub(new BN(1000)).toString());
+			expect(web3.eth.abi.decodeParameter("uint256", result.returnData[1])).to.be.equal("1000");
+			expect(web3.eth.abi.decodeParameter("uint256", result.returnData[2])).to.be.equal(TOTAL_SUPPLY.toString());
+		});
+
+		it("fails if one of the calls fails", async () => {
+			let calls = [
+				{ target: token.address, callData: encode("totalSupply", []) },
+				{ target: token.address, callData: encode("transferFrom", [account1, root, 1000]) },
+			];
+			await expectRevert(multicall.aggregate.call(calls), "Multicall::aggregate: call failed");
+		});
+	});
+
+	describe("tryAggregate", () => {
+		it("returns the success flag of every call", async () => {
+			let calls = [
+				{ target: token.address, callData: encode("transferFrom", [account1, root, 1000]) },
+				{ target: token.address, callData: encode("balanceOf", [account1]) },
+			];
+			let result = await multicall.tryAggregate.call(false, calls);
+
+			expect(result.returnData[0].success).to.be.false;
+			expect(result.returnData[1].success).to.be.true;
+			expect(web3.eth.abi.decodeParameter("uint256", result.returnData[1].returnData)).to.be.equal("1000");
+		});
+
+		it("fails if required and one of the calls fails", async () => {
+			let calls = [{ target: token.address, callData: encode("transferFrom", [account1, root, 1000]) }];
+			await expectRevert(multicall.tryAggregate.call(true, calls), "Multicall::tryAggregate: call failed");
+		});
+	});
+
+	describe("helpers", () => {
+		it("returns the block number, timestamp and balance", async () => {
+			let block = await web3.eth.getBlock("latest");
+			expect(await multicall.getBlockNumber()).to.be.bignumber.equal(new BN(block.number));
+			expect(await multicall.getCurrentBlockTimestamp()).to.be.bignumber.equal(new BN(block.timestamp));
+			expect(await multicall.getEthBalance(root)).to.be.bignumber.equal(new BN(await web3.eth.getBalance(root)));
+		});
+	});
+});